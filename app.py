@@ -1,25 +1,120 @@
 import os
 import json
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+import hashlib
+import click
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask.cli import AppGroup
 from flask_migrate import Migrate
-from models import db, Asistente, Charla, asistente_charla
-from utils import generate_qr_code, export_registros_excel, export_asistentes_excel, export_reporte_general
+from models import db, Asistente, Charla, Contador, EscaneoSincronizado, texto_busqueda
+from utils import (generate_qr_code, generate_qr_codes_batch, render_qr_bytes, build_qr_payload, decode_qr_payload,
+                   render_asistente_fragment, export_registros_excel, export_asistentes_excel, export_reporte_general)
+from indice_qr import IndiceQR
+from importacion import importar_asistentes
+from tareas import ColaTareas
+from exportaciones import GestorExportaciones
+from estadisticas import calcular_estadisticas
+import asistencias
+import basedatos
+from contadores import ContadoresEnVivo, CHARLAS, ASISTENTES, CONFIRMADOS, ASISTENCIAS, clave_charla
+from eventos import DifusorEventos, registrar_asistencias
+from escritura_diferida import BufferCheckins
+from cache_escaneos import CacheEscaneos, CacheFragmentos
+from filtro_qr import FiltroQR
 from datetime import datetime
-from sqlalchemy import text, func
+from sqlalchemy import or_, select, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 import tempfile
 import pandas as pd
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-for-development')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///qr_asistencia.db'
+# Base de datos: SQLite local por defecto; DATABASE_URL permite usar PostgreSQL o MySQL
+app.config['SQLALCHEMY_DATABASE_URI'] = basedatos.uri_desde_entorno('sqlite:///qr_asistencia.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Clave para firmar los códigos QR v2 (cambiarla invalida los QR ya emitidos). Es
+# independiente de SECRET_KEY: cada QR impreso permitiría probar claves sin conexión
+app.config['QR_SECRET_KEY'] = os.environ.get('QR_SECRET_KEY', 'dev-qr-key-for-development')
+# Guardar también en static/qrcodes las imágenes QR (por defecto se generan bajo demanda en /qr/<id>.png)
+app.config['QR_GUARDAR_ARCHIVOS'] = os.environ.get('QR_GUARDAR_ARCHIVOS', '0') == '1'
+# Directorio y tiempo de retención (segundos) de los archivos exportados
+app.config['EXPORT_DIR'] = os.environ.get('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'qr_asistencia_exportaciones'))
+app.config['EXPORT_TTL_SEGUNDOS'] = int(os.environ.get('EXPORT_TTL_SEGUNDOS', 3600))
+# Número máximo de códigos aceptados por las peticiones por lotes
+app.config['QR_LOTE_MAX'] = int(os.environ.get('QR_LOTE_MAX', 500))
+# Asistentes por página en el dashboard (y máximo admitido en /api/asistentes)
+app.config['DASHBOARD_POR_PAGINA'] = 50
+app.config['DASHBOARD_POR_PAGINA_MAX'] = 200
+# Escritura diferida de los escaneos: se responden tras anotarlos en un log local
+# y se guardan en la base de datos por lotes (ver escritura_diferida.py)
+app.config['CHECKIN_DIFERIDO'] = os.environ.get('CHECKIN_DIFERIDO', '0') == '1'
+app.config['CHECKIN_INTERVALO_MS'] = int(os.environ.get('CHECKIN_INTERVALO_MS', 5))
+app.config['CHECKIN_LOG_FSYNC'] = os.environ.get('CHECKIN_LOG_FSYNC', '0') == '1'
+# Canal WebSocket del servicio de check-in asíncrono para las páginas de escaneo
+# (p. ej. /ws/escaner tras un proxy inverso, o wss://servidor:8001/ws/escaner); vacío = solo HTTP
+app.config['CHECKIN_WS_URL'] = os.environ.get('CHECKIN_WS_URL', '')
+# Ventana (segundos) en la que se repite la respuesta a un mismo escaneo de una estación
+app.config['ESCANEOS_CACHE_TTL_SEGUNDOS'] = float(os.environ.get('ESCANEOS_CACHE_TTL_SEGUNDOS', 3))
+# Número máximo de fragmentos HTML de asistentes guardados en memoria por proceso
+app.config['FRAGMENTOS_CACHE_MAX'] = int(os.environ.get('FRAGMENTOS_CACHE_MAX', 5000))
+# Intervalo (segundos) de consulta de evento_asistencia para los paneles en vivo; 0 = sin difusión
+app.config['EVENTOS_INTERVALO_SONDEO'] = float(os.environ.get('EVENTOS_INTERVALO_SONDEO', 1))
 
 # Initialize database
+# Opciones del motor (PRAGMA de SQLite o pool de conexiones) antes de crearlo
+basedatos.configurar(app.config)
 db.init_app(app)
 migrate = Migrate(app, db)
+with app.app_context():
+    basedatos.registrar_eventos(app.config, db.engine)
+
+# Índice en memoria de claves QR para resolver los escaneos sin consultas LIKE
+indice_qr = IndiceQR()
+indice_qr.registrar_eventos()
+
+# Tareas en segundo plano (generación de QR de importaciones, etc.)
+tareas = ColaTareas()
+tareas.init_app(app)
+
+# Exportaciones a Excel en segundo plano, con eliminación automática de archivos antiguos
+exportaciones = GestorExportaciones()
+exportaciones.init_app(app)
+
+# Contadores de asistencia en vivo para el panel de administración
+contadores = ContadoresEnVivo()
+contadores.init_app(app)
+
+# Difusión de las confirmaciones de asistencia a los paneles abiertos (Server-Sent Events)
+eventos = DifusorEventos()
+eventos.init_app(app)
+
+# Cola de check-ins con escritura diferida (desactivada por defecto); al arrancar
+# recupera los check-ins anotados en el log por un proceso que terminó sin guardarlos
+checkins = BufferCheckins()
+checkins.init_app(app)
+
+# Respuestas recientes por estación para absorber las lecturas repetidas del mismo QR
+cache_escaneos = CacheEscaneos()
+cache_escaneos.init_app(app)
+
+# Fragmentos HTML de asistentes ya registrados, por (ID, versión), para cualquier estación
+cache_fragmentos = CacheFragmentos()
+cache_fragmentos.init_app(app)
+
+# Filtros de Bloom con los códigos QR válidos para descartar lecturas inválidas en el navegador
+filtro_qr = FiltroQR()
+filtro_qr.init_app(app)
 
 # Crear tablas de base de datos y charlas predefinidas
 with app.app_context():
+    # Verificar la conexión e informar la configuración efectiva de la base de datos
+    diagnostico_bd = basedatos.diagnostico(db.engine)
+    print("Base de datos: " + ", ".join(f"{clave}={valor}" for clave, valor in diagnostico_bd.items()))
+    for aviso in basedatos.advertencias(diagnostico_bd):
+        print(f"Advertencia: {aviso}")
+    if 'QR_SECRET_KEY' not in os.environ:
+        print("Advertencia: QR_SECRET_KEY no está definida; los códigos QR se firman con una clave de desarrollo")
+    
     db.create_all()
     
     # Crear charlas predefinidas si no existen
@@ -40,6 +135,11 @@ with app.app_context():
         
         db.session.commit()
         print("Charlas predefinidas creadas correctamente")
+    
+    # Inicializar los contadores en vivo si la tabla está vacía (base de datos nueva)
+    if Contador.query.count() == 0:
+        contadores.recalcular(db.session, calcular_estadisticas(db.session))
+        db.session.commit()
 
 # Proporcionar la variable 'now' a todas las plantillas
 @app.context_processor
@@ -56,10 +156,90 @@ def home():
 def about():
     return render_template("about.html")
 
+def prefijo_siguiente(prefijo):
+    """Menor cadena mayor que todas las que empiezan por prefijo (para búsquedas por rango)"""
+    return prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+
+def buscar_asistentes_pagina(busqueda=None, antes=None, por_pagina=50):
+    """
+    Página de asistentes ordenada del más reciente al más antiguo, con
+    paginación por clave (keyset): en lugar de OFFSET se piden los asistentes
+    con ID menor que el último mostrado, así el costo depende del tamaño de
+    la página y no del total de registros.
+    
+    Args:
+        busqueda (str): Prefijo de nombres, empresa o DNI (sin distinguir mayúsculas ni tildes)
+        antes (int): ID del último asistente de la página anterior
+        por_pagina (int): Número de asistentes por página
+        
+    Returns:
+        tuple: (filas de la página, ID para pedir la página siguiente o None)
+    """
+    consulta = select(Asistente.id, Asistente.nombres, Asistente.empresa, Asistente.dni,
+                      Asistente.correo, Asistente.fecha_registro)
+    orden = Asistente.id.desc()
+    
+    if busqueda:
+        # Rangos sobre las columnas normalizadas (ver texto_busqueda) y dni para usar sus
+        # índices (un LIKE 'texto%' sin distinguir mayúsculas no los aprovecha en SQLite)
+        prefijo = texto_busqueda(busqueda)
+        condiciones = [(Asistente.dni >= busqueda) & (Asistente.dni < prefijo_siguiente(busqueda))]
+        if prefijo:
+            siguiente = prefijo_siguiente(prefijo)
+            condiciones += [
+                (Asistente.nombres_busqueda >= prefijo) & (Asistente.nombres_busqueda < siguiente),
+                (Asistente.empresa_busqueda >= prefijo) & (Asistente.empresa_busqueda < siguiente),
+            ]
+        consulta = consulta.where(or_(*condiciones))
+        # PostgreSQL y MySQL eligen con sus estadísticas entre recorrer el índice del ID
+        # hacia atrás (prefijos amplios, se detiene en el LIMIT) y los índices del prefijo
+        # (pocas coincidencias). SQLite, sin ANALYZE, prefiere recorrer la tabla por ID:
+        # ordenar por una expresión lo obliga a buscar primero en los índices del prefijo
+        if db.session.get_bind().dialect.name == 'sqlite':
+            orden = (Asistente.id + 0).desc()
+    
+    if antes is not None:
+        consulta = consulta.where(Asistente.id < antes)
+    
+    # Pedir una fila extra para saber si hay una página siguiente
+    filas = db.session.execute(consulta.order_by(orden).limit(por_pagina + 1)).all()
+    siguiente_pagina = filas[por_pagina - 1].id if len(filas) > por_pagina else None
+    return filas[:por_pagina], siguiente_pagina
+
+def parametros_pagina():
+    """Lee los parámetros de búsqueda y paginación del dashboard de la petición"""
+    busqueda = (request.args.get('q') or '').strip()[:100]
+    antes = request.args.get('antes', type=int)
+    por_pagina = request.args.get('por_pagina', type=int) or app.config['DASHBOARD_POR_PAGINA']
+    por_pagina = max(1, min(por_pagina, app.config['DASHBOARD_POR_PAGINA_MAX']))
+    return busqueda, antes, por_pagina
+
 @app.route("/dashboard")
 def dashboard():
-    asistentes = Asistente.query.all()
-    return render_template("dashboard.html", asistentes=asistentes)
+    busqueda, antes, por_pagina = parametros_pagina()
+    asistentes, siguiente = buscar_asistentes_pagina(busqueda, antes, por_pagina)
+    return render_template("dashboard.html", asistentes=asistentes, busqueda=busqueda,
+                           siguiente=siguiente, por_pagina=por_pagina)
+
+@app.route("/api/asistentes")
+def api_asistentes():
+    """Página de asistentes en JSON para que el dashboard cargue más filas o filtre sin recargar"""
+    busqueda, antes, por_pagina = parametros_pagina()
+    asistentes, siguiente = buscar_asistentes_pagina(busqueda, antes, por_pagina)
+    return jsonify({
+        'success': True,
+        'asistentes': [{
+            'id': a.id,
+            'nombres': a.nombres,
+            'empresa': a.empresa,
+            'dni': a.dni,
+            'correo': a.correo,
+            'fecha_registro': a.fecha_registro.strftime('%d/%m/%Y') if a.fecha_registro else '',
+            'qr_url': url_for('view_qr', id=a.id),
+            'qr_imagen_url': qr_imagen_url(a.id)
+        } for a in asistentes],
+        'siguiente': siguiente
+    })
 
 @app.route("/register", methods=["GET", "POST"])
 def register():
@@ -100,6 +280,7 @@ def register():
         
         # Save to database
         db.session.add(asistente)
+        contadores.incrementar(db.session, ASISTENTES)
         db.session.commit()
         
         # Asociar asistente con las charlas seleccionadas en la tabla de asociación
@@ -111,21 +292,12 @@ def register():
         
         db.session.commit()
         
-        # Generar un código QR más pequeño con las 3 primeras letras de cada campo
-        # y agregando "01" al final
-        nombre_corto = nombres[:3] if nombres else "NNN"
-        empresa_corta = empresa[:3] if empresa else "EEE"
-        dni_corto = dni[:3] if dni else "DDD"
-        cargo_corto = cargo[:3] if cargo else "CCC"
-        numero_corto = numero[:3] if numero else "000"
-        
-        # Crear un string compacto para el QR en lugar de JSON
-        qr_data = f"{nombre_corto}{empresa_corta}{dni_corto}{cargo_corto}{numero_corto}01"
-        qr_path = generate_qr_code(qr_data, asistente.id)
-        
-        # Update asistente with QR code path
-        asistente.codigoQR = qr_path
-        db.session.commit()
+        # El QR (formato v2: ID del asistente + firma) se sirve bajo demanda desde /qr/<id>.png;
+        # opcionalmente se guarda también la imagen en disco
+        if app.config['QR_GUARDAR_ARCHIVOS']:
+            qr_data = build_qr_payload(asistente.id, app.config['QR_SECRET_KEY'])
+            asistente.codigoQR = generate_qr_code(qr_data, asistente.id)
+            db.session.commit()
         
         flash('Asistente registrado correctamente', 'success')
         return redirect(url_for('view_qr', id=asistente.id))
@@ -137,6 +309,37 @@ def view_qr(id):
     asistente = Asistente.query.get_or_404(id)
     return render_template("view_qr.html", asistente=asistente)
 
+@app.route("/qr/<int:id>.<any(png, svg):formato>")
+def qr_imagen(id, formato):
+    """
+    Imagen del código QR de un asistente, generada bajo demanda.
+    
+    Las imágenes recientes se mantienen en una caché LRU en memoria y se
+    envían con ETag y Cache-Control immutable: el contenido solo depende del
+    ID y de la clave de firma, que forma parte de la URL (parámetro v).
+    """
+    payload = build_qr_payload(id, app.config['QR_SECRET_KEY'])
+    etag = hashlib.sha256(f"{formato}:{payload}".encode()).hexdigest()[:32]
+    
+    # El navegador ya tiene esta imagen: responder sin consultar la base de datos
+    if request.if_none_match.contains(etag):
+        respuesta = app.response_class(status=304)
+    else:
+        if db.session.get(Asistente, id) is None:
+            return "Asistente no encontrado", 404
+        mimetype = 'image/svg+xml' if formato == 'svg' else 'image/png'
+        respuesta = app.response_class(render_qr_bytes(payload, formato), mimetype=mimetype)
+    
+    respuesta.set_etag(etag)
+    respuesta.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return respuesta
+
+@app.template_global()
+def qr_imagen_url(asistente_id, formato='png'):
+    """URL de la imagen QR; incluye la firma para que cambie si cambia la clave"""
+    firma = build_qr_payload(asistente_id, app.config['QR_SECRET_KEY']).rsplit('.', 1)[1]
+    return url_for('qr_imagen', id=asistente_id, formato=formato, v=firma)
+
 @app.route("/confirmar-asistencia")
 def confirmar_asistencia():
     # Obtenemos todas las charlas disponibles para mostrarlas en la interfaz del escáner QR
@@ -163,46 +366,41 @@ def asistente_info():
                               asistente=None, 
                               error_message="No se proporcionó un código QR")
     
+    # Repeticiones del mismo escaneo desde la misma estación: responder desde la caché
+    clave_cache = clave_escaneo(codigo_qr) if es_ajax else None
+    if clave_cache:
+        fragmento = cache_escaneos.obtener(clave_cache)
+        if fragmento is not None:
+            return fragmento
+    
     try:
         # Verificar si el formato del código es válido
-        if len(codigo_qr) < 17:  # Debería tener al menos 17 caracteres
+        version, valor = decode_qr_payload(codigo_qr, app.config['QR_SECRET_KEY'])
+        if version is None:
             if es_ajax:
                 return "<div class='alert alert-danger'>Formato de código QR inválido</div>"
             return render_template("asistente_info.html", 
                                   asistente=None, 
                                   error_message="Formato de código QR inválido")
         
-        # Extraer los fragmentos de los campos
-        nombre_frag = codigo_qr[:3]
-        empresa_frag = codigo_qr[3:6]
-        dni_frag = codigo_qr[6:9]
-        cargo_frag = codigo_qr[9:12]
-        numero_frag = codigo_qr[12:15]
-        
-        # Buscar el asistente usando los fragmentos del código
-        asistentes_posibles = Asistente.query.filter(
-            Asistente.nombres.like(f"{nombre_frag}%"),
-            Asistente.empresa.like(f"{empresa_frag}%"),
-            Asistente.dni.like(f"{dni_frag}%")
-        ).all()
-        
-        # Si encontramos múltiples coincidencias, intentamos refinar con el cargo y número
-        if len(asistentes_posibles) > 1:
-            asistentes_posibles = [a for a in asistentes_posibles if 
-                                 (not a.cargo or a.cargo.startswith(cargo_frag)) and
-                                 (not a.numero or a.numero.startswith(numero_frag))]
+        # Buscar el asistente según la versión del código
+        asistente = resolver_asistente(version, valor)
         
         # Si no encontramos asistente con esos criterios
-        if not asistentes_posibles:
+        if not asistente:
             error_msg = "No se encontró ningún asistente con este código QR"
             if es_ajax:
-                return f"<div class='alert alert-danger'>{error_msg}</div>"
+                return guardar_escaneo(clave_cache, f"<div class='alert alert-danger'>{error_msg}</div>")
             return render_template("asistente_info.html", 
                                   asistente=None, 
                                   error_message=error_msg)
         
-        # Tomar el primer asistente que coincide
-        asistente = asistentes_posibles[0]
+        # Un asistente ya registrado muestra siempre lo mismo mientras no cambie su versión:
+        # el fragmento en caché evita la consulta de sus charlas y la construcción del HTML
+        if es_ajax and asistente.asistencia_confirmada:
+            fragmento = cache_fragmentos.obtener(asistente.id, asistente.version)
+            if fragmento is not None:
+                return guardar_escaneo(clave_cache, fragmento)
         
         # Obtener las charlas a las que está registrado
         charlas_asistente = get_charlas_asistente(asistente)
@@ -211,42 +409,33 @@ def asistente_info():
         ya_registrado = asistente.asistencia_confirmada
         mensaje_registro = "Este QR ya fue registrado anteriormente"
         
-        # Si no está ya registrado, registrar la asistencia
-        if not ya_registrado:
-            asistente.asistencia_confirmada = True
-            asistente.fecha_asistencia = datetime.now()
-            db.session.commit()
+        # Si no está ya registrado, registrar la asistencia con un UPDATE condicional:
+        # si otra estación lo confirmó mientras tanto, no se afecta ninguna fila
+        if not ya_registrado and checkins.activo:
+            # Escritura diferida: se responde en cuanto el check-in queda en el log
+            fecha = datetime.now()
+            ya_registrado = not checkins.encolar(f"general:{asistente.id}", {
+                'asistente': asistente.to_dict(), 'charla_id': None, 'fecha': fecha.isoformat()
+            })
+            if not ya_registrado:
+                # Mostrar la confirmación sin marcar el objeto como modificado en la sesión
+                set_committed_value(asistente, 'asistencia_confirmada', True)
+                set_committed_value(asistente, 'fecha_asistencia', fecha)
+        elif not ya_registrado:
+            fecha = datetime.now()
+            ya_registrado = not confirmar_asistencia_general(asistente.id, fecha)
+            if not ya_registrado:
+                registrar_asistencias(db.session, [(asistente.to_dict(), None, fecha)])
+                db.session.commit()
         
         if es_ajax:
             # Si es AJAX, devuelve un fragmento HTML
-            html_fragment = f"""
-            <div class="text-center mb-3">
-                {"<div class='alert alert-warning'><strong>¡Atención!</strong> " + mensaje_registro + "</div>" 
-                 if ya_registrado else 
-                 "<div class='alert alert-success'><strong>¡Asistencia confirmada!</strong> Registro exitoso.</div>"}
-                
-                {"<p class='text-muted small'>Hora de registro: " + asistente.fecha_asistencia.strftime('%d/%m/%Y %H:%M:%S') + "</p>"
-                 if asistente.fecha_asistencia else ""}
-            </div>
-            
-            <h4>{asistente.nombres}</h4>
-            <hr>
-            
-            <div class="mb-2"><strong>Empresa:</strong> {asistente.empresa}</div>
-            <div class="mb-2"><strong>DNI:</strong> {asistente.dni}</div>
-            <div class="mb-2"><strong>Cargo:</strong> {asistente.cargo or 'No especificado'}</div>
-            <div class="mb-2"><strong>Correo:</strong> {asistente.correo}</div>
-            <div class="mb-2"><strong>Teléfono:</strong> {asistente.numero or 'No especificado'}</div>
-            
-            <div class="mt-3">
-                <h5>Charlas registradas:</h5>
-                {"".join([
-                    f"<div class='list-group-item mb-1'><strong>{charla['nombre']}</strong></div>"
-                    for charla in charlas_asistente
-                ]) if charlas_asistente else "<p class='text-muted'>No hay charlas registradas para este asistente.</p>"}
-            </div>
-            """
-            return html_fragment
+            fragmento = render_asistente_fragment(asistente, charlas_asistente, ya_registrado, mensaje_registro)
+            if ya_registrado and asistente.asistencia_confirmada:
+                # Solo el registro ya guardado (no el recién confirmado ni el pendiente en la
+                # cola diferida), con la versión leída junto con los datos mostrados
+                cache_fragmentos.guardar(asistente.id, asistente.version, fragmento)
+            return guardar_escaneo(clave_cache, fragmento)
         else:
             # Si no es AJAX, renderizar la plantilla completa
             return render_template("asistente_info.html", 
@@ -264,6 +453,64 @@ def asistente_info():
                               asistente=None, 
                               error_message=error_msg)
 
+# Caché de escaneos repetidos (ver cache_escaneos.py)
+def clave_escaneo(codigo, charla_id=None):
+    """
+    Clave de la caché para un escaneo, o None si la estación no se identificó.
+    
+    Las páginas de escaneo envían su identificador (generado y guardado en
+    localStorage) en la cabecera X-Estacion o en el parámetro ?estacion=.
+    """
+    estacion = request.headers.get('X-Estacion') or request.args.get('estacion')
+    if not estacion:
+        return None
+    return (estacion[:64], codigo, charla_id)
+
+def guardar_escaneo(clave, respuesta):
+    """Guarda la respuesta de un escaneo en la caché (si hay clave) y la devuelve"""
+    if clave:
+        cache_escaneos.guardar(clave, respuesta)
+    return respuesta
+
+# Funciones auxiliares para resolver el asistente a partir de un código QR
+def resolver_asistente(version, valor):
+    """
+    Devuelve el asistente para un código ya decodificado con decode_qr_payload.
+    
+    Los códigos v2 llevan el ID del asistente, por lo que basta una consulta por
+    clave primaria; los heredados (v1) se resuelven por su clave de fragmentos.
+    """
+    if version == 'v2':
+        return db.session.get(Asistente, valor)
+    return buscar_asistente_por_clave(valor)
+
+def buscar_asistente_por_clave(clave):
+    """
+    Devuelve el asistente que corresponde a la clave QR heredada o None.
+    
+    Primero consulta el índice en memoria (búsqueda O(1) por clave exacta) y
+    verifica los candidatos por clave primaria. Si no hay coincidencia recurre
+    a la base de datos con una búsqueda por igualdad sobre la columna indexada qr_key.
+    """
+    if not indice_qr.cargado:
+        indice_qr.cargar(db.session)
+    
+    ids = indice_qr.buscar(clave)
+    if ids:
+        candidatos = Asistente.query.filter(Asistente.id.in_(ids)).order_by(Asistente.id).all()
+        # Descartar entradas obsoletas del índice (p. ej. editadas desde otro proceso)
+        candidatos = [a for a in candidatos if a.qr_key == clave]
+        if candidatos:
+            return candidatos[0]
+    
+    asistente = Asistente.query.filter_by(qr_key=clave).order_by(Asistente.id).first()
+    
+    # Incorporar al índice el asistente encontrado (p. ej. registrado en otro proceso)
+    if asistente:
+        indice_qr.agregar(asistente.id, asistente.qr_key)
+    
+    return asistente
+
 # Función auxiliar para obtener las charlas de un asistente
 def get_charlas_asistente(asistente):
     charlas_asistente = []
@@ -282,7 +529,9 @@ def procesar_qr():
     Procesa un código QR escaneado y devuelve la información del asistente
     junto con las charlas a las que está registrado.
     
-    El formato del código QR es: [3 letras nombre][3 letras empresa][3 letras DNI][3 letras cargo][3 letras número]01
+    Se aceptan dos formatos de código QR:
+    - v2: QA2[ID en base 36].[firma de 8 caracteres]
+    - v1 (heredado): [3 letras nombre][3 letras empresa][3 letras DNI][3 letras cargo][3 letras número]01
     """
     data = request.get_json()
     
@@ -292,41 +541,21 @@ def procesar_qr():
     codigo_qr = data['codigo']
     
     # Verificar si el formato del código es válido
-    if len(codigo_qr) < 17:  # Debería tener al menos 17 caracteres (5 campos * 3 caracteres + "01")
+    version, valor = decode_qr_payload(codigo_qr, app.config['QR_SECRET_KEY'])
+    if version is None:
         return jsonify({'success': False, 'message': 'Formato de código QR inválido'})
     
     try:
-        # Extraer los fragmentos de los campos
-        nombre_frag = codigo_qr[:3]
-        empresa_frag = codigo_qr[3:6]
-        dni_frag = codigo_qr[6:9]
-        cargo_frag = codigo_qr[9:12]
-        numero_frag = codigo_qr[12:15]
-        
-        # Intentar buscar el asistente usando los fragmentos del código
-        # Usamos LIKE para hacer una búsqueda aproximada, ya que solo tenemos los primeros 3 caracteres
-        asistentes_posibles = Asistente.query.filter(
-            Asistente.nombres.like(f"{nombre_frag}%"),
-            Asistente.empresa.like(f"{empresa_frag}%"),
-            Asistente.dni.like(f"{dni_frag}%")
-        ).all()
-        
-        # Si encontramos múltiples coincidencias, intentamos refinar con el cargo y número
-        if len(asistentes_posibles) > 1:
-            asistentes_posibles = [a for a in asistentes_posibles if 
-                                   (not a.cargo or a.cargo.startswith(cargo_frag)) and
-                                   (not a.numero or a.numero.startswith(numero_frag))]
+        # Buscar el asistente según la versión del código
+        asistente = resolver_asistente(version, valor)
         
         # Si no encontramos asistente con esos criterios
-        if not asistentes_posibles:
+        if not asistente:
             return jsonify({
                 'success': False, 
                 'message': 'No se encontró ningún asistente con este código QR'
             })
         
-        # Tomar el primer asistente que coincide
-        asistente = asistentes_posibles[0]
-        
         # Obtener las charlas a las que está registrado
         charlas_asistente = []
         for charla in asistente.charlas_rel.all():
@@ -358,41 +587,184 @@ def ver_charla(id):
     
     # Verificar si se solicita la vista de registros
     if request.args.get('view') == 'registros':
-        # Obtener información de asistencias para mostrar el estado de cada asistente
-        asistencias = db.session.execute(
-            text(f"SELECT asistente_id, charla_id, asistio, fecha_confirmacion FROM asistente_charla "
-                f"WHERE charla_id = {id}")
-        ).fetchall()
+        # Una página de inscritos con su estado de asistencia, en una sola consulta
+        despues, por_pagina = parametros_pagina_registros()
+        registros, siguiente = registros_charla_pagina(charla.id, despues, por_pagina)
+        asistieron = contadores.leer(db.session).get(clave_charla(charla.id), 0)
         
         # Mostrar la plantilla de registros
-        return render_template("registros_charla.html", charla=charla, asistencias=asistencias)
+        return render_template("registros_charla.html", charla=charla, registros=registros,
+                               siguiente=siguiente, por_pagina=por_pagina, asistieron=asistieron)
     
     # Por defecto, mostrar la página principal con el escáner QR
     return render_template("ver_charla.html", charla=charla)
 
+def registros_charla_pagina(charla_id, despues=None, por_pagina=50):
+    """
+    Página de inscritos a una charla con su estado de asistencia, unida con los
+    datos del asistente en una sola consulta y paginada por ID de asistente.
+    
+    Args:
+        charla_id (int): ID de la charla
+        despues (int): ID del último asistente de la página anterior
+        por_pagina (int): Número de inscritos por página
+        
+    Returns:
+        tuple: (filas de la página, ID para pedir la página siguiente o None)
+    """
+    # Pedir una fila extra para saber si hay una página siguiente
+    filas = asistencias.registros_charla(db.session, charla_id, despues, por_pagina + 1)
+    siguiente = filas[por_pagina - 1].id if len(filas) > por_pagina else None
+    return filas[:por_pagina], siguiente
+
+def parametros_pagina_registros():
+    """Lee los parámetros de paginación de los registros de una charla"""
+    despues = request.args.get('despues', type=int)
+    por_pagina = request.args.get('por_pagina', type=int) or app.config['DASHBOARD_POR_PAGINA']
+    por_pagina = max(1, min(por_pagina, app.config['DASHBOARD_POR_PAGINA_MAX']))
+    return despues, por_pagina
+
+@app.route("/api/charlas/<int:id>/registros")
+def api_registros_charla(id):
+    """Inscritos a una charla con su estado de asistencia, en JSON (para los escáneres y la lista)"""
+    charla = Charla.query.get_or_404(id)
+    despues, por_pagina = parametros_pagina_registros()
+    registros, siguiente = registros_charla_pagina(charla.id, despues, por_pagina)
+    return jsonify({
+        'success': True,
+        'charla': {
+            'id': charla.id,
+            'nombre': charla.nombre
+        },
+        'registros': [{
+            'id': r.id,
+            'nombres': r.nombres,
+            'empresa': r.empresa,
+            'dni': r.dni,
+            'asistio': bool(r.asistio),
+            'fecha_confirmacion': r.fecha_confirmacion.isoformat() if r.fecha_confirmacion else None
+        } for r in registros],
+        'siguiente': siguiente
+    })
+
+@app.route("/api/filtro-qr")
+def api_filtro_qr():
+    """
+    Filtro de Bloom versionado de los códigos QR válidos (ver filtro_qr.py).
+    
+    Con ?charla=<id> solo incluye a los inscritos en esa charla. Con
+    ?version=<versión anterior> devuelve solo las posiciones de bits nuevas
+    ('delta') cuando es posible, o el filtro completo si no.
+    """
+    charla_id = request.args.get('charla', type=int)
+    if charla_id is not None:
+        Charla.query.get_or_404(charla_id)
+    filtro = filtro_qr.consultar(db.session, charla_id, request.args.get('version'))
+    return jsonify(dict(filtro, success=True))
+
 @app.route("/confirmar/<int:charla_id>/<int:asistente_id>", methods=["POST"])
 def confirmar_asistente(charla_id, asistente_id):
     # Confirmar la asistencia de un participante a una charla
     charla = Charla.query.get_or_404(charla_id)
     asistente = Asistente.query.get_or_404(asistente_id)
     
-    # Verificamos si el asistente ya está asociado con la charla
-    # Si no lo está, lo asociamos ahora
-    if asistente not in charla.asistentes:
-        charla.asistentes.append(asistente)
-    
-    # Actualizamos la relación para marcar la asistencia como confirmada
-    # Esto lo haremos directamente en la base de datos ya que SQLAlchemy no maneja
-    # fácilmente los atributos de tablas asociativas
-    db.session.execute(
-        text(f"UPDATE asistente_charla SET asistio = 1, fecha_confirmacion = '{datetime.now()}' "
-             f"WHERE asistente_id = {asistente_id} AND charla_id = {charla_id}")
-    )
+    # Marcar la asistencia; si el asistente no estaba inscrito, se le inscribe ya confirmado
+    fecha = datetime.now()
+    estado = confirmar_asistencia_charla(asistente.id, charla.id, fecha, inscribir=True)
+    if estado == 'confirmada':
+        registrar_asistencias(db.session, [(asistente.to_dict(), charla.id, fecha)])
     db.session.commit()
     
     flash(f'Asistencia de {asistente.nombres} confirmada para {charla.nombre}', 'success')
     return redirect(url_for('ver_charla', id=charla_id))
 
+def confirmar_asistencia_general(asistente_id, fecha):
+    """
+    Marca la asistencia general al evento con un UPDATE condicional, sin commit.
+    
+    Returns:
+        bool: False si el asistente ya tenía la asistencia confirmada
+    """
+    if asistencias.confirmar_general(db.session, asistente_id, fecha) == 0:
+        return False
+    contadores.incrementar(db.session, CONFIRMADOS)
+    return True
+
+def confirmar_asistencia_charla(asistente_id, charla_id, fecha, inscribir=False):
+    """
+    Marca la asistencia a una charla con una sola sentencia condicional, sin commit.
+    
+    Solo se actualiza la inscripción si aún no tenía asistencia confirmada, así
+    que el número de filas afectadas indica el resultado; la consulta adicional
+    para distinguir "ya confirmada" de "no inscrito" solo se hace cuando no se
+    actualizó nada. Con inscribir=True, un asistente no inscrito se inscribe ya
+    confirmado (la clave primaria de asistente_charla impide duplicados).
+    
+    Returns:
+        str: 'confirmada', 'ya_confirmada' o 'no_inscrito'
+    """
+    if asistencias.confirmar(db.session, asistente_id, charla_id, fecha) == 0:
+        if inscribir:
+            try:
+                with db.session.begin_nested():
+                    asistencias.inscribir_confirmado(db.session, asistente_id, charla_id, fecha)
+            except IntegrityError:
+                # Ya estaba inscrito (y confirmado)
+                return 'ya_confirmada'
+        elif asistencias.esta_inscrito(db.session, asistente_id, charla_id):
+            return 'ya_confirmada'
+        else:
+            return 'no_inscrito'
+    
+    # Contadores en vivo, en la misma transacción que la confirmación
+    contadores.incrementar(db.session, ASISTENCIAS)
+    contadores.incrementar(db.session, clave_charla(charla_id))
+    return 'confirmada'
+
+def encolar_asistencia_charla(asistente, charla_id, fecha):
+    """
+    Variante de confirmar_asistencia_charla para la escritura diferida: valida la
+    inscripción con una lectura y deja la confirmación en la cola de check-ins.
+    
+    Returns:
+        str: 'confirmada', 'ya_confirmada' o 'no_inscrito'
+    """
+    asistio = asistencias.estados(db.session, [asistente.id], [charla_id]).get((asistente.id, charla_id))
+    if asistio is None:
+        return 'no_inscrito'
+    if asistio:
+        return 'ya_confirmada'
+    encolada = checkins.encolar(f"charla:{charla_id}:{asistente.id}", {
+        'asistente': asistente.to_dict(), 'charla_id': charla_id, 'fecha': fecha.isoformat()
+    })
+    return 'confirmada' if encolada else 'ya_confirmada'
+
+@checkins.aplicador
+def aplicar_checkins(lote):
+    """
+    Guarda en la base de datos un lote de la cola de check-ins con un solo commit.
+    
+    Reaplicar un check-in ya guardado (p. ej. al recuperar el log tras una caída)
+    no tiene efecto: las confirmaciones son condicionales y los contadores solo
+    cambian cuando se actualiza una fila.
+    """
+    confirmadas = []
+    try:
+        for operacion in lote:
+            asistente = operacion['asistente']
+            fecha = datetime.fromisoformat(operacion['fecha'])
+            if operacion['charla_id'] is None:
+                confirmada = confirmar_asistencia_general(asistente['id'], fecha)
+            else:
+                confirmada = confirmar_asistencia_charla(asistente['id'], operacion['charla_id'], fecha) == 'confirmada'
+            if confirmada:
+                confirmadas.append((asistente, operacion['charla_id'], fecha))
+        registrar_asistencias(db.session, confirmadas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
 @app.route("/charla-asistencia/<int:id>")
 def charla_asistencia(id):
     """
@@ -415,105 +787,464 @@ def confirmar_charla(charla_id):
     
     codigo_qr = data['codigo']
     
+    # Repeticiones del mismo escaneo desde la misma estación: responder desde la caché
+    clave_cache = clave_escaneo(codigo_qr, charla_id)
+    if clave_cache:
+        respuesta = cache_escaneos.obtener(clave_cache)
+        if respuesta is not None:
+            return jsonify(respuesta)
+    
     # Verificar si el formato del código es válido
-    if len(codigo_qr) < 17:  # Debería tener al menos 17 caracteres
+    version, valor = decode_qr_payload(codigo_qr, app.config['QR_SECRET_KEY'])
+    if version is None:
         return jsonify({'success': False, 'message': 'Formato de código QR inválido'})
     
     try:
-        # Extraer los fragmentos de los campos
-        nombre_frag = codigo_qr[:3]
-        empresa_frag = codigo_qr[3:6]
-        dni_frag = codigo_qr[6:9]
-        cargo_frag = codigo_qr[9:12]
-        numero_frag = codigo_qr[12:15]
-        
-        # Buscar el asistente usando los fragmentos del código
-        asistentes_posibles = Asistente.query.filter(
-            Asistente.nombres.like(f"{nombre_frag}%"),
-            Asistente.empresa.like(f"{empresa_frag}%"),
-            Asistente.dni.like(f"{dni_frag}%")
-        ).all()
-        
-        # Refinar búsqueda si hay múltiples coincidencias
-        if len(asistentes_posibles) > 1:
-            asistentes_posibles = [a for a in asistentes_posibles if 
-                                 (not a.cargo or a.cargo.startswith(cargo_frag)) and
-                                 (not a.numero or a.numero.startswith(numero_frag))]
+        # Buscar el asistente según la versión del código
+        asistente = resolver_asistente(version, valor)
         
         # Si no encontramos asistente con esos criterios
-        if not asistentes_posibles:
-            return jsonify({
+        if not asistente:
+            return jsonify(guardar_escaneo(clave_cache, {
                 'success': False, 
                 'message': 'No se encontró ningún asistente con este código QR'
-            })
+            }))
         
-        # Tomar el primer asistente que coincide
-        asistente = asistentes_posibles[0]
         charla = Charla.query.get_or_404(charla_id)
         
-        # Verificar si el asistente está registrado para esta charla
-        if charla not in [c for c in asistente.charlas_rel]:
-            return jsonify({
+        # Confirmar la asistencia con un UPDATE condicional: si no afecta ninguna fila,
+        # el asistente no está inscrito o ya había confirmado (dos estaciones que escanean
+        # el mismo QR a la vez no pueden confirmarlo dos veces)
+        fecha = datetime.now()
+        if checkins.activo:
+            estado = encolar_asistencia_charla(asistente, charla.id, fecha)
+        else:
+            estado = confirmar_asistencia_charla(asistente.id, charla.id, fecha)
+        
+        if estado == 'no_inscrito':
+            return jsonify(guardar_escaneo(clave_cache, {
                 'success': False,
                 'message': f"El asistente {asistente.nombres} no está registrado para la charla {charla.nombre}"
-            })
+            }))
         
-        # Verificar si el asistente ya ha registrado asistencia a esta charla
-        asistencia = db.session.execute(
-            text(f"SELECT asistio FROM asistente_charla "
-                f"WHERE asistente_id = {asistente.id} AND charla_id = {charla.id}")
-        ).fetchone()
-        
-        if asistencia and asistencia.asistio:
-            return jsonify({
+        if estado == 'ya_confirmada':
+            return jsonify(guardar_escaneo(clave_cache, {
                 'success': False,
                 'message': f"El asistente {asistente.nombres} ya registró su asistencia a esta charla"
+            }))
+        
+        datos_asistente = asistente.to_dict()
+        if not checkins.activo:
+            registrar_asistencias(db.session, [(datos_asistente, charla.id, fecha)])
+            db.session.commit()
+        
+        return jsonify(guardar_escaneo(clave_cache, {
+            'success': True,
+            'asistente': datos_asistente,
+            'charla': {
+                'id': charla.id,
+                'nombre': charla.nombre,
+                'descripcion': charla.descripcion
+            }
+        }))
+        
+    except Exception as e:
+        print(f"Error al procesar código QR para charla: {str(e)}")
+        return jsonify({
+            'success': False, 
+            'message': f'Error al procesar código QR: {str(e)}'
+        })
+
+def resolver_asistentes_lote(codigos):
+    """
+    Resuelve una lista de códigos QR con una única consulta a la base de datos.
+    
+    Returns:
+        list: Para cada código, en el mismo orden, el asistente encontrado o
+              un mensaje de error (str)
+    """
+    secret = app.config['QR_SECRET_KEY']
+    decodificados = [decode_qr_payload(codigo, secret) if isinstance(codigo, str) else (None, None)
+                     for codigo in codigos]
+    
+    ids = {valor for version, valor in decodificados if version == 'v2'}
+    claves = {valor for version, valor in decodificados if version == 'v1'}
+    
+    por_id = {}
+    por_clave = {}
+    if ids or claves:
+        condiciones = []
+        if ids:
+            condiciones.append(Asistente.id.in_(ids))
+        if claves:
+            condiciones.append(Asistente.qr_key.in_(claves))
+        for asistente in Asistente.query.filter(or_(*condiciones)).order_by(Asistente.id):
+            por_id[asistente.id] = asistente
+            # Igual que en la búsqueda individual, gana el primer asistente por ID
+            por_clave.setdefault(asistente.qr_key, asistente)
+    
+    resultados = []
+    for version, valor in decodificados:
+        if version is None:
+            resultados.append('Formato de código QR inválido')
+            continue
+        asistente = por_id.get(valor) if version == 'v2' else por_clave.get(valor)
+        resultados.append(asistente or 'No se encontró ningún asistente con este código QR')
+    return resultados
+
+def leer_codigos_lote():
+    """Valida el cuerpo de una petición por lotes y devuelve (códigos, respuesta de error)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('codigos'), list):
+        return None, (jsonify({'success': False, 'message': 'Lista de códigos QR no proporcionada'}), 400)
+    
+    codigos = data['codigos']
+    if len(codigos) > app.config['QR_LOTE_MAX']:
+        return None, (jsonify({
+            'success': False,
+            'message': f"Se admiten como máximo {app.config['QR_LOTE_MAX']} códigos por petición"
+        }), 400)
+    return codigos, None
+
+@app.route("/procesar-qr/lote", methods=["POST"])
+def procesar_qr_lote():
+    """
+    Variante por lotes de procesar_qr: recibe {"codigos": [...]} y devuelve,
+    en el mismo orden, el resultado de cada código.
+    """
+    codigos, error = leer_codigos_lote()
+    if error:
+        return error
+    
+    try:
+        asistentes = resolver_asistentes_lote(codigos)
+        
+        # Obtener las charlas de todos los asistentes encontrados en una sola consulta
+        ids = {a.id for a in asistentes if isinstance(a, Asistente)}
+        charlas_por_asistente = {}
+        for asistente_id, charla in asistencias.charlas_de_asistentes(db.session, ids):
+            charlas_por_asistente.setdefault(asistente_id, []).append({
+                'id': charla.id,
+                'nombre': charla.nombre,
+                'descripcion': charla.descripcion,
+                'fecha': charla.fecha.strftime('%d/%m/%Y %H:%M') if charla.fecha else None
             })
         
-        # Confirmar la asistencia del asistente a la charla
-        db.session.execute(
-            text(f"UPDATE asistente_charla SET asistio = 1, fecha_confirmacion = '{datetime.now()}' "
-                f"WHERE asistente_id = {asistente.id} AND charla_id = {charla.id}")
-        )
+        resultados = []
+        for codigo, asistente in zip(codigos, asistentes):
+            if isinstance(asistente, str):
+                resultados.append({'codigo': codigo, 'success': False, 'message': asistente})
+            else:
+                resultados.append({
+                    'codigo': codigo,
+                    'success': True,
+                    'asistente': asistente.to_dict(),
+                    'charlas': charlas_por_asistente.get(asistente.id, [])
+                })
+        
+        return jsonify({'success': True, 'resultados': resultados})
+    
+    except Exception as e:
+        print(f"Error al procesar lote de códigos QR: {str(e)}")
+        return jsonify({
+            'success': False, 
+            'message': f'Error al procesar códigos QR: {str(e)}'
+        })
+
+@app.route("/confirmar-charla/<int:charla_id>/lote", methods=["POST"])
+def confirmar_charla_lote(charla_id):
+    """
+    Variante por lotes de confirmar_charla: confirma la asistencia a la charla
+    de todos los códigos recibidos en una única transacción y devuelve el
+    resultado de cada código en el mismo orden.
+    """
+    codigos, error = leer_codigos_lote()
+    if error:
+        return error
+    
+    charla = Charla.query.get_or_404(charla_id)
+    
+    try:
+        ahora = datetime.now()
+        escaneos = [{'codigo': codigo, 'charla_id': charla.id, 'fecha': ahora} for codigo in codigos]
+        resultados = registrar_escaneos(escaneos)
+        anotar_escaneos(escaneos, resultados)
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'asistente': asistente.to_dict(),
             'charla': {
                 'id': charla.id,
                 'nombre': charla.nombre,
                 'descripcion': charla.descripcion
+            },
+            'resultados': resultados
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al procesar lote de códigos QR para charla: {str(e)}")
+        return jsonify({
+            'success': False, 
+            'message': f'Error al procesar códigos QR: {str(e)}'
+        })
+
+def registrar_escaneos(escaneos):
+    """
+    Registra un conjunto de escaneos con consultas agrupadas, sin hacer commit.
+    
+    Las lecturas previas (asistentes, charlas, inscripciones) solo descartan lo
+    que no hay que intentar; cada confirmación es un UPDATE condicional, como
+    en los escaneos individuales, y el resultado y los contadores se deducen
+    de las filas afectadas. Así, dos lotes o sincronizaciones simultáneas con
+    el mismo asistente no lo confirman (ni lo cuentan) dos veces.
+    
+    Args:
+        escaneos (list): Diccionarios con 'codigo', 'charla_id' (None para la
+                         asistencia general al evento) y 'fecha' del escaneo
+        
+    Returns:
+        list: Resultado de cada escaneo, en el mismo orden
+    """
+    asistentes = resolver_asistentes_lote([e['codigo'] for e in escaneos])
+    ids = {a.id for a in asistentes if isinstance(a, Asistente)}
+    charla_ids = {e['charla_id'] for e in escaneos if e['charla_id'] is not None}
+    
+    charlas = {}
+    if charla_ids:
+        charlas = {c.id: c for c in Charla.query.filter(Charla.id.in_(charla_ids))}
+    
+    # Estado de inscripción y asistencia de todos los pares (asistente, charla) en una sola consulta
+    inscripciones = asistencias.estados(db.session, ids, charlas.keys())
+    
+    resultados = []
+    nuevos_confirmados = 0
+    por_charla = {}
+    for escaneo, asistente in zip(escaneos, asistentes):
+        codigo = escaneo['codigo']
+        if isinstance(asistente, str):
+            resultados.append({'codigo': codigo, 'success': False, 'message': asistente})
+            continue
+        
+        charla_id = escaneo['charla_id']
+        if charla_id is None:
+            # Asistencia general al evento (misma lógica que asistente_info)
+            ya_registrado = bool(asistente.asistencia_confirmada)
+            if not ya_registrado:
+                ya_registrado = asistencias.confirmar_general(db.session, asistente.id, escaneo['fecha']) == 0
+                if ya_registrado:
+                    # Otra petición lo confirmó mientras tanto: mostrar su hora de registro
+                    db.session.refresh(asistente)
+                else:
+                    set_committed_value(asistente, 'asistencia_confirmada', True)
+                    set_committed_value(asistente, 'fecha_asistencia', escaneo['fecha'])
+                    nuevos_confirmados += 1
+            resultados.append({
+                'codigo': codigo,
+                'success': True,
+                'ya_registrado': ya_registrado,
+                'asistente': asistente.to_dict()
+            })
+            continue
+        
+        charla = charlas.get(charla_id)
+        if charla is None:
+            resultados.append({'codigo': codigo, 'success': False, 'message': 'La charla no existe'})
+        elif (asistente.id, charla_id) not in inscripciones:
+            resultados.append({
+                'codigo': codigo,
+                'success': False,
+                'message': f"El asistente {asistente.nombres} no está registrado para la charla {charla.nombre}"
+            })
+        elif (inscripciones[(asistente.id, charla_id)]
+              or asistencias.confirmar(db.session, asistente.id, charla_id, escaneo['fecha']) == 0):
+            # Ya confirmada antes del lote, por un escaneo anterior del lote o por otra petición
+            inscripciones[(asistente.id, charla_id)] = True
+            resultados.append({
+                'codigo': codigo,
+                'success': False,
+                'message': f"El asistente {asistente.nombres} ya registró su asistencia a esta charla"
+            })
+        else:
+            inscripciones[(asistente.id, charla_id)] = True
+            por_charla[charla_id] = por_charla.get(charla_id, 0) + 1
+            resultados.append({'codigo': codigo, 'success': True, 'asistente': asistente.to_dict()})
+    
+    # Contadores en vivo, en la misma transacción que las confirmaciones
+    contadores.incrementar(db.session, CONFIRMADOS, nuevos_confirmados)
+    contadores.incrementar(db.session, ASISTENCIAS, sum(por_charla.values()))
+    for charla_id, total in por_charla.items():
+        contadores.incrementar(db.session, clave_charla(charla_id), total)
+    
+    return resultados
+
+def fecha_escaneo_cliente(valor, ahora):
+    """Convierte la marca de tiempo del escáner (ms desde epoch) en datetime local"""
+    try:
+        fecha = datetime.fromtimestamp(float(valor) / 1000)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return ahora
+    # No aceptar fechas futuras por relojes desajustados en la estación
+    return min(fecha, ahora)
+
+@eventos.difusor
+def publicar_asistencias(confirmadas):
+    """
+    Difunde a los paneles abiertos en este proceso las asistencias anotadas en
+    evento_asistencia por cualquier proceso (ver eventos.py).
+    
+    Args:
+        confirmadas (list): Tuplas (asistente como diccionario, charla_id o None para
+                            la asistencia general, fecha de la confirmación)
+    """
+    if not confirmadas:
+        return
+    
+    # Una sola lectura de los contadores para todo el grupo de eventos; pueden
+    # haber cambiado en otro proceso, así que no sirven los valores en caché
+    contadores.invalidar()
+    valores = contadores.leer(db.session)
+    for asistente, charla_id, fecha in confirmadas:
+        eventos.publicar('asistencia', {
+            'tipo': 'general' if charla_id is None else 'charla',
+            'charla_id': charla_id,
+            'asistente': {
+                'id': asistente['id'],
+                'nombres': asistente['nombres'],
+                'empresa': asistente['empresa']
+            },
+            'fecha': fecha.isoformat() if fecha else None,
+            'contadores': {
+                'charlas': valores.get(CHARLAS, 0),
+                'asistentes': valores.get(ASISTENTES, 0),
+                'confirmados': valores.get(CONFIRMADOS, 0),
+                'asistencias': valores.get(ASISTENCIAS, 0),
+                'charla': valores.get(clave_charla(charla_id), 0) if charla_id is not None else None
             }
         })
+
+def anotar_escaneos(escaneos, resultados):
+    """Anota para su difusión las asistencias nuevas de un lote procesado con registrar_escaneos (antes del commit)"""
+    confirmadas = []
+    for escaneo, resultado in zip(escaneos, resultados):
+        if resultado['success'] and not resultado.get('ya_registrado'):
+            confirmadas.append((resultado['asistente'], escaneo['charla_id'], escaneo['fecha']))
+    registrar_asistencias(db.session, confirmadas)
+
+@app.route("/eventos")
+def eventos_asistencia():
+    """
+    Flujo Server-Sent Events con las confirmaciones de asistencia y los contadores
+    actualizados. Con ?charla=<id> solo se envían las asistencias a esa charla.
+    """
+    charla_id = request.args.get('charla', type=int)
+    filtro = None
+    if charla_id is not None:
+        filtro = lambda tipo, datos: datos['charla_id'] == charla_id
+    
+    suscriptor = eventos.suscribir(filtro)
+    if suscriptor is None:
+        return jsonify({'success': False, 'message': 'Demasiados paneles conectados, intente más tarde'}), 503
+    
+    return Response(eventos.flujo(suscriptor), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route("/sincronizar-escaneos", methods=["POST"])
+def sincronizar_escaneos():
+    """
+    Recibe los escaneos acumulados sin conexión por las estaciones.
+    
+    Cada escaneo trae una clave de idempotencia generada por el navegador;
+    los escaneos ya recibidos se responden con el resultado guardado, de modo
+    que reenviar la cola completa es seguro. La asistencia se registra con la
+    fecha original del escaneo, no con la hora del servidor.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('escaneos'), list):
+        return jsonify({'success': False, 'message': 'Lista de escaneos no proporcionada'}), 400
+    
+    escaneos = data['escaneos']
+    if len(escaneos) > app.config['QR_LOTE_MAX']:
+        return jsonify({
+            'success': False,
+            'message': f"Se admiten como máximo {app.config['QR_LOTE_MAX']} escaneos por petición"
+        }), 400
+    if not all(isinstance(e, dict) and isinstance(e.get('clave'), str) and 0 < len(e['clave']) <= 64
+               for e in escaneos):
+        return jsonify({'success': False, 'message': 'Todos los escaneos deben incluir una clave válida'}), 400
+    
+    try:
+        ahora = datetime.now()
+        claves = {e['clave'] for e in escaneos}
+        previos = {
+            s.clave: json.loads(s.resultado)
+            for s in EscaneoSincronizado.query.filter(EscaneoSincronizado.clave.in_(claves))
+        }
+        
+        # Escaneos nuevos (la misma clave repetida en el lote se procesa una sola vez)
+        nuevos = {}
+        for e in escaneos:
+            if e['clave'] in previos or e['clave'] in nuevos:
+                continue
+            charla_id = e.get('charla_id')
+            try:
+                charla_id = int(charla_id) if charla_id not in (None, '') else None
+            except (TypeError, ValueError):
+                charla_id = 0  # Ninguna charla tiene ID 0: se responderá "La charla no existe"
+            nuevos[e['clave']] = {
+                'codigo': e.get('codigo'),
+                'charla_id': charla_id,
+                'fecha': fecha_escaneo_cliente(e.get('escaneado_en'), ahora)
+            }
         
+        procesados = {}
+        if nuevos:
+            resultados = registrar_escaneos(list(nuevos.values()))
+            for (clave, escaneo), resultado in zip(nuevos.items(), resultados):
+                procesados[clave] = resultado
+                db.session.add(EscaneoSincronizado(
+                    clave=clave,
+                    charla_id=escaneo['charla_id'],
+                    fecha_escaneo=escaneo['fecha'],
+                    fecha_recepcion=ahora,
+                    resultado=json.dumps(resultado)
+                ))
+            anotar_escaneos(list(nuevos.values()), resultados)
+            db.session.commit()
+        
+        respuesta = []
+        for e in escaneos:
+            if e['clave'] in previos:
+                respuesta.append({'clave': e['clave'], 'duplicado': True, **previos[e['clave']]})
+            else:
+                respuesta.append({'clave': e['clave'], 'duplicado': False, **procesados[e['clave']]})
+        
+        return jsonify({'success': True, 'resultados': respuesta})
+    
     except Exception as e:
-        print(f"Error al procesar código QR para charla: {str(e)}")
+        db.session.rollback()
+        print(f"Error al sincronizar escaneos: {str(e)}")
         return jsonify({
             'success': False, 
-            'message': f'Error al procesar código QR: {str(e)}'
+            'message': f'Error al sincronizar escaneos: {str(e)}'
         })
 
 @app.route("/admin")
 def admin():
     """Página de administración del sistema"""
-    # Calcular estadísticas para el dashboard
-    charlas_total = Charla.query.count()
-    asistentes_total = Asistente.query.count()
-    
-    # Contar asistencias confirmadas (asistentes que han marcado asistencia general)
-    asistentes_confirmados = Asistente.query.filter(Asistente.asistencia_confirmada == True).count()
-    
-    # Contar el total de asistencias a charlas confirmadas
-    asistencias_charlas = db.session.execute(
-        text("SELECT COUNT(*) as total FROM asistente_charla WHERE asistio = 1")
-    ).fetchone()[0]
+    # Leer los contadores en vivo (sin recorrer asistentes ni asistencias)
+    valores = contadores.leer(db.session)
     
     return render_template("admin/index.html", 
-                          charlas_total=charlas_total,
-                          asistentes_total=asistentes_total,
-                          asistentes_confirmados=asistentes_confirmados,
-                          asistencias_total=asistencias_charlas)
+                          charlas_total=valores.get(CHARLAS, 0),
+                          asistentes_total=valores.get(ASISTENTES, 0),
+                          asistentes_confirmados=valores.get(CONFIRMADOS, 0),
+                          asistencias_total=valores.get(ASISTENCIAS, 0))
+
+@app.route("/admin/cache-escaneos")
+def metricas_cache_escaneos():
+    """Aciertos y fallos de la caché de escaneos repetidos y de fragmentos (de este proceso)"""
+    return jsonify(dict(cache_escaneos.metricas(), fragmentos=cache_fragmentos.metricas(), success=True))
 
 @app.route("/admin/charlas")
 def admin_charlas():
@@ -550,6 +1281,11 @@ def nueva_charla():
         )
         
         db.session.add(charla)
+        db.session.flush()
+        
+        # Crear su contador junto con la charla para no insertarlo durante los escaneos
+        db.session.add(Contador(clave=clave_charla(charla.id), valor=0))
+        contadores.incrementar(db.session, CHARLAS)
         db.session.commit()
         
         flash(f'Charla "{nombre}" creada exitosamente', 'success')
@@ -571,6 +1307,10 @@ def editar_charla(id):
             flash('El nombre de la charla es obligatorio', 'danger')
             return redirect(url_for('editar_charla', id=id))
         
+        # El nombre aparece en la información de los inscritos al escanear su QR
+        if nombre != charla.nombre:
+            asistencias.nueva_version_inscritos(db.session, charla.id)
+        
         # Actualizar campos
         charla.nombre = nombre
         charla.descripcion = descripcion
@@ -599,7 +1339,12 @@ def eliminar_charla(id):
     nombre = charla.nombre
     
     # Eliminar las asociaciones con asistentes
-    db.session.execute(text(f"DELETE FROM asistente_charla WHERE charla_id = {id}"))
+    asistencias.eliminar_charla(db.session, charla.id)
+    
+    # Descontar sus asistencias de los contadores en vivo
+    asistieron = contadores.eliminar(db.session, clave_charla(id))
+    contadores.incrementar(db.session, ASISTENCIAS, -asistieron)
+    contadores.incrementar(db.session, CHARLAS, -1)
     
     # Eliminar la charla
     db.session.delete(charla)
@@ -608,114 +1353,261 @@ def eliminar_charla(id):
     flash(f'Charla "{nombre}" eliminada exitosamente', 'success')
     return redirect(url_for('admin_charlas'))
 
-@app.route("/admin/export_registros")
-def export_registros():
-    """Exportar todos los registros de asistentes a Excel"""
-    try:
-        # Obtener todos los asistentes
-        asistentes = Asistente.query.all()
+@app.route("/admin/importar", methods=["GET", "POST"])
+def importar():
+    """Importar asistentes de forma masiva desde un archivo CSV o Excel"""
+    if request.method == "POST":
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('Seleccione un archivo para importar', 'danger')
+            return redirect(url_for('importar'))
         
-        # Generar el archivo Excel
-        temp_path = export_registros_excel(asistentes)
+        try:
+            reporte = importar_asistentes(archivo.stream, archivo.filename, contadores=contadores)
+        except ValueError as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('importar'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error al importar asistentes: {str(e)}', 'danger')
+            return redirect(url_for('importar'))
         
-        # Generar nombre de archivo con fecha actual
-        filename = f"registros_asistentes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        # Las inserciones masivas no pasan por los eventos del ORM: actualizar el índice aquí
+        for asistente_id, clave in reporte['nuevos']:
+            indice_qr.agregar(asistente_id, clave)
         
-        # Enviar el archivo al usuario
-        return send_file(
-            temp_path,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        # Si se guardan las imágenes en disco, generarlas fuera del hilo de la petición
+        if reporte['nuevos'] and app.config['QR_GUARDAR_ARCHIVOS']:
+            tareas.enviar(generar_codigos_qr, [asistente_id for asistente_id, _ in reporte['nuevos']])
+        
+        if reporte['error']:
+            flash(f"{reporte['error']}. Se guardaron las filas anteriores.", 'danger')
+        flash(f"Importación completada: {reporte['aceptados']} asistentes registrados, "
+              f"{len(reporte['rechazados'])} filas rechazadas", 'success')
+        return render_template("admin/importar.html", reporte=reporte)
     
-    except Exception as e:
-        flash(f'Error al exportar registros: {str(e)}', 'danger')
-        return redirect(url_for('admin'))
+    return render_template("admin/importar.html", reporte=None)
+
+# Generación de los archivos de exportación (se ejecutan como trabajos en segundo plano)
+def generar_export_registros():
+    """Genera el Excel con todos los registros de asistentes y devuelve su ruta"""
+    # Leer los asistentes por bloques (solo las columnas necesarias, sin objetos del ORM)
+    asistentes = db.session.execute(
+        select(Asistente.id, Asistente.nombres, Asistente.empresa, Asistente.dni,
+               Asistente.cargo, Asistente.correo, Asistente.numero, Asistente.fecha_registro,
+               Asistente.asistencia_confirmada, Asistente.fecha_asistencia)
+        .order_by(Asistente.id)
+        .execution_options(yield_per=1000)
+    )
+    
+    # Generar el archivo Excel a medida que se leen las filas
+    return export_registros_excel(asistentes)
+
+def generar_export_asistentes():
+    """Genera el Excel de asistentes confirmados con hojas por charla y devuelve su ruta"""
+    # Asistentes con asistencia general confirmada unidos a las charlas a las que asistieron
+    # (una fila por asistencia; charla_id es NULL si no asistió a ninguna charla)
+    filas = asistencias.confirmados_con_charlas(db.session)
+    
+    # Obtener todas las charlas
+    charlas = Charla.query.order_by(Charla.id).all()
+    
+    # Generar el archivo Excel agrupando las filas en una sola pasada
+    return export_asistentes_excel(filas, charlas)
+
+def generar_export_reporte():
+    """Genera el reporte general con estadísticas y devuelve su ruta"""
+    # Obtener todas las estadísticas del reporte con consultas agregadas
+    estadisticas = calcular_estadisticas(db.session)
+    
+    # Generar el archivo Excel
+    return export_reporte_general(estadisticas)
+
+def iniciar_exportacion(tipo, prefijo_archivo, funcion):
+    """Encola una exportación y redirige a la página que sigue su progreso"""
+    # Generar nombre de archivo con fecha actual
+    filename = f"{prefijo_archivo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    trabajo_id = exportaciones.crear(tipo, filename, funcion)
+    return redirect(url_for('ver_exportacion', trabajo_id=trabajo_id))
+
+@app.route("/admin/export_registros")
+def export_registros():
+    """Exportar todos los registros de asistentes a Excel"""
+    return iniciar_exportacion('registros', 'registros_asistentes', generar_export_registros)
 
 @app.route("/admin/export_asistentes")
 def export_asistentes():
     """Exportar asistentes confirmados a Excel con hojas separadas por charla"""
-    try:
-        # Obtener asistentes que confirmaron su asistencia general
-        asistentes = Asistente.query.filter(Asistente.asistencia_confirmada == True).all()
-        
-        # Obtener todas las charlas
-        charlas = Charla.query.all()
-        
-        # Para cada charla, obtener los asistentes que confirmaron asistencia específica
-        asistencia_por_charla = {}
-        for charla in charlas:
-            # Consultar directamente la tabla asistente_charla para esta charla
-            # y obtener los IDs de asistentes con asistio=1
-            asistencia_records = db.session.execute(
-                text(f"""
-                    SELECT asistente_id 
-                    FROM asistente_charla 
-                    WHERE charla_id = {charla.id} AND asistio = 1
-                """)
-            ).fetchall()
-            
-            # Guardar la lista de IDs de asistentes que confirmaron asistencia a esta charla
-            asistencia_por_charla[charla.id] = [record[0] for record in asistencia_records]
-        
-        # Generar el archivo Excel con la información correcta
-        temp_path = export_asistentes_excel(asistentes, charlas, asistencia_por_charla)
-        
-        # Generar nombre de archivo con fecha actual
-        filename = f"asistentes_confirmados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        # Enviar el archivo al usuario
-        return send_file(
-            temp_path,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-    
-    except Exception as e:
-        flash(f'Error al exportar asistentes: {str(e)}', 'danger')
-        return redirect(url_for('admin'))
+    return iniciar_exportacion('asistentes', 'asistentes_confirmados', generar_export_asistentes)
 
 @app.route("/admin/export_reporte")
 def export_reporte():
     """Exportar reporte general con estadísticas"""
+    return iniciar_exportacion('reporte', 'reporte_general', generar_export_reporte)
+
+@app.route("/admin/exportaciones/<trabajo_id>")
+def ver_exportacion(trabajo_id):
+    """Página que consulta el estado de una exportación y descarga el archivo al terminar"""
+    trabajo = exportaciones.estado(trabajo_id)
+    if trabajo is None:
+        flash('La exportación no existe o ya expiró', 'danger')
+        return redirect(url_for('admin'))
+    return render_template("admin/exportacion.html", trabajo=trabajo)
+
+@app.route("/admin/exportaciones/<trabajo_id>/estado")
+def estado_exportacion(trabajo_id):
+    """Estado de una exportación en formato JSON"""
+    trabajo = exportaciones.estado(trabajo_id)
+    if trabajo is None:
+        return jsonify({'success': False, 'message': 'La exportación no existe o ya expiró'}), 404
+    return jsonify({'success': True, 'trabajo': trabajo})
+
+@app.route("/admin/exportaciones/<trabajo_id>/descargar")
+def descargar_exportacion(trabajo_id):
+    """Descargar el archivo de una exportación terminada"""
+    trabajo = exportaciones.estado(trabajo_id)
+    if trabajo is None or trabajo['estado'] != 'completado':
+        flash('La exportación no está disponible', 'danger')
+        return redirect(url_for('admin'))
+    
+    # Enviar el archivo al usuario; la limpieza de otro proceso pudo eliminarlo tras consultar el estado
     try:
-        # Obtener datos para el reporte
-        asistentes_total = Asistente.query.count()
-        asistentes_confirmados = Asistente.query.filter(Asistente.asistencia_confirmada == True).count()
-        charlas = Charla.query.all()
-        
-        # Estadísticas adicionales
-        asistencia_charlas = {}
-        for charla in charlas:
-            asistentes_charla = db.session.execute(
-                text(f"SELECT COUNT(*) as total FROM asistente_charla "
-                    f"WHERE charla_id = {charla.id} AND asistio = 1")
-            ).fetchone()[0]
-            asistencia_charlas[charla.id] = {
-                'nombre': charla.nombre,
-                'total_registrados': len(charla.asistentes),
-                'total_asistieron': asistentes_charla,
-            }
-        
-        # Generar el archivo Excel
-        temp_path = export_reporte_general(asistentes_total, asistentes_confirmados, asistencia_charlas, charlas)
-        
-        # Generar nombre de archivo con fecha actual
-        filename = f"reporte_general_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        
-        # Enviar el archivo al usuario
         return send_file(
-            temp_path,
+            exportaciones.ruta_archivo(trabajo_id),
             as_attachment=True,
-            download_name=filename,
+            download_name=trabajo['nombre_archivo'],
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-    
-    except Exception as e:
-        flash(f'Error al exportar reporte: {str(e)}', 'danger')
+    except FileNotFoundError:
+        flash('La exportación expiró, genérela de nuevo', 'warning')
         return redirect(url_for('admin'))
 
+# Comandos de línea de comandos para gestionar los códigos QR (flask qr ...)
+qr_cli = AppGroup('qr', help='Gestión de códigos QR de los asistentes.')
+app.cli.add_command(qr_cli)
+
+def regenerar_codigos_qr(ids=None, workers=None, lote=500, progreso=None):
+    """
+    Regenera en paralelo (pool de procesos) el código QR v2 de los asistentes.
+    
+    Las nuevas rutas se guardan por lotes con una sentencia y un commit por
+    lote, y las imágenes anteriores se eliminan una vez guardadas. Sin
+    QR_GUARDAR_ARCHIVOS no se escriben imágenes (se sirven bajo demanda desde
+    /qr/<id>.png): solo se quitan las rutas y los archivos guardados antes.
+    En ambos casos se incrementa la versión de cada asistente.
+    
+    Args:
+        ids (list): IDs de los asistentes; None para todos
+        workers (int): Número de procesos (por defecto, uno por CPU)
+        lote (int): Asistentes leídos y actualizados por transacción
+        progreso (callable): Recibe el número de códigos generados hasta el momento
+        
+    Returns:
+        int: Número de códigos QR generados
+    """
+    secret = app.config['QR_SECRET_KEY']
+    rutas_anteriores = {}
+    
+    def pendientes():
+        # Leer por lotes ordenados por ID para no cargar toda la tabla en memoria
+        ultimo_id = 0
+        while True:
+            consulta = select(Asistente.id, Asistente.codigoQR).where(Asistente.id > ultimo_id)
+            if ids is not None:
+                consulta = consulta.where(Asistente.id.in_(ids))
+            filas = db.session.execute(consulta.order_by(Asistente.id).limit(lote)).all()
+            if not filas:
+                return
+            for asistente_id, ruta in filas:
+                rutas_anteriores[asistente_id] = ruta
+                yield asistente_id, build_qr_payload(asistente_id, secret)
+            ultimo_id = filas[-1].id
+    
+    def sin_archivos(items):
+        for numero, (asistente_id, _) in enumerate(items, start=1):
+            if progreso:
+                progreso(numero)
+            yield asistente_id, None
+    
+    def guardar(generados):
+        db.session.execute(
+            Asistente.__table__.update()
+            .where(Asistente.id == bindparam('b_id'))
+            .values(codigoQR=bindparam('b_ruta'), version=Asistente.version + 1),
+            [{'b_id': asistente_id, 'b_ruta': ruta} for asistente_id, ruta in generados]
+        )
+        db.session.commit()
+        
+        # Eliminar las imágenes anteriores una vez guardadas las nuevas rutas
+        for asistente_id, ruta in generados:
+            anterior = rutas_anteriores.pop(asistente_id, None)
+            if anterior and anterior != ruta and os.path.exists(anterior):
+                os.remove(anterior)
+    
+    if app.config['QR_GUARDAR_ARCHIVOS']:
+        resultados = generate_qr_codes_batch(pendientes(), workers=workers, progress=progreso)
+    else:
+        resultados = sin_archivos(pendientes())
+    
+    total = 0
+    generados = []
+    for resultado in resultados:
+        generados.append(resultado)
+        if len(generados) >= lote:
+            guardar(generados)
+            total += len(generados)
+            generados = []
+    if generados:
+        guardar(generados)
+        total += len(generados)
+    return total
+
+def generar_codigos_qr(ids):
+    """Genera los códigos QR de los asistentes indicados (tarea en segundo plano)"""
+    # Un solo proceso: no crear procesos hijos desde el servidor web
+    regenerar_codigos_qr(ids, workers=1)
+
+@qr_cli.command('regenerate')
+@click.option('--workers', type=int, default=None, help='Procesos en paralelo (por defecto, uno por CPU).')
+@click.option('--lote', default=500, show_default=True, help='Asistentes procesados por transacción.')
+def regenerate_qr(workers, lote):
+    """Regenera en formato v2 el código QR de todos los asistentes."""
+    total_asistentes = Asistente.query.count()
+    
+    def progreso(generados):
+        if generados % 500 == 0 or generados == total_asistentes:
+            click.echo(f"{generados}/{total_asistentes} códigos QR generados")
+    
+    total = regenerar_codigos_qr(workers=workers, lote=lote, progreso=progreso)
+    click.echo(f"Regeneración completada: {total} asistentes")
+
+# Nombre anterior del comando, se mantiene por compatibilidad
+qr_cli.add_command(regenerate_qr, 'reissue')
+
+# Comandos para revisar la configuración de la base de datos
+basedatos_cli = AppGroup('basedatos', help='Configuración de la base de datos.')
+app.cli.add_command(basedatos_cli)
+
+@basedatos_cli.command('diagnostico')
+def diagnostico_basedatos():
+    """Muestra la configuración efectiva de la base de datos y posibles problemas."""
+    info = basedatos.diagnostico(db.engine)
+    for clave, valor in info.items():
+        click.echo(f"{clave}: {valor}")
+    for aviso in basedatos.advertencias(info):
+        click.echo(f"Advertencia: {aviso}")
+
+# Comandos para los contadores de asistencia en vivo
+contadores_cli = AppGroup('contadores', help='Contadores de asistencia en vivo del panel de administración.')
+app.cli.add_command(contadores_cli)
+
+@contadores_cli.command('recalcular')
+def recalcular_contadores():
+    """Reconstruye los contadores a partir de los datos de asistentes y charlas."""
+    valores = contadores.recalcular(db.session, calcular_estadisticas(db.session))
+    db.session.commit()
+    for clave, valor in sorted(valores.items()):
+        click.echo(f"{clave}: {valor}")
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,164 @@
+from sqlalchemy import bindparam, delete, insert, or_, select, update
+from models import Asistente, Charla, asistente_charla
+
+# Acceso a la tabla asistente_charla (inscripciones y asistencia a charlas) y
+# a la asistencia general registrada en la tabla asistente.
+#
+# Como no pasan por el ORM, las sentencias que cambian lo que se muestra al
+# escanear a un asistente (asistencia general, inscripciones, nombre de sus
+# charlas) incrementan también Asistente.version, que identifica sus
+# fragmentos en caché (ver CacheFragmentos en cache_escaneos.py).
+#
+# Todas las sentencias se construyen una sola vez con parámetros enlazados
+# (bindparam), de modo que cada operación produce siempre el mismo SQL: la
+# caché de sentencias compiladas de SQLAlchemy y las sentencias preparadas del
+# driver se reutilizan entre peticiones. Las funciones no hacen commit; la
+# transacción la controla quien las llama.
+
+_ac = asistente_charla.c
+
+_CONFIRMAR = (
+    update(asistente_charla)
+    .where(_ac.asistente_id == bindparam('b_asistente_id'),
+           _ac.charla_id == bindparam('b_charla_id'),
+           or_(_ac.asistio == False, _ac.asistio.is_(None)))
+    .values(asistio=True, fecha_confirmacion=bindparam('b_fecha'))
+)
+
+_CONFIRMAR_GENERAL = (
+    update(Asistente)
+    .where(Asistente.id == bindparam('b_asistente_id'),
+           or_(Asistente.asistencia_confirmada == False, Asistente.asistencia_confirmada.is_(None)))
+    .values(asistencia_confirmada=True, fecha_asistencia=bindparam('b_fecha'),
+            version=Asistente.version + 1)
+)
+
+_INSCRIBIR_CONFIRMADO = insert(asistente_charla).values(
+    asistente_id=bindparam('b_asistente_id'),
+    charla_id=bindparam('b_charla_id'),
+    asistio=True,
+    fecha_confirmacion=bindparam('b_fecha'),
+)
+
+_NUEVA_VERSION = (
+    update(Asistente)
+    .where(Asistente.id == bindparam('b_asistente_id'))
+    .values(version=Asistente.version + 1)
+)
+
+_NUEVA_VERSION_INSCRITOS = (
+    update(Asistente)
+    .where(Asistente.id.in_(select(_ac.asistente_id).where(_ac.charla_id == bindparam('b_charla_id'))))
+    .values(version=Asistente.version + 1)
+)
+
+_INSCRITO = (
+    select(_ac.asistente_id)
+    .where(_ac.asistente_id == bindparam('b_asistente_id'),
+           _ac.charla_id == bindparam('b_charla_id'))
+)
+
+_ESTADOS = (
+    select(_ac.asistente_id, _ac.charla_id, _ac.asistio)
+    .where(_ac.asistente_id.in_(bindparam('b_asistente_ids', expanding=True)),
+           _ac.charla_id.in_(bindparam('b_charla_ids', expanding=True)))
+)
+
+_CHARLAS_DE_ASISTENTES = (
+    select(_ac.asistente_id, Charla)
+    .join(Charla, Charla.id == _ac.charla_id)
+    .where(_ac.asistente_id.in_(bindparam('b_asistente_ids', expanding=True)))
+)
+
+_ELIMINAR_CHARLA = delete(asistente_charla).where(_ac.charla_id == bindparam('b_charla_id'))
+
+# Los IDs empiezan en 1: despues=0 devuelve la primera página
+_REGISTROS_CHARLA = (
+    select(Asistente.id, Asistente.nombres, Asistente.empresa, Asistente.dni,
+           _ac.asistio, _ac.fecha_confirmacion)
+    .join(asistente_charla, _ac.asistente_id == Asistente.id)
+    .where(_ac.charla_id == bindparam('b_charla_id'),
+           Asistente.id > bindparam('b_despues'))
+    .order_by(Asistente.id)
+    .limit(bindparam('b_limite'))
+)
+
+_CONFIRMADOS_CON_CHARLAS = (
+    select(Asistente.id, Asistente.nombres, Asistente.empresa, Asistente.dni,
+           Asistente.cargo, Asistente.correo, Asistente.numero, Asistente.fecha_asistencia,
+           _ac.charla_id)
+    .outerjoin(asistente_charla, (_ac.asistente_id == Asistente.id) & (_ac.asistio == True))
+    .where(Asistente.asistencia_confirmada == True)
+    .order_by(Asistente.id, _ac.charla_id)
+)
+
+
+def confirmar(session, asistente_id, charla_id, fecha):
+    """Marca la asistencia si aún no estaba confirmada; devuelve el número de filas afectadas (0 o 1)"""
+    resultado = session.execute(_CONFIRMAR, {
+        'b_asistente_id': asistente_id, 'b_charla_id': charla_id, 'b_fecha': fecha
+    })
+    return resultado.rowcount
+
+
+def confirmar_general(session, asistente_id, fecha):
+    """Marca la asistencia general al evento si aún no estaba confirmada; devuelve las filas afectadas (0 o 1)"""
+    resultado = session.execute(_CONFIRMAR_GENERAL, {'b_asistente_id': asistente_id, 'b_fecha': fecha})
+    return resultado.rowcount
+
+
+def inscribir_confirmado(session, asistente_id, charla_id, fecha):
+    """Inscribe al asistente con la asistencia ya confirmada (falla si ya estaba inscrito)"""
+    session.execute(_INSCRIBIR_CONFIRMADO, {
+        'b_asistente_id': asistente_id, 'b_charla_id': charla_id, 'b_fecha': fecha
+    })
+    session.execute(_NUEVA_VERSION, {'b_asistente_id': asistente_id})
+
+
+def nueva_version_inscritos(session, charla_id):
+    """Incrementa la versión de los inscritos a una charla (p. ej. al cambiar su nombre)"""
+    session.execute(_NUEVA_VERSION_INSCRITOS, {'b_charla_id': charla_id})
+
+
+def esta_inscrito(session, asistente_id, charla_id):
+    fila = session.execute(_INSCRITO, {'b_asistente_id': asistente_id, 'b_charla_id': charla_id}).first()
+    return fila is not None
+
+
+def estados(session, asistente_ids, charla_ids):
+    """Devuelve {(asistente_id, charla_id): asistio} para las inscripciones existentes"""
+    if not asistente_ids or not charla_ids:
+        return {}
+    filas = session.execute(_ESTADOS, {
+        'b_asistente_ids': list(asistente_ids), 'b_charla_ids': list(charla_ids)
+    })
+    return {(asistente_id, charla_id): bool(asistio) for asistente_id, charla_id, asistio in filas}
+
+
+def charlas_de_asistentes(session, asistente_ids):
+    """Filas (asistente_id, Charla) de las charlas en las que están inscritos los asistentes"""
+    if not asistente_ids:
+        return []
+    return session.execute(_CHARLAS_DE_ASISTENTES, {'b_asistente_ids': list(asistente_ids)})
+
+
+def eliminar_charla(session, charla_id):
+    """Elimina todas las inscripciones a una charla"""
+    nueva_version_inscritos(session, charla_id)
+    session.execute(_ELIMINAR_CHARLA, {'b_charla_id': charla_id})
+
+
+def registros_charla(session, charla_id, despues=None, limite=50):
+    """Inscritos a una charla con su estado de asistencia, ordenados por ID de asistente"""
+    return session.execute(_REGISTROS_CHARLA, {
+        'b_charla_id': charla_id, 'b_despues': despues or 0, 'b_limite': limite
+    }).all()
+
+
+def confirmados_con_charlas(session, yield_per=1000):
+    """
+    Asistentes con asistencia general confirmada unidos a las charlas a las
+    que asistieron: una fila por asistencia (charla_id es NULL si no asistió
+    a ninguna charla), ordenadas por ID de asistente.
+    """
+    return session.execute(_CONFIRMADOS_CON_CHARLAS.execution_options(yield_per=yield_per))
@@ -0,0 +1,122 @@
+import os
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+
+# Valores numéricos que devuelve PRAGMA synchronous
+NIVELES_SYNCHRONOUS = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+
+# Driver asíncrono que usa el servicio de check-in (servicio_async.py) para cada base de datos
+DRIVERS_ASYNC = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg', 'mysql': 'aiomysql'}
+
+
+def uri_desde_entorno(por_defecto):
+    """URI de la base de datos desde DATABASE_URL (o la indicada por defecto)"""
+    uri = os.environ.get('DATABASE_URL', por_defecto)
+    # Algunos proveedores entregan el esquema antiguo postgres://, que SQLAlchemy ya no acepta
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def uri_async(uri, directorio_instancia):
+    """
+    Convierte la URI de la aplicación en la equivalente con driver asíncrono.
+
+    Como hace Flask-SQLAlchemy, una ruta SQLite relativa se interpreta dentro
+    de la carpeta instance/, para que ambos servicios abran el mismo archivo.
+    """
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise ValueError(f"No hay driver asíncrono configurado para {backend}")
+    if backend == 'sqlite' and url.database and url.database != ':memory:' and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(directorio_instancia, url.database))
+    return url.set(drivername=f"{backend}+{DRIVERS_ASYNC[backend]}")
+
+
+def configurar(config):
+    """
+    Completa la configuración del motor según el tipo de base de datos.
+
+    - SQLite: modo de diario (WAL por defecto, para que los escáneres lean
+      mientras otro proceso escribe), busy_timeout (esperar al bloqueo en vez
+      de fallar con "database is locked") y nivel de synchronous.
+    - PostgreSQL/MySQL: tamaño del pool de conexiones, desbordamiento, espera
+      máxima por una conexión y reciclado de conexiones inactivas.
+
+    Todos los valores se pueden ajustar con variables de entorno. Recibe la
+    configuración (app.config o un diccionario) y debe llamarse antes de
+    crear el motor (db.init_app(app)).
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    opciones = config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+
+    if make_url(uri).get_backend_name() == 'sqlite':
+        config.setdefault('SQLITE_JOURNAL_MODE', os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'))
+        config.setdefault('SQLITE_BUSY_TIMEOUT_MS', int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)))
+        config.setdefault('SQLITE_SYNCHRONOUS', os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'))
+    else:
+        opciones.setdefault('pool_size', int(os.environ.get('DB_POOL_SIZE', 10)))
+        opciones.setdefault('max_overflow', int(os.environ.get('DB_MAX_OVERFLOW', 20)))
+        opciones.setdefault('pool_timeout', int(os.environ.get('DB_POOL_TIMEOUT', 30)))
+        opciones.setdefault('pool_recycle', int(os.environ.get('DB_POOL_RECYCLE', 1800)))
+        # Descartar conexiones cerradas por el servidor antes de usarlas
+        opciones.setdefault('pool_pre_ping', True)
+
+
+def registrar_eventos(config, engine):
+    """Aplica los PRAGMA de SQLite a cada conexión nueva del motor (síncrono)"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+    ]
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(conexion_dbapi, registro):
+        cursor = conexion_dbapi.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def diagnostico(engine):
+    """
+    Devuelve la configuración efectiva de la base de datos, leída del motor
+    y (en SQLite) de los PRAGMA de una conexión real.
+
+    Returns:
+        dict: Nombre del parámetro -> valor
+    """
+    info = {
+        'url': engine.url.render_as_string(hide_password=True),
+        'dialecto': f"{engine.dialect.name}+{engine.dialect.driver}",
+        'pool': type(engine.pool).__name__,
+    }
+    if hasattr(engine.pool, 'size'):
+        info['pool_size'] = engine.pool.size()
+        info['max_overflow'] = getattr(engine.pool, '_max_overflow', None)
+
+    with engine.connect() as conexion:
+        if engine.dialect.name == 'sqlite':
+            for pragma in ('journal_mode', 'busy_timeout', 'synchronous'):
+                info[pragma] = conexion.execute(text(f"PRAGMA {pragma}")).scalar()
+            info['synchronous'] = NIVELES_SYNCHRONOUS.get(info['synchronous'], info['synchronous'])
+        else:
+            info['version_servidor'] = '.'.join(str(n) for n in engine.dialect.server_version_info or ())
+    return info
+
+
+def advertencias(info):
+    """Problemas de configuración que conviene señalar al arrancar"""
+    avisos = []
+    if info.get('journal_mode') not in (None, 'wal'):
+        avisos.append("SQLite no está en modo WAL: las lecturas se bloquearán durante las escrituras")
+    if info.get('busy_timeout') == 0:
+        avisos.append("busy_timeout es 0: las escrituras simultáneas fallarán con 'database is locked'")
+    return avisos
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEscaneos:
+    """
+    Caché de corta duración de las respuestas a escaneos, por (estación, código, charla).
+
+    El lector de las páginas de escaneo decodifica el mismo QR varias veces por
+    segundo mientras el asistente sostiene su credencial frente a la cámara.
+    Dentro de la ventana (ESCANEOS_CACHE_TTL_SEGUNDOS) las repeticiones de una
+    misma estación reciben la respuesta ya calculada, sin resolver el asistente
+    ni tocar la base de datos. Las entradas se guardan en orden de vencimiento,
+    así que las vencidas se descartan desde el principio sin recorrer la caché.
+    """
+
+    def __init__(self, ttl=3, max_entradas=10000):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('ESCANEOS_CACHE_TTL_SEGUNDOS', self.ttl)
+        self.max_entradas = app.config.setdefault('ESCANEOS_CACHE_MAX', self.max_entradas)
+
+    def obtener(self, clave):
+        """Devuelve la respuesta guardada para la clave, o None si no hay una vigente"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None or entrada[0] <= ahora:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, respuesta):
+        ahora = time.monotonic()
+        with self._lock:
+            self._entradas[clave] = (ahora + self.ttl, respuesta)
+            self._entradas.move_to_end(clave)
+            while self._entradas:
+                vence, _ = next(iter(self._entradas.values()))
+                if vence > ahora and len(self._entradas) <= self.max_entradas:
+                    break
+                self._entradas.popitem(last=False)
+
+    def metricas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+                'entradas': len(self._entradas),
+                'ttl_segundos': self.ttl,
+            }
+
+
+class CacheFragmentos:
+    """
+    Caché de los fragmentos HTML de asistente que devuelve /asistente-info a las
+    peticiones AJAX, por (ID de asistente, versión).
+
+    La columna Asistente.version cambia con cada modificación que afecta al
+    fragmento (datos del asistente, inscripciones, asistencia general y nombre
+    de sus charlas), así que una entrada nunca queda obsoleta: con la versión
+    nueva simplemente deja de consultarse y sale por el extremo menos usado.
+    Al no depender de un vencimiento, sirve también a escaneos de estaciones
+    distintas y a cada proceso por separado.
+    """
+
+    def __init__(self, max_entradas=5000):
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entradas = app.config.setdefault('FRAGMENTOS_CACHE_MAX', self.max_entradas)
+
+    def obtener(self, asistente_id, version):
+        clave = (asistente_id, version)
+        with self._lock:
+            fragmento = self._entradas.get(clave)
+            if fragmento is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return fragmento
+
+    def guardar(self, asistente_id, version, fragmento):
+        clave = (asistente_id, version)
+        with self._lock:
+            self._entradas[clave] = fragmento
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def metricas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+                'entradas': len(self._entradas),
+            }
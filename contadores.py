@@ -0,0 +1,118 @@
+import threading
+import time
+from sqlalchemy import event, insert, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import Contador
+
+# Contadores globales; cada charla tiene además su contador 'charla:<id>:asistieron'
+CHARLAS = 'charlas'
+ASISTENTES = 'asistentes'
+CONFIRMADOS = 'confirmados'
+ASISTENCIAS = 'asistencias'
+
+
+def clave_charla(charla_id):
+    return f"charla:{charla_id}:asistieron"
+
+
+def sentencia_upsert(dialecto, clave, delta):
+    """
+    INSERT que suma delta si el contador ya existe, en una sola sentencia: dos
+    transacciones que crean a la vez el mismo contador (p. ej. la primera
+    asistencia a una charla nueva en dos estaciones) no chocan en la clave
+    primaria. None para los dialectos sin upsert.
+    """
+    if dialecto in ('postgresql', 'sqlite'):
+        insertar = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+        return insertar(Contador).values(clave=clave, valor=delta).on_conflict_do_update(
+            index_elements=[Contador.clave], set_={'valor': Contador.valor + delta})
+    if dialecto in ('mysql', 'mariadb'):
+        return mysql.insert(Contador).values(clave=clave, valor=delta).on_duplicate_key_update(
+            valor=Contador.valor + delta)
+    return None
+
+
+class ContadoresEnVivo:
+    """
+    Contadores de asistencia mantenidos de forma incremental en la tabla contador.
+
+    Cada escritura (registro, importación, confirmación de asistencia) suma al
+    contador correspondiente dentro de su propia transacción, de modo que el
+    contador nunca diverge de los datos confirmados. Las lecturas se sirven
+    desde una copia en memoria (por proceso) que se invalida al confirmar una
+    transacción de este proceso que modificó contadores y, para los cambios de
+    otros procesos, al vencer CONTADORES_TTL_SEGUNDOS.
+    """
+
+    def __init__(self):
+        self.ttl = 5
+        self._valores = None
+        self._leido_en = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('CONTADORES_TTL_SEGUNDOS', 5)
+        event.listen(Session, 'after_commit', self._despues_de_commit)
+
+    def incrementar(self, session, clave, delta=1):
+        """Suma delta al contador dentro de la transacción actual (sin commit)"""
+        if not delta:
+            return
+        sentencia = sentencia_upsert(session.get_bind().dialect.name, clave, delta)
+        if sentencia is not None:
+            session.execute(sentencia)
+        else:
+            resultado = session.execute(
+                update(Contador).where(Contador.clave == clave).values(valor=Contador.valor + delta)
+            )
+            if resultado.rowcount == 0:
+                session.execute(insert(Contador).values(clave=clave, valor=delta))
+        session.info['contadores_modificados'] = True
+
+    def eliminar(self, session, clave):
+        """Elimina un contador (p. ej. al borrar una charla) y devuelve su último valor"""
+        contador = session.get(Contador, clave)
+        if contador is None:
+            return 0
+        valor = contador.valor
+        session.delete(contador)
+        session.info['contadores_modificados'] = True
+        return valor
+
+    def leer(self, session):
+        """Devuelve un diccionario clave -> valor con todos los contadores"""
+        with self._lock:
+            if self._valores is not None and time.monotonic() - self._leido_en < self.ttl:
+                return self._valores
+        valores = {c.clave: c.valor for c in session.query(Contador)}
+        with self._lock:
+            self._valores = valores
+            self._leido_en = time.monotonic()
+        return valores
+
+    def invalidar(self):
+        with self._lock:
+            self._valores = None
+
+    def recalcular(self, session, estadisticas):
+        """
+        Reconstruye todos los contadores a partir de una foto de estadísticas
+        (ver estadisticas.calcular_estadisticas), sin commit.
+        """
+        session.query(Contador).delete()
+        valores = {
+            CHARLAS: estadisticas.charlas_total,
+            ASISTENTES: estadisticas.asistentes_total,
+            CONFIRMADOS: estadisticas.asistentes_confirmados,
+            ASISTENCIAS: estadisticas.asistencias_total,
+        }
+        for charla in estadisticas.charlas:
+            valores[clave_charla(charla.id)] = charla.total_asistieron
+        session.execute(insert(Contador), [{'clave': k, 'valor': v} for k, v in valores.items()])
+        session.info['contadores_modificados'] = True
+        return valores
+
+    def _despues_de_commit(self, session):
+        if session.info.pop('contadores_modificados', False):
+            self.invalidar()
@@ -0,0 +1,228 @@
+import atexit
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo de archivos entre procesos
+    fcntl = None
+
+
+class BufferCheckins:
+    """
+    Escritura diferida (write-behind) de las confirmaciones de asistencia.
+
+    En lugar de un commit por escaneo, cada confirmación se agrega a un log
+    local (una línea JSON, escrita y volcada al sistema operativo antes de
+    responder) y a una cola en memoria. Un hilo aplica la cola en la base de
+    datos por lotes, con un solo commit cada CHECKIN_INTERVALO_MS, y luego
+    descarta del log lo ya guardado.
+
+    Si el proceso termina de forma inesperada, el siguiente proceso que
+    arranca recupera los logs huérfanos y los aplica. Reaplicar es seguro:
+    las confirmaciones son UPDATE condicionales (solo afectan filas aún no
+    confirmadas). Con CHECKIN_LOG_FSYNC cada escritura del log se sincroniza
+    también a disco, para sobrevivir a un corte de energía.
+
+    Cada proceso escribe su propio log y mantiene bloqueado un archivo .lock
+    mientras vive; un log cuyo .lock puede bloquearse pertenece a un proceso
+    terminado. Sin fcntl (Windows) se asume un único proceso de servidor.
+    """
+
+    def __init__(self):
+        self.activo = False
+        self.app = None
+        self._aplicar = None
+        self._pendientes = []
+        self._claves = set()
+        self._lock = threading.Lock()
+        self._vaciando = threading.Lock()  # Un solo lote en curso a la vez
+        self._hay_datos = threading.Event()
+        self._log = None
+        self._ruta_log = None
+        self._bloqueo = None
+
+    def init_app(self, app):
+        self.activo = app.config.setdefault('CHECKIN_DIFERIDO', False)
+        if not self.activo:
+            return
+        self.app = app
+        directorio = app.config.setdefault('CHECKIN_LOG_DIR', os.path.join(app.instance_path, 'checkins'))
+        self.intervalo = app.config.setdefault('CHECKIN_INTERVALO_MS', 5) / 1000
+        self.lote_max = app.config.setdefault('CHECKIN_LOTE_MAX', 500)
+        self.fsync = app.config.setdefault('CHECKIN_LOG_FSYNC', False)
+        os.makedirs(directorio, exist_ok=True)
+
+        nombre = f"checkins-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._ruta_log = os.path.join(directorio, nombre + '.log')
+        self._bloqueo = open(os.path.join(directorio, nombre + '.lock'), 'w')
+        if fcntl:
+            fcntl.flock(self._bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._log = open(self._ruta_log, 'a', encoding='utf-8')
+
+        self._recuperar(directorio)
+
+    def aplicador(self, funcion):
+        """
+        Registra la función que guarda un lote en la base de datos (decorador).
+
+        La función recibe la lista de operaciones y debe hacer commit; si lanza
+        una excepción, el lote se reintenta más tarde.
+        """
+        self._aplicar = funcion
+        if self.activo:
+            threading.Thread(target=self._vaciar_periodicamente, name='checkins', daemon=True).start()
+            atexit.register(self._cerrar)
+        return funcion
+
+    def pendiente(self, clave):
+        with self._lock:
+            return clave in self._claves
+
+    def encolar(self, clave, operacion):
+        """
+        Registra una confirmación en el log y en la cola.
+
+        Args:
+            clave (str): Identifica la confirmación (p. ej. 'charla:3:15'); una
+                         clave ya pendiente no se vuelve a encolar
+            operacion (dict): Datos serializables a JSON para el aplicador
+
+        Returns:
+            bool: False si la clave ya estaba pendiente
+        """
+        operacion = dict(operacion, clave=clave)
+        linea = json.dumps(operacion) + '\n'
+        with self._lock:
+            if clave in self._claves:
+                return False
+            self._log.write(linea)
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._pendientes.append(operacion)
+            self._claves.add(clave)
+        self._hay_datos.set()
+        return True
+
+    def vaciar(self):
+        """Aplica un lote de la cola en la base de datos; devuelve cuántas operaciones guardó"""
+        with self._vaciando:
+            return self._vaciar_lote()
+
+    def _vaciar_lote(self):
+        with self._lock:
+            lote = self._pendientes[:self.lote_max]
+            if not lote:
+                self._hay_datos.clear()
+                return 0
+
+        with self.app.app_context():
+            try:
+                self._aplicar(lote)
+            except Exception as e:
+                print(f"Error al guardar {len(lote)} confirmaciones diferidas (se reintentará): {str(e)}")
+                return 0
+
+        with self._lock:
+            del self._pendientes[:len(lote)]
+            for operacion in lote:
+                self._claves.discard(operacion['clave'])
+            self._compactar_log()
+            if not self._pendientes:
+                self._hay_datos.clear()
+        return len(lote)
+
+    def _vaciar_periodicamente(self):
+        while True:
+            self._hay_datos.wait()
+            # Esperar un momento para reunir más escaneos en el mismo commit
+            time.sleep(self.intervalo)
+            if self.vaciar() == 0 and self._hay_datos.is_set():
+                time.sleep(1)  # La base de datos falló: no reintentar en un bucle cerrado
+
+    def _cerrar(self):
+        # Al terminar normalmente, guardar lo pendiente y borrar el log si quedó vacío
+        while self.vaciar():
+            pass
+        with self._lock:
+            if self._pendientes:
+                return  # Se recuperará al arrancar de nuevo
+            self._log.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._ruta_log)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._bloqueo.name)
+            self._bloqueo.close()
+
+    def _compactar_log(self):
+        # Dejar en el log solo las operaciones aún pendientes (normalmente ninguna)
+        if not self._pendientes:
+            self._log.truncate(0)
+            return
+        temporal = self._ruta_log + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            for operacion in self._pendientes:
+                f.write(json.dumps(operacion) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._log.close()
+        os.replace(temporal, self._ruta_log)
+        self._log = open(self._ruta_log, 'a', encoding='utf-8')
+
+    def _recuperar(self, directorio):
+        """
+        Incorpora a la cola los logs de procesos terminados.
+
+        Varios procesos que arrancan a la vez pueden encontrar el mismo log
+        huérfano: solo lo recupera el que obtiene el bloqueo mientras el .lock
+        sigue en el directorio. El log se borra antes que el .lock, y este antes
+        de liberar el bloqueo, así que quien llega después no encuentra nada.
+        """
+        for ruta_bloqueo in glob.glob(os.path.join(directorio, 'checkins-*.lock')):
+            if ruta_bloqueo == self._bloqueo.name:
+                continue
+            try:
+                bloqueo = open(ruta_bloqueo, 'r')
+            except FileNotFoundError:
+                continue  # Otro proceso acaba de recuperarlo
+            with bloqueo:
+                if fcntl:
+                    try:
+                        fcntl.flock(bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # El proceso dueño sigue vivo
+                    # Si otro proceso lo recuperó entre glob y flock, el .lock ya no
+                    # está (o es otro archivo con el mismo nombre): no hay nada que hacer
+                    try:
+                        if os.stat(ruta_bloqueo).st_ino != os.fstat(bloqueo.fileno()).st_ino:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                self._recuperar_log(ruta_bloqueo[:-len('.lock')] + '.log')
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(ruta_bloqueo)
+
+    def _recuperar_log(self, ruta_log):
+        recuperadas = 0
+        try:
+            f = open(ruta_log, encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for linea in f:
+                try:
+                    operacion = json.loads(linea)
+                except ValueError:
+                    continue  # Línea incompleta escrita durante la caída
+                if self.encolar(operacion.pop('clave'), operacion):
+                    recuperadas += 1
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(ruta_log)
+        if recuperadas:
+            print(f"Recuperadas {recuperadas} confirmaciones diferidas de {os.path.basename(ruta_log)}")
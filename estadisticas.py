@@ -0,0 +1,56 @@
+from typing import NamedTuple
+from sqlalchemy import case, func, select
+from models import Asistente, Charla, asistente_charla
+
+
+class EstadisticasCharla(NamedTuple):
+    """Inscritos y asistentes confirmados de una charla"""
+    id: int
+    nombre: str
+    total_registrados: int
+    total_asistieron: int
+
+
+class Estadisticas(NamedTuple):
+    """Foto inmutable de las estadísticas del evento"""
+    charlas_total: int
+    asistentes_total: int
+    asistentes_confirmados: int
+    asistencias_total: int
+    charlas: tuple
+
+
+def calcular_estadisticas(session):
+    """
+    Calcula las estadísticas generales y por charla.
+
+    Los conteos por charla salen de un único GROUP BY sobre charla unida a
+    asistente_charla, y los totales de asistentes de una sola consulta
+    agregada sobre asistente, sin cargar objetos del ORM.
+
+    Returns:
+        Estadisticas: Totales del evento y una tupla de EstadisticasCharla ordenada por ID
+    """
+    asistio = case((asistente_charla.c.asistio == True, 1), else_=0)
+    filas = session.execute(
+        select(Charla.id, Charla.nombre,
+               func.count(asistente_charla.c.asistente_id),
+               func.coalesce(func.sum(asistio), 0))
+        .outerjoin(asistente_charla, asistente_charla.c.charla_id == Charla.id)
+        .group_by(Charla.id, Charla.nombre)
+        .order_by(Charla.id)
+    )
+    charlas = tuple(EstadisticasCharla(*fila) for fila in filas)
+
+    confirmado = case((Asistente.asistencia_confirmada == True, 1), else_=0)
+    asistentes_total, asistentes_confirmados = session.execute(
+        select(func.count(Asistente.id), func.coalesce(func.sum(confirmado), 0))
+    ).one()
+
+    return Estadisticas(
+        charlas_total=len(charlas),
+        asistentes_total=asistentes_total,
+        asistentes_confirmados=asistentes_confirmados,
+        asistencias_total=sum(c.total_asistieron for c in charlas),
+        charlas=charlas,
+    )
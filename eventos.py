@@ -0,0 +1,192 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, select
+from models import db, EventoAsistencia
+
+
+def registrar_asistencias(session, confirmadas):
+    """
+    Anota asistencias confirmadas en la tabla evento_asistencia, dentro de la misma
+    transacción que las confirma, para que todos los procesos Flask las difundan.
+
+    Args:
+        session: Sesión (síncrona) de SQLAlchemy; el commit queda a cargo de quien llama
+        confirmadas (list): Tuplas (asistente, charla_id o None, fecha), como en publicar_asistencias
+    """
+    if not confirmadas:
+        return
+    registrado = datetime.now()
+    session.execute(insert(EventoAsistencia), [{
+        'asistente_id': asistente['id'],
+        'nombres': asistente['nombres'],
+        'empresa': asistente['empresa'],
+        'charla_id': charla_id,
+        'fecha': fecha,
+        'registrado': registrado,
+    } for asistente, charla_id, fecha in confirmadas])
+
+
+class DifusorEventos:
+    """
+    Difunde eventos (Server-Sent Events) a los paneles abiertos en este proceso.
+
+    Cada suscriptor tiene una cola acotada: si un navegador lento no consume
+    sus eventos, los nuevos se descartan para ese suscriptor en lugar de
+    acumular memoria o frenar a quien publica. El número de suscriptores
+    simultáneos también está limitado (EVENTOS_MAX_SUSCRIPTORES).
+
+    Las asistencias llegan por la tabla evento_asistencia, donde las anota
+    (con registrar_asistencias) la transacción que las confirma, en cualquier
+    proceso: los workers de la aplicación Flask y el servicio asíncrono de
+    servicio_async.py. Mientras haya paneles abiertos, un hilo de cada proceso
+    la consulta cada EVENTOS_INTERVALO_SONDEO segundos y entrega las filas
+    nuevas a la función registrada con @eventos.difusor, así que cada panel
+    recibe todas las asistencias sin importar qué proceso lo atiende. Las
+    filas anotadas hace más de EVENTOS_RETENCION_SEGUNDOS se eliminan. Con un
+    intervalo de 0 no se consulta la tabla (ni se difunden asistencias).
+    """
+
+    def __init__(self):
+        self.max_suscriptores = 500
+        self.tamano_cola = 100
+        self.intervalo_latido = 15
+        self.intervalo_sondeo = 1
+        self.retencion = 3600
+        self.ventana = 10
+        self.lote_max = 500
+        self.app = None
+        self._difundir = None
+        self._difundidas = None  # IDs ya difundidos dentro de la ventana (None: sin leer aún)
+        self._purgado_en = 0
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.max_suscriptores = app.config.setdefault('EVENTOS_MAX_SUSCRIPTORES', 500)
+        self.tamano_cola = app.config.setdefault('EVENTOS_TAMANO_COLA', 100)
+        self.intervalo_latido = app.config.setdefault('EVENTOS_INTERVALO_LATIDO', 15)
+        self.intervalo_sondeo = app.config.setdefault('EVENTOS_INTERVALO_SONDEO', 1)
+        self.retencion = app.config.setdefault('EVENTOS_RETENCION_SEGUNDOS', 3600)
+        self.ventana = app.config.setdefault('EVENTOS_VENTANA_SEGUNDOS', 10)
+
+    def difusor(self, funcion):
+        """
+        Registra la función que difunde las asistencias a los paneles (decorador).
+
+        La función recibe una lista de tuplas (asistente como diccionario,
+        charla_id o None, fecha) leídas de la tabla evento_asistencia.
+        """
+        self._difundir = funcion
+        if self.intervalo_sondeo:
+            threading.Thread(target=self._sondear_periodicamente, name='eventos', daemon=True).start()
+        return funcion
+
+    def sondear(self):
+        """
+        Difunde las filas de evento_asistencia que aún no se difundieron.
+
+        Los IDs no llegan en orden: en PostgreSQL o MySQL una transacción puede
+        hacer commit de una fila con un ID menor que otras ya leídas. Por eso cada
+        consulta vuelve a leer las filas registradas en los últimos
+        EVENTOS_VENTANA_SEGUNDOS y descarta las ya difundidas. La primera consulta
+        (o la primera tras quedarse sin paneles) solo toma nota de las filas
+        existentes: un panel recién abierto no recibe asistencias viejas.
+
+        Returns:
+            int: Cantidad de asistencias difundidas
+        """
+        limite = datetime.now() - timedelta(seconds=self.ventana)
+        ids = set(db.session.scalars(
+            select(EventoAsistencia.id).where(EventoAsistencia.registrado >= limite)
+        ))
+        if self._difundidas is None:
+            self._difundidas = ids
+            return 0
+
+        nuevas = sorted(ids - self._difundidas)
+        # Olvidar las filas que ya salieron de la ventana
+        self._difundidas &= ids
+        for inicio in range(0, len(nuevas), self.lote_max):
+            filas = db.session.scalars(
+                select(EventoAsistencia)
+                .where(EventoAsistencia.id.in_(nuevas[inicio:inicio + self.lote_max]))
+                .order_by(EventoAsistencia.id)
+            ).all()
+            self._difundir([({'id': fila.asistente_id, 'nombres': fila.nombres, 'empresa': fila.empresa},
+                             fila.charla_id, fila.fecha) for fila in filas])
+            self._difundidas.update(fila.id for fila in filas)
+        return len(nuevas)
+
+    def purgar(self):
+        """Elimina las filas de evento_asistencia más antiguas que la retención"""
+        limite = datetime.now() - timedelta(seconds=self.retencion)
+        db.session.execute(delete(EventoAsistencia).where(EventoAsistencia.registrado < limite))
+        db.session.commit()
+
+    def _sondear_periodicamente(self):
+        while True:
+            time.sleep(self.intervalo_sondeo)
+            with self._lock:
+                hay_paneles = bool(self._suscriptores)
+            if not hay_paneles:
+                self._difundidas = None
+                continue
+            with self.app.app_context():
+                try:
+                    self.sondear()
+                    if time.monotonic() - self._purgado_en > 60:
+                        self._purgado_en = time.monotonic()
+                        self.purgar()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error al leer las asistencias de otros procesos: {str(e)}")
+
+    def suscribir(self, filtro=None):
+        """
+        Registra un suscriptor y devuelve su cola, o None si se alcanzó el límite.
+
+        Args:
+            filtro (callable): Recibe (tipo, datos) y decide si el evento se envía
+        """
+        suscriptor = (queue.Queue(maxsize=self.tamano_cola), filtro)
+        with self._lock:
+            if len(self._suscriptores) >= self.max_suscriptores:
+                return None
+            self._suscriptores.add(suscriptor)
+        return suscriptor
+
+    def cancelar(self, suscriptor):
+        with self._lock:
+            self._suscriptores.discard(suscriptor)
+
+    def publicar(self, tipo, datos):
+        """Encola el evento para todos los suscriptores sin bloquear"""
+        mensaje = f"event: {tipo}\ndata: {json.dumps(datos)}\n\n"
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for cola, filtro in suscriptores:
+            if filtro is not None and not filtro(tipo, datos):
+                continue
+            try:
+                cola.put_nowait(mensaje)
+            except queue.Full:
+                pass  # Suscriptor atrasado: pierde este evento
+
+    def flujo(self, suscriptor):
+        """Generador con el cuerpo de la respuesta text/event-stream"""
+        cola, _ = suscriptor
+        try:
+            # Indicar al navegador cuánto esperar antes de reconectarse
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    yield cola.get(timeout=self.intervalo_latido)
+                except queue.Empty:
+                    # Comentario SSE para mantener viva la conexión (y detectar clientes caídos)
+                    yield ": latido\n\n"
+        finally:
+            self.cancelar(suscriptor)
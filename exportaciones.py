@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from tareas import ColaTareas
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo de archivos entre procesos
+    fcntl = None
+
+ID_REGEX = re.compile(r'^[0-9a-f]{32}$')
+ESTADOS_EN_CURSO = ('pendiente', 'en_proceso')
+
+
+class GestorExportaciones:
+    """
+    Ejecuta las exportaciones a Excel como trabajos en segundo plano.
+
+    El estado de cada trabajo se guarda como JSON junto al archivo generado en
+    EXPORT_DIR, de modo que cualquier proceso del servidor puede consultarlo y
+    servir la descarga. Los archivos con más de EXPORT_TTL_SEGUNDOS se eliminan
+    automáticamente al crear o consultar exportaciones (como mucho una vez
+    por EXPORT_PURGA_SEGUNDOS) y al arrancar.
+
+    Cada proceso mantiene bloqueado un archivo proceso-<id>.lock mientras vive,
+    y cada trabajo registra el proceso que lo ejecuta: un trabajo pendiente o
+    en proceso cuyo .lock puede bloquearse quedó huérfano (el servidor se
+    reinició) y se marca como 'error' en lugar de consultarse indefinidamente.
+    Sin fcntl (Windows) se asume un único proceso de servidor.
+    """
+
+    def __init__(self):
+        self.directorio = None
+        self.ttl = None
+        self.intervalo_purga = 60
+        self.tareas = None
+        self.proceso = None
+        self._bloqueo = None
+        self._ultima_purga = 0.0
+
+    def init_app(self, app):
+        self.directorio = app.config.setdefault(
+            'EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'qr_asistencia_exportaciones'))
+        self.ttl = app.config.setdefault('EXPORT_TTL_SEGUNDOS', 3600)
+        self.intervalo_purga = app.config.setdefault('EXPORT_PURGA_SEGUNDOS', 60)
+        os.makedirs(self.directorio, exist_ok=True)
+
+        self.proceso = uuid.uuid4().hex
+        self._bloqueo = open(self._ruta_bloqueo(self.proceso), 'w')
+        if fcntl:
+            fcntl.flock(self._bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # Archivos vencidos y trabajos interrumpidos por el reinicio anterior
+        self.purgar()
+
+        # Pool propio para que una exportación larga no retrase otras tareas
+        self.tareas = ColaTareas(max_workers=app.config.setdefault('EXPORT_WORKERS', 2))
+        self.tareas.init_app(app)
+
+    def crear(self, tipo, nombre_archivo, funcion):
+        """
+        Encola una exportación y devuelve el ID del trabajo.
+
+        Args:
+            tipo (str): Identificador de la exportación (registros, asistentes, reporte)
+            nombre_archivo (str): Nombre con el que se descargará el archivo
+            funcion (callable): Genera el archivo y devuelve su ruta
+        """
+        self._purgar_si_corresponde()
+        trabajo_id = uuid.uuid4().hex
+        self._guardar(trabajo_id, {
+            'id': trabajo_id,
+            'tipo': tipo,
+            'proceso': self.proceso,
+            'estado': 'pendiente',
+            'nombre_archivo': nombre_archivo,
+            'creado': datetime.now().isoformat(),
+            'terminado': None,
+            'error': None,
+        })
+        self.tareas.enviar(self._ejecutar, trabajo_id, funcion)
+        return trabajo_id
+
+    def estado(self, trabajo_id):
+        """Devuelve el estado del trabajo o None si no existe (o ya fue eliminado)"""
+        if not ID_REGEX.match(trabajo_id or ''):
+            return None
+        self._purgar_si_corresponde()
+        trabajo = self._leer(trabajo_id)
+        if trabajo is not None:
+            self._cerrar_si_huerfano(trabajo)
+        return trabajo
+
+    def ruta_archivo(self, trabajo_id):
+        return self._ruta(trabajo_id, '.xlsx')
+
+    def purgar(self):
+        """
+        Elimina los archivos (resultados y estados) más antiguos que el TTL, los
+        bloqueos de procesos terminados, y marca como 'error' los trabajos huérfanos
+        """
+        self._ultima_purga = time.monotonic()
+        limite = time.time() - self.ttl
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            base, extension = os.path.splitext(nombre)
+            try:
+                if extension == '.lock':
+                    if base.startswith('proceso-') and not self._proceso_vivo(base[len('proceso-'):]):
+                        os.remove(ruta)
+                elif os.path.getmtime(ruta) < limite:
+                    os.remove(ruta)
+                elif extension == '.json' and ID_REGEX.match(base):
+                    trabajo = self._leer(base)
+                    if trabajo is not None:
+                        self._cerrar_si_huerfano(trabajo)
+            except OSError:
+                pass
+
+    def _purgar_si_corresponde(self):
+        if time.monotonic() - self._ultima_purga >= self.intervalo_purga:
+            self.purgar()
+
+    def _proceso_vivo(self, proceso):
+        if proceso == self.proceso:
+            return True
+        if not fcntl or not proceso:
+            return False
+        ruta = self._ruta_bloqueo(proceso)
+        if not os.path.exists(ruta):
+            return False
+        with open(ruta, 'a') as bloqueo:
+            try:
+                fcntl.flock(bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True  # El proceso dueño sigue vivo
+        return False
+
+    def _cerrar_si_huerfano(self, trabajo):
+        # Trabajo sin terminar de un proceso que ya no existe: nunca se completará
+        if trabajo['estado'] in ESTADOS_EN_CURSO and not self._proceso_vivo(trabajo.get('proceso')):
+            trabajo['estado'] = 'error'
+            trabajo['error'] = 'La exportación se interrumpió al reiniciarse el servidor; vuelva a generarla'
+            trabajo['terminado'] = datetime.now().isoformat()
+            self._guardar(trabajo['id'], trabajo)
+
+    def _ejecutar(self, trabajo_id, funcion):
+        trabajo = self._leer(trabajo_id)
+        trabajo['estado'] = 'en_proceso'
+        self._guardar(trabajo_id, trabajo)
+        try:
+            ruta_temporal = funcion()
+            shutil.move(ruta_temporal, self.ruta_archivo(trabajo_id))
+            trabajo['estado'] = 'completado'
+        except Exception as e:
+            print(f"Error en la exportación {trabajo_id}: {str(e)}")
+            trabajo['estado'] = 'error'
+            trabajo['error'] = str(e)
+        trabajo['terminado'] = datetime.now().isoformat()
+        self._guardar(trabajo_id, trabajo)
+
+    def _ruta(self, trabajo_id, extension):
+        return os.path.join(self.directorio, f"{trabajo_id}{extension}")
+
+    def _ruta_bloqueo(self, proceso):
+        return self._ruta(f"proceso-{proceso}", '.lock')
+
+    def _leer(self, trabajo_id):
+        try:
+            with open(self._ruta(trabajo_id, '.json'), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _guardar(self, trabajo_id, trabajo):
+        # Escribir y renombrar para que un lector nunca vea un JSON a medias
+        ruta = self._ruta(trabajo_id, '.json')
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(trabajo, f)
+        os.replace(ruta + '.tmp', ruta)
@@ -0,0 +1,189 @@
+import base64
+import hashlib
+import hmac
+import math
+import threading
+from sqlalchemy import func, select
+from models import Asistente, asistente_charla
+from utils import build_qr_payload
+
+# Hash FNV-1a de 32 bits; las páginas de escaneo lo calculan igual en JavaScript
+# (static/js/filtro_qr.js), por lo que estos valores no deben cambiar
+FNV_PRIMO = 16777619
+FNV_BASE = 2166136261
+FNV_BASE_2 = 0x5BD1E995
+
+# Capacidad mínima (en asistentes) de un filtro y múltiplo al que se redondea,
+# para no reconstruirlo con cada registro
+CAPACIDAD_MINIMA = 1024
+
+
+def fnv1a(datos, base=FNV_BASE):
+    h = base
+    for byte in datos:
+        h ^= byte
+        h = (h * FNV_PRIMO) & 0xFFFFFFFF
+    return h
+
+
+def posiciones(elemento, m, k):
+    """Bits del filtro que corresponden a un elemento (doble hash: h1 + i * h2)"""
+    datos = elemento.encode('utf-8')
+    h1 = fnv1a(datos)
+    h2 = fnv1a(datos, FNV_BASE_2) | 1
+    return [((h1 + i * h2) & 0xFFFFFFFF) % m for i in range(k)]
+
+
+class FiltroBloom:
+    """Filtro de Bloom de los códigos de un conjunto de asistentes"""
+
+    def __init__(self, capacidad, tasa_falsos, huella):
+        # Dos elementos por asistente: el código v2 y la clave heredada
+        elementos = 2 * capacidad
+        self.capacidad = capacidad
+        self.m = math.ceil(-elementos * math.log(tasa_falsos) / math.log(2) ** 2)
+        self.k = max(1, round(self.m / elementos * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+        self.huella = huella
+        self.max_id = 0
+        self.total = 0
+
+    @property
+    def version(self):
+        # Identifica los parámetros del filtro y hasta dónde llega su contenido
+        return f"{self.huella}-{self.m}-{self.k}-{self.max_id}-{self.total}"
+
+    def agregar(self, elemento):
+        nuevas = posiciones(elemento, self.m, self.k)
+        for posicion in nuevas:
+            self.bits[posicion >> 3] |= 1 << (posicion & 7)
+        return nuevas
+
+    def a_dict(self):
+        return {
+            'version': self.version,
+            'm': self.m,
+            'k': self.k,
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii'),
+        }
+
+
+class FiltroQR:
+    """
+    Filtros de Bloom versionados con los códigos QR válidos, para que las páginas
+    de escaneo descarten sin ir al servidor los códigos que no son de ningún
+    asistente (o, por charla, de ningún inscrito).
+
+    Cada filtro contiene, por asistente, su código v2 completo y su clave QR
+    heredada (los 15 primeros caracteres de un código v1). Los IDs de asistente
+    solo crecen, así que un filtro se actualiza agregando los asistentes con ID
+    mayor que el último incluido; quien tiene una versión anterior recibe solo
+    las posiciones de bits nuevas. Si el conjunto cambió de otra forma (bajas,
+    inscripciones de asistentes antiguos), se reconstruye completo. Un filtro
+    de Bloom no tiene falsos negativos: nunca descarta un código válido que
+    contenga.
+    """
+
+    def __init__(self):
+        self.tasa_falsos = 0.01
+        self._filtros = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.secret = app.config['QR_SECRET_KEY']
+        self.tasa_falsos = app.config.setdefault('FILTRO_QR_TASA_FALSOS', 0.01)
+        # Cambiar la clave de firma invalida los filtros que tengan las páginas. La huella
+        # es pública (va en la versión del filtro): un HMAC no permite probar claves con ella
+        self.huella = hmac.new(self.secret.encode(), b'filtro-qr', hashlib.sha256).hexdigest()[:8]
+
+    def consultar(self, session, charla_id=None, version_cliente=None):
+        """
+        Devuelve el filtro actual, o solo los bits nuevos respecto a version_cliente.
+
+        Returns:
+            dict: 'version', 'm', 'k' y 'bits' (base64) o 'delta' (lista de posiciones)
+        """
+        with self._lock:
+            filtro = self._actualizar(session, charla_id)
+            respuesta = filtro.a_dict() if version_cliente is None else None
+            version = filtro.version
+            m, k, max_id, total = filtro.m, filtro.k, filtro.max_id, filtro.total
+
+        if version_cliente is not None:
+            delta = self._delta(session, charla_id, version_cliente, m, k, max_id, total)
+            if delta is None:
+                with self._lock:
+                    return self._filtros[charla_id].a_dict()
+            respuesta = {'version': version, 'm': m, 'k': k, 'delta': delta}
+        return respuesta
+
+    def _estado(self, session, charla_id):
+        # (ID máximo, número de asistentes) del conjunto que cubre el filtro
+        if charla_id is None:
+            consulta = select(func.max(Asistente.id), func.count(Asistente.id))
+        else:
+            consulta = (select(func.max(asistente_charla.c.asistente_id), func.count())
+                        .where(asistente_charla.c.charla_id == charla_id))
+        max_id, total = session.execute(consulta).one()
+        return max_id or 0, total
+
+    def _asistentes(self, session, charla_id, desde, hasta):
+        consulta = (select(Asistente.id, Asistente.qr_key)
+                    .where(Asistente.id > desde, Asistente.id <= hasta)
+                    .order_by(Asistente.id))
+        if charla_id is not None:
+            consulta = consulta.join(asistente_charla, asistente_charla.c.asistente_id == Asistente.id).where(
+                asistente_charla.c.charla_id == charla_id)
+        return session.execute(consulta).all()
+
+    def _elementos(self, asistente_id, qr_key):
+        yield build_qr_payload(asistente_id, self.secret)
+        if qr_key:
+            yield qr_key
+
+    def _actualizar(self, session, charla_id):
+        max_id, total = self._estado(session, charla_id)
+        filtro = self._filtros.get(charla_id)
+
+        if filtro is not None and filtro.max_id == max_id and filtro.total == total:
+            return filtro
+
+        # Intentar una actualización incremental con los asistentes nuevos
+        if filtro is not None and total <= filtro.capacidad and max_id > filtro.max_id:
+            filas = self._asistentes(session, charla_id, filtro.max_id, max_id)
+            if filtro.total + len(filas) == total:
+                for asistente_id, qr_key in filas:
+                    for elemento in self._elementos(asistente_id, qr_key):
+                        filtro.agregar(elemento)
+                filtro.max_id, filtro.total = max_id, total
+                return filtro
+
+        # Reconstruir con holgura para absorber los próximos registros
+        capacidad = max(CAPACIDAD_MINIMA, math.ceil(total * 1.25 / CAPACIDAD_MINIMA) * CAPACIDAD_MINIMA)
+        filtro = FiltroBloom(capacidad, self.tasa_falsos, self.huella)
+        for asistente_id, qr_key in self._asistentes(session, charla_id, 0, max_id):
+            for elemento in self._elementos(asistente_id, qr_key):
+                filtro.agregar(elemento)
+        filtro.max_id, filtro.total = max_id, total
+        self._filtros[charla_id] = filtro
+        return filtro
+
+    def _delta(self, session, charla_id, version_cliente, m, k, max_id, total):
+        """Posiciones de bits nuevas desde version_cliente, o None si hace falta el filtro completo"""
+        try:
+            huella, m_cliente, k_cliente, max_cliente, total_cliente = version_cliente.split('-')
+            m_cliente, k_cliente = int(m_cliente), int(k_cliente)
+            max_cliente, total_cliente = int(max_cliente), int(total_cliente)
+        except ValueError:
+            return None
+        if (huella, m_cliente, k_cliente) != (self.huella, m, k) or max_cliente > max_id:
+            return None
+
+        filas = self._asistentes(session, charla_id, max_cliente, max_id)
+        if total_cliente + len(filas) != total:
+            return None
+        delta = set()
+        for asistente_id, qr_key in filas:
+            for elemento in self._elementos(asistente_id, qr_key):
+                delta.update(posiciones(elemento, m, k))
+        return sorted(delta)
@@ -0,0 +1,231 @@
+import csv
+import io
+import os
+import unicodedata
+from datetime import datetime
+from sqlalchemy import insert, select
+from models import db, Asistente, Charla, asistente_charla, clave_qr, texto_busqueda
+from contadores import ASISTENTES
+
+# Nombres de columna aceptados en el archivo (sin tildes ni mayúsculas) -> campo del modelo
+COLUMNAS = {
+    'nombres': 'nombres', 'nombre': 'nombres', 'nombres y apellidos': 'nombres',
+    'empresa': 'empresa',
+    'cargo': 'cargo',
+    'correo': 'correo', 'email': 'correo', 'correo electronico': 'correo',
+    'numero': 'numero', 'telefono': 'numero', 'celular': 'numero',
+    'dni': 'dni', 'documento': 'dni',
+    'charlas': 'charlas',
+}
+OBLIGATORIOS = ('nombres', 'empresa', 'correo', 'dni')
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return texto.strip().lower()
+
+
+def _celda(valor):
+    if valor is None:
+        return ''
+    # Excel guarda DNI y teléfonos como números: 12345678.0 -> "12345678"
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def leer_filas(archivo, nombre_archivo):
+    """
+    Recorre el archivo fila a fila sin cargarlo completo en memoria.
+
+    Args:
+        archivo: Objeto tipo archivo binario (p. ej. request.files['archivo'].stream)
+        nombre_archivo (str): Nombre original, para distinguir CSV de Excel
+
+    Yields:
+        tuple: (número de fila en el archivo, lista de valores)
+    """
+    extension = os.path.splitext(nombre_archivo or '')[1].lower()
+
+    if extension in ('.xlsx', '.xlsm'):
+        from openpyxl import load_workbook
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            for numero, fila in enumerate(libro.active.iter_rows(values_only=True), start=1):
+                yield numero, [_celda(v) for v in fila]
+        finally:
+            libro.close()
+    elif extension in ('.csv', '.txt'):
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+        # Las hojas exportadas con configuración regional en español suelen usar ";":
+        # se toma como separador el más frecuente en la fila de encabezados
+        encabezado = texto.readline()
+        texto.seek(0)
+        separador = max(',;\t', key=encabezado.count)
+        for numero, fila in enumerate(csv.reader(texto, delimiter=separador), start=1):
+            yield numero, [_celda(v) for v in fila]
+    else:
+        raise ValueError('Formato de archivo no soportado (use .csv o .xlsx)')
+
+
+def importar_asistentes(archivo, nombre_archivo, tamano_lote=1000, contadores=None):
+    """
+    Importa asistentes desde un archivo CSV o Excel con inserciones por lotes.
+
+    La unicidad de DNI y correo se valida contra conjuntos en memoria cargados
+    con una sola consulta, y cada lote de asistentes y sus inscripciones a
+    charlas se inserta con una sentencia por tabla y un commit. Si se indican
+    los contadores en vivo, se actualizan en la misma transacción de cada lote.
+
+    Un lote que no se puede guardar se revierte y sus filas se informan como
+    rechazadas, sin afectar a los lotes ya guardados ni a los siguientes; si
+    el archivo no puede leerse hasta el final, se guarda lo leído y el error
+    queda en el reporte.
+
+    Returns:
+        dict: 'aceptados' (int), 'rechazados' (lista de dicts con fila, dni y
+              motivo), 'nuevos' (lista de tuplas (id, qr_key) insertadas) y
+              'error' (None, o el error de lectura que interrumpió la importación)
+    """
+    filas = leer_filas(archivo, nombre_archivo)
+
+    # Encabezados: primera fila no vacía
+    campos = None
+    for _, valores in filas:
+        if any(valores):
+            campos = [COLUMNAS.get(_normalizar(v)) for v in valores]
+            break
+    if campos is None:
+        raise ValueError('El archivo está vacío')
+    faltantes = [c for c in OBLIGATORIOS if c not in campos]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+
+    # Datos existentes para validar unicidad y resolver charlas sin consultas por fila
+    dnis = set()
+    correos = set()
+    for dni, correo in db.session.execute(select(Asistente.dni, Asistente.correo)):
+        dnis.add(dni)
+        correos.add(correo.lower())
+    charlas_por_clave = {}
+    for charla_id, nombre in db.session.execute(select(Charla.id, Charla.nombre)):
+        charlas_por_clave[str(charla_id)] = charla_id
+        charlas_por_clave[_normalizar(nombre)] = charla_id
+
+    reporte = {'aceptados': 0, 'rechazados': [], 'nuevos': [], 'error': None}
+    lote = []
+    numero_fila = 0
+
+    try:
+        for numero_fila, valores in filas:
+            if not any(valores):
+                continue
+            datos = {}
+            for campo, valor in zip(campos, valores):
+                if campo and valor:
+                    datos[campo] = valor
+
+            faltan = [c for c in OBLIGATORIOS if not datos.get(c)]
+            if faltan:
+                motivo = f"Campos obligatorios vacíos: {', '.join(faltan)}"
+            elif datos['dni'] in dnis:
+                motivo = 'Ya existe un asistente registrado con este DNI'
+            elif datos['correo'].lower() in correos:
+                motivo = 'Ya existe un asistente registrado con este correo'
+            else:
+                motivo = None
+
+            charla_ids = []
+            if not motivo and datos.get('charlas'):
+                for clave in datos['charlas'].replace(';', ',').split(','):
+                    if not clave.strip():
+                        continue
+                    charla_id = charlas_por_clave.get(_normalizar(clave))
+                    if charla_id is None:
+                        motivo = f"Charla desconocida: {clave.strip()}"
+                        break
+                    if charla_id not in charla_ids:
+                        charla_ids.append(charla_id)
+
+            if motivo:
+                reporte['rechazados'].append({'fila': numero_fila, 'dni': datos.get('dni', ''), 'motivo': motivo})
+                continue
+
+            dnis.add(datos['dni'])
+            correos.add(datos['correo'].lower())
+            lote.append((numero_fila, datos, charla_ids))
+            if len(lote) >= tamano_lote:
+                _guardar_lote(lote, reporte, contadores)
+                lote = []
+    except Exception as e:
+        reporte['error'] = f"Error al leer el archivo después de la fila {numero_fila}: {str(e)}"
+
+    if lote:
+        _guardar_lote(lote, reporte, contadores)
+
+    return reporte
+
+
+def _guardar_lote(lote, reporte, contadores):
+    try:
+        _insertar_lote(lote, reporte, contadores)
+    except Exception as e:
+        db.session.rollback()
+        for numero_fila, datos, _ in lote:
+            reporte['rechazados'].append({
+                'fila': numero_fila,
+                'dni': datos['dni'],
+                'motivo': f"No se pudo guardar el lote: {str(e)}"
+            })
+
+
+def _insertar_lote(lote, reporte, contadores):
+    ahora = datetime.utcnow()
+    registros = []
+    for _, datos, charla_ids in lote:
+        registros.append({
+            'nombres': datos['nombres'],
+            'empresa': datos['empresa'],
+            'cargo': datos.get('cargo'),
+            'correo': datos['correo'],
+            'numero': datos.get('numero'),
+            'dni': datos['dni'],
+            'charlas': ",".join(str(c) for c in charla_ids),
+            'fecha_registro': ahora,
+            'asistencia_confirmada': False,
+            # Las inserciones masivas no disparan los eventos del ORM: calcular qr_key aquí
+            'qr_key': clave_qr(datos['nombres'], datos['empresa'], datos['dni'],
+                               datos.get('cargo'), datos.get('numero')),
+            'nombres_busqueda': texto_busqueda(datos['nombres']),
+            'empresa_busqueda': texto_busqueda(datos['empresa']),
+        })
+
+    dialecto = db.session.get_bind().dialect
+    if dialecto.insert_executemany_returning_sort_by_parameter_order:
+        ids = db.session.scalars(
+            insert(Asistente).returning(Asistente.id, sort_by_parameter_order=True),
+            registros
+        ).all()
+    else:
+        # Sin RETURNING en inserciones múltiples (MySQL/MariaDB): recuperar los IDs por DNI, que es único
+        db.session.execute(insert(Asistente), registros)
+        id_por_dni = dict(db.session.execute(
+            select(Asistente.dni, Asistente.id).where(Asistente.dni.in_([r['dni'] for r in registros]))
+        ).all())
+        ids = [id_por_dni[r['dni']] for r in registros]
+
+    inscripciones = [
+        {'asistente_id': asistente_id, 'charla_id': charla_id, 'asistio': False}
+        for asistente_id, (_, _, charla_ids) in zip(ids, lote)
+        for charla_id in charla_ids
+    ]
+    if inscripciones:
+        db.session.execute(asistente_charla.insert(), inscripciones)
+
+    if contadores is not None:
+        contadores.incrementar(db.session, ASISTENTES, len(ids))
+
+    db.session.commit()
+
+    reporte['aceptados'] += len(ids)
+    reporte['nuevos'].extend(zip(ids, (r['qr_key'] for r in registros)))
@@ -0,0 +1,80 @@
+import threading
+from sqlalchemy import event, select
+from models import Asistente
+
+
+class IndiceQR:
+    """
+    Índice en memoria (por proceso) que asocia cada clave QR con los IDs
+    de los asistentes que la generan.
+
+    Se carga de forma perezosa en la primera búsqueda a partir de la columna
+    qr_key y se mantiene al día mediante los eventos de SQLAlchemy sobre el
+    modelo Asistente. Las entradas solo son candidatos: quien consulta debe
+    verificar contra la base de datos, de modo que una entrada obsoleta nunca
+    devuelve un asistente incorrecto.
+    """
+
+    def __init__(self):
+        self._ids_por_clave = {}
+        self._clave_por_id = {}
+        self._cargado = False
+        self._lock = threading.Lock()
+
+    @property
+    def cargado(self):
+        return self._cargado
+
+    def cargar(self, session):
+        """Carga todas las claves desde la base de datos con una sola consulta"""
+        filas = session.execute(
+            select(Asistente.id, Asistente.qr_key).where(Asistente.qr_key.isnot(None))
+        )
+        with self._lock:
+            self._ids_por_clave.clear()
+            self._clave_por_id.clear()
+            for asistente_id, clave in filas:
+                self._agregar(asistente_id, clave)
+            self._cargado = True
+
+    def buscar(self, clave):
+        """Devuelve la lista ordenada de IDs candidatos para la clave (vacía si no hay)"""
+        with self._lock:
+            return sorted(self._ids_por_clave.get(clave, ()))
+
+    def agregar(self, asistente_id, clave):
+        with self._lock:
+            self._agregar(asistente_id, clave)
+
+    def eliminar(self, asistente_id):
+        with self._lock:
+            self._eliminar(asistente_id)
+
+    def _agregar(self, asistente_id, clave):
+        # Si el asistente ya estaba indexado con otra clave (edición), quitar la anterior
+        if self._clave_por_id.get(asistente_id) != clave:
+            self._eliminar(asistente_id)
+        self._ids_por_clave.setdefault(clave, set()).add(asistente_id)
+        self._clave_por_id[asistente_id] = clave
+
+    def _eliminar(self, asistente_id):
+        clave = self._clave_por_id.pop(asistente_id, None)
+        if clave is None:
+            return
+        ids = self._ids_por_clave.get(clave)
+        if ids:
+            ids.discard(asistente_id)
+            if not ids:
+                del self._ids_por_clave[clave]
+
+    def registrar_eventos(self):
+        """Mantiene el índice sincronizado con las altas, ediciones y bajas de asistentes"""
+        def al_guardar(mapper, connection, target):
+            self.agregar(target.id, target.qr_key)
+
+        def al_eliminar(mapper, connection, target):
+            self.eliminar(target.id)
+
+        event.listen(Asistente, 'after_insert', al_guardar)
+        event.listen(Asistente, 'after_update', al_guardar)
+        event.listen(Asistente, 'after_delete', al_eliminar)
@@ -0,0 +1,63 @@
+"""Agregar columna qr_key indexada a asistente
+
+Revision ID: 4c1e7a92d5b3
+Revises: 89b8e3bb4b19
+Create Date: 2025-05-03 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1e7a92d5b3'
+down_revision = '89b8e3bb4b19'
+branch_labels = None
+depends_on = None
+
+
+def _clave_qr(nombres, empresa, dni, cargo, numero):
+    # Copia de models.clave_qr: las migraciones no deben depender del código de la aplicación
+    nombre_corto = nombres[:3] if nombres else "NNN"
+    empresa_corta = empresa[:3] if empresa else "EEE"
+    dni_corto = dni[:3] if dni else "DDD"
+    cargo_corto = cargo[:3] if cargo else "CCC"
+    numero_corto = numero[:3] if numero else "000"
+    return f"{nombre_corto}{empresa_corta}{dni_corto}{cargo_corto}{numero_corto}"
+
+
+def upgrade():
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('qr_key', sa.String(length=15), nullable=True))
+        batch_op.create_index(batch_op.f('ix_asistente_qr_key'), ['qr_key'], unique=False)
+
+    # Rellenar qr_key para los asistentes existentes
+    conn = op.get_bind()
+    asistente = sa.table('asistente',
+        sa.column('id', sa.Integer),
+        sa.column('nombres', sa.String),
+        sa.column('empresa', sa.String),
+        sa.column('dni', sa.String),
+        sa.column('cargo', sa.String),
+        sa.column('numero', sa.String),
+        sa.column('qr_key', sa.String),
+    )
+    filas = conn.execute(sa.select(asistente.c.id, asistente.c.nombres, asistente.c.empresa,
+                                   asistente.c.dni, asistente.c.cargo, asistente.c.numero)).fetchall()
+    actualizaciones = [
+        {'b_id': f.id, 'b_qr_key': _clave_qr(f.nombres, f.empresa, f.dni, f.cargo, f.numero)}
+        for f in filas
+    ]
+    if actualizaciones:
+        conn.execute(
+            asistente.update()
+            .where(asistente.c.id == sa.bindparam('b_id'))
+            .values(qr_key=sa.bindparam('b_qr_key')),
+            actualizaciones
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_asistente_qr_key'))
+        batch_op.drop_column('qr_key')
@@ -0,0 +1,29 @@
+"""Agregar índices para la búsqueda de asistentes por nombres y empresa
+
+Revision ID: 6e2a9c4f1b87
+Revises: d51b8e2f0a46
+Create Date: 2025-05-08 16:25:11.902731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e2a9c4f1b87'
+down_revision = 'd51b8e2f0a46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Índices sobre lower(...) para las búsquedas por prefijo sin distinguir mayúsculas
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.create_index('ix_asistente_nombres_lower', [sa.text('lower(nombres)')], unique=False)
+        batch_op.create_index('ix_asistente_empresa_lower', [sa.text('lower(empresa)')], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.drop_index('ix_asistente_empresa_lower')
+        batch_op.drop_index('ix_asistente_nombres_lower')
@@ -0,0 +1,26 @@
+"""Agregar versión a asistente para la caché de fragmentos
+
+Revision ID: b7f3d0c8e215
+Revises: 6e2a9c4f1b87
+Create Date: 2025-05-09 11:42:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f3d0c8e215'
+down_revision = '6e2a9c4f1b87'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,73 @@
+"""Reemplazar los índices sobre lower() por columnas de búsqueda normalizadas
+
+Revision ID: c2a8e5f19d73
+Revises: b7f3d0c8e215
+Create Date: 2025-05-10 09:31:08.624517
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a8e5f19d73'
+down_revision = 'b7f3d0c8e215'
+branch_labels = None
+depends_on = None
+
+
+def _texto_busqueda(texto):
+    # Copia de models.texto_busqueda: las migraciones no deben depender del código de la aplicación
+    if not texto:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
+
+def upgrade():
+    # lower() de SQLite solo convierte letras ASCII: los índices sobre lower(...) no
+    # permitían encontrar nombres que empiezan por una mayúscula con tilde o Ñ
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.drop_index('ix_asistente_empresa_lower')
+        batch_op.drop_index('ix_asistente_nombres_lower')
+        batch_op.add_column(sa.Column('nombres_busqueda', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('empresa_busqueda', sa.String(length=100), nullable=True))
+        batch_op.create_index(batch_op.f('ix_asistente_nombres_busqueda'), ['nombres_busqueda'], unique=False)
+        batch_op.create_index(batch_op.f('ix_asistente_empresa_busqueda'), ['empresa_busqueda'], unique=False)
+
+    # Rellenar las columnas para los asistentes existentes
+    conn = op.get_bind()
+    asistente = sa.table('asistente',
+        sa.column('id', sa.Integer),
+        sa.column('nombres', sa.String),
+        sa.column('empresa', sa.String),
+        sa.column('nombres_busqueda', sa.String),
+        sa.column('empresa_busqueda', sa.String),
+    )
+    filas = conn.execute(sa.select(asistente.c.id, asistente.c.nombres, asistente.c.empresa)).fetchall()
+    actualizaciones = [
+        {'b_id': f.id, 'b_nombres': _texto_busqueda(f.nombres), 'b_empresa': _texto_busqueda(f.empresa)}
+        for f in filas
+    ]
+    if actualizaciones:
+        conn.execute(
+            asistente.update()
+            .where(asistente.c.id == sa.bindparam('b_id'))
+            .values(nombres_busqueda=sa.bindparam('b_nombres'), empresa_busqueda=sa.bindparam('b_empresa')),
+            actualizaciones
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_asistente_empresa_busqueda'))
+        batch_op.drop_index(batch_op.f('ix_asistente_nombres_busqueda'))
+        batch_op.drop_column('empresa_busqueda')
+        batch_op.drop_column('nombres_busqueda')
+
+    # Fuera del bloque anterior, que recrea la tabla: los índices sobre expresiones no se copian
+    with op.batch_alter_table('asistente', schema=None) as batch_op:
+        batch_op.create_index('ix_asistente_nombres_lower', [sa.text('lower(nombres)')], unique=False)
+        batch_op.create_index('ix_asistente_empresa_lower', [sa.text('lower(empresa)')], unique=False)
@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime
 import os
+import unicodedata
 
 db = SQLAlchemy()
 
@@ -34,6 +36,31 @@ class Charla(db.Model):
             'fecha': self.fecha.isoformat() if self.fecha else None
         }
 
+def clave_qr(nombres, empresa, dni, cargo, numero):
+    """
+    Construye la clave de 15 caracteres que se codifica en el QR:
+    [3 letras nombre][3 letras empresa][3 letras DNI][3 letras cargo][3 letras número]
+    
+    Los campos vacíos se sustituyen por valores de relleno fijos.
+    """
+    nombre_corto = nombres[:3] if nombres else "NNN"
+    empresa_corta = empresa[:3] if empresa else "EEE"
+    dni_corto = dni[:3] if dni else "DDD"
+    cargo_corto = cargo[:3] if cargo else "CCC"
+    numero_corto = numero[:3] if numero else "000"
+    return f"{nombre_corto}{empresa_corta}{dni_corto}{cargo_corto}{numero_corto}"
+
+def texto_busqueda(texto):
+    """
+    Forma normalizada de un texto para las búsquedas por prefijo: sin tildes ni
+    diéresis (la ñ queda como n) y sin distinguir mayúsculas. Se calcula en
+    Python porque lower() de SQLite solo convierte letras ASCII.
+    """
+    if not texto:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).casefold()
+
 class Asistente(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombres = db.Column(db.String(100), nullable=False)
@@ -50,6 +77,18 @@ class Asistente(db.Model):
     asistencia_confirmada = db.Column(db.Boolean, default=False)
     fecha_asistencia = db.Column(db.DateTime)
     
+    # Clave derivada que se codifica en el QR (ver clave_qr); indexada para resolver escaneos
+    qr_key = db.Column(db.String(15), index=True)
+    
+    # Se incrementa con cada cambio que afecta a la información mostrada al escanear
+    # (ver incrementar_version y asistencias.py); identifica los fragmentos en caché
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    # Nombres y empresa normalizados (ver texto_busqueda), indexados para la búsqueda
+    # por prefijo del dashboard
+    nombres_busqueda = db.Column(db.String(100), index=True)
+    empresa_busqueda = db.Column(db.String(100), index=True)
+    
     def __repr__(self):
         return f'<Asistente {self.nombres}>'
     
@@ -67,4 +106,62 @@ class Asistente(db.Model):
             'codigoQR': self.codigoQR,
             'asistencia_confirmada': self.asistencia_confirmada,
             'fecha_asistencia': self.fecha_asistencia.isoformat() if self.fecha_asistencia else None
-        }
\ No newline at end of file
+        }
+
+class EscaneoSincronizado(db.Model):
+    """Escaneo recibido desde la cola offline de un escáner, identificado por su clave de idempotencia"""
+    __tablename__ = 'escaneo_sincronizado'
+    
+    clave = db.Column(db.String(64), primary_key=True)  # Generada por el navegador
+    charla_id = db.Column(db.Integer)  # None para la asistencia general al evento
+    fecha_escaneo = db.Column(db.DateTime)  # Momento real del escaneo en la estación
+    fecha_recepcion = db.Column(db.DateTime, default=datetime.now)
+    resultado = db.Column(db.Text)  # Respuesta enviada al escáner (JSON)
+    
+    def __repr__(self):
+        return f'<EscaneoSincronizado {self.clave}>'
+
+class EventoAsistencia(db.Model):
+    """Asistencia confirmada por otro proceso (servicio asíncrono), pendiente de difundir a los paneles"""
+    __tablename__ = 'evento_asistencia'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Orden de lectura de los procesos Flask
+    asistente_id = db.Column(db.Integer, nullable=False)
+    nombres = db.Column(db.String(100))
+    empresa = db.Column(db.String(100))
+    charla_id = db.Column(db.Integer)  # None para la asistencia general al evento
+    fecha = db.Column(db.DateTime, nullable=False)  # De la confirmación (la del escaneo, si llegó offline)
+    registrado = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)  # Al anotar la fila
+    
+    def __repr__(self):
+        return f'<EventoAsistencia {self.id}>'
+
+class Contador(db.Model):
+    """Contador en vivo de asistencia, actualizado en la misma transacción que cada registro"""
+    __tablename__ = 'contador'
+    
+    clave = db.Column(db.String(50), primary_key=True)  # p. ej. 'confirmados' o 'charla:3:asistieron'
+    valor = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<Contador {self.clave}={self.valor}>'
+
+# Mantener qr_key sincronizada con los campos de los que se deriva
+@event.listens_for(Asistente, 'before_insert')
+@event.listens_for(Asistente, 'before_update')
+def actualizar_qr_key(mapper, connection, target):
+    target.qr_key = clave_qr(target.nombres, target.empresa, target.dni,
+                             target.cargo, target.numero)
+
+# Mantener las columnas de búsqueda sincronizadas con nombres y empresa
+@event.listens_for(Asistente, 'before_insert')
+@event.listens_for(Asistente, 'before_update')
+def actualizar_busqueda(mapper, connection, target):
+    target.nombres_busqueda = texto_busqueda(target.nombres)
+    target.empresa_busqueda = texto_busqueda(target.empresa)
+
+# Invalidar los fragmentos en caché del asistente con cada modificación por el ORM
+# (incluidas sus inscripciones); se incrementa en el propio UPDATE, sin leer el valor actual
+@event.listens_for(Asistente, 'before_update')
+def incrementar_version(mapper, connection, target):
+    target.version = Asistente.version + 1
@@ -0,0 +1,448 @@
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm.attributes import set_committed_value
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import HTMLResponse, JSONResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+import asistencias
+import basedatos
+import eventos
+from cache_escaneos import CacheEscaneos, CacheFragmentos
+from contadores import ContadoresEnVivo, CONFIRMADOS, ASISTENCIAS, clave_charla
+from indice_qr import IndiceQR
+from models import Asistente, Charla
+from utils import decode_qr_payload, render_asistente_fragment
+
+# Servicio de check-in asíncrono (ASGI) para muchas estaciones de escaneo.
+#
+# Expone el mismo contrato que las vistas de escaneo de la aplicación Flask
+# (/procesar-qr, /asistente-info y /confirmar-charla/<id>) sobre Starlette y
+# sesiones asíncronas de SQLAlchemy, de modo que un solo proceso mantiene miles
+# de escaneos en curso mientras espera a la base de datos. Usa los mismos
+# modelos y las sentencias de asistencias.py (a través de run_sync). El esquema
+# lo sigue gestionando la aplicación Flask (migraciones, create_all).
+#
+# Las estaciones pueden además mantener un canal WebSocket (/ws/escaner) por el
+# que envían cada escaneo como un mensaje compacto (ver canal_escaner).
+#
+# Cada asistencia confirmada aquí se anota en la tabla evento_asistencia en la
+# misma transacción; los procesos Flask la difunden a sus paneles (ver eventos.py).
+#
+# Ejecutar con: uvicorn servicio_async:app --port 8001
+# Dependencias opcionales: pip install -r requirements-async.txt
+
+INSTANCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance')
+
+config = {
+    'SQLALCHEMY_DATABASE_URI': basedatos.uri_desde_entorno('sqlite:///qr_asistencia.db'),
+    'QR_SECRET_KEY': os.environ.get('QR_SECRET_KEY', 'dev-qr-key-for-development'),
+    # Orígenes (separados por comas) de las páginas de escaneo, si se sirven desde otro host o puerto
+    'CHECKIN_CORS_ORIGENES': [o for o in os.environ.get('CHECKIN_CORS_ORIGENES', '').split(',') if o],
+    'ESCANEOS_CACHE_TTL_SEGUNDOS': float(os.environ.get('ESCANEOS_CACHE_TTL_SEGUNDOS', 3)),
+    'FRAGMENTOS_CACHE_MAX': int(os.environ.get('FRAGMENTOS_CACHE_MAX', 5000)),
+}
+basedatos.configurar(config)
+
+engine = create_async_engine(basedatos.uri_async(config['SQLALCHEMY_DATABASE_URI'], INSTANCIA),
+                             **config['SQLALCHEMY_ENGINE_OPTIONS'])
+basedatos.registrar_eventos(config, engine.sync_engine)
+Sesion = async_sessionmaker(engine, expire_on_commit=False)
+
+indice_qr = IndiceQR()
+# Solo para sumar a la tabla contador; el panel de administración los lee desde Flask
+contadores = ContadoresEnVivo()
+# Respuestas recientes por (estación, código, charla), como en la aplicación Flask
+cache_escaneos = CacheEscaneos(ttl=config['ESCANEOS_CACHE_TTL_SEGUNDOS'])
+# Asistentes ya registrados por (ID, versión): el fragmento HTML de /asistente-info
+# y los datos que recibe el canal WebSocket, sin consultar sus charlas
+cache_fragmentos = CacheFragmentos(max_entradas=config['FRAGMENTOS_CACHE_MAX'])
+cache_datos = CacheFragmentos(max_entradas=config['FRAGMENTOS_CACHE_MAX'])
+
+
+def clave_escaneo(estacion, codigo, charla_id=None):
+    if not estacion:
+        return None
+    return (estacion[:64], codigo, charla_id)
+
+
+def guardar_escaneo(clave, respuesta):
+    if clave:
+        cache_escaneos.guardar(clave, respuesta)
+    return respuesta
+
+
+async def resolver_asistente(session, version, valor):
+    """Equivalente asíncrono de resolver_asistente/buscar_asistente_por_clave de app.py"""
+    if version == 'v2':
+        return await session.get(Asistente, valor)
+
+    if not indice_qr.cargado:
+        await session.run_sync(indice_qr.cargar)
+
+    ids = indice_qr.buscar(valor)
+    if ids:
+        candidatos = await session.scalars(select(Asistente).where(Asistente.id.in_(ids)).order_by(Asistente.id))
+        # Descartar entradas obsoletas del índice (asistentes editados desde Flask)
+        candidatos = [a for a in candidatos if a.qr_key == valor]
+        if candidatos:
+            return candidatos[0]
+
+    asistente = await session.scalar(
+        select(Asistente).where(Asistente.qr_key == valor).order_by(Asistente.id).limit(1)
+    )
+    if asistente:
+        indice_qr.agregar(asistente.id, asistente.qr_key)
+    return asistente
+
+
+async def charlas_asistente(session, asistente_id):
+    filas = await session.run_sync(lambda s: asistencias.charlas_de_asistentes(s, [asistente_id]).all())
+    return [charla for _, charla in filas]
+
+
+def confirmar_general(session, asistente, fecha):
+    # Se ejecuta con run_sync: mismas sentencias y contadores que la aplicación Flask
+    if asistencias.confirmar_general(session, asistente.id, fecha) == 0:
+        return False
+    contadores.incrementar(session, CONFIRMADOS)
+    eventos.registrar_asistencias(session, [(datos_asistente(asistente), None, fecha)])
+    return True
+
+
+def confirmar_charla_sync(session, asistente, charla_id, fecha):
+    """Como confirmar_asistencia_charla de app.py (sin inscribir): 'confirmada', 'ya_confirmada' o 'no_inscrito'"""
+    if asistencias.confirmar(session, asistente.id, charla_id, fecha) == 0:
+        if asistencias.esta_inscrito(session, asistente.id, charla_id):
+            return 'ya_confirmada'
+        return 'no_inscrito'
+    contadores.incrementar(session, ASISTENCIAS)
+    contadores.incrementar(session, clave_charla(charla_id))
+    eventos.registrar_asistencias(session, [(datos_asistente(asistente), charla_id, fecha)])
+    return 'confirmada'
+
+
+def estacion_peticion(request):
+    return request.headers.get('X-Estacion') or request.query_params.get('estacion')
+
+
+async def leer_codigo(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return data.get('codigo')
+
+
+async def procesar_qr(request):
+    codigo_qr = await leer_codigo(request)
+    if not codigo_qr:
+        return JSONResponse({'success': False, 'message': 'Código QR no proporcionado'})
+
+    version, valor = decode_qr_payload(codigo_qr, config['QR_SECRET_KEY'])
+    if version is None:
+        return JSONResponse({'success': False, 'message': 'Formato de código QR inválido'})
+
+    try:
+        async with Sesion() as session:
+            asistente = await resolver_asistente(session, version, valor)
+            if not asistente:
+                return JSONResponse({
+                    'success': False,
+                    'message': 'No se encontró ningún asistente con este código QR'
+                })
+            charlas = await charlas_asistente(session, asistente.id)
+
+        return JSONResponse({
+            'success': True,
+            'asistente': asistente.to_dict(),
+            'charlas': [{
+                'id': charla.id,
+                'nombre': charla.nombre,
+                'descripcion': charla.descripcion,
+                'fecha': charla.fecha.strftime('%d/%m/%Y %H:%M') if charla.fecha else None
+            } for charla in charlas]
+        })
+    except Exception as e:
+        print(f"Error al procesar código QR: {str(e)}")
+        return JSONResponse({'success': False, 'message': f'Error al procesar código QR: {str(e)}'})
+
+
+MENSAJE_YA_REGISTRADO = "Este QR ya fue registrado anteriormente"
+
+
+async def escaneo_general(session, asistente):
+    """
+    Registra la asistencia general al evento del asistente ya resuelto (con commit).
+
+    Returns:
+        tuple: (estado, asistente, charlas); estado es 'confirmada', 'ya_confirmada' o 'no_encontrado'
+    """
+    if not asistente:
+        return 'no_encontrado', None, []
+
+    charlas = await charlas_asistente(session, asistente.id)
+    if asistente.asistencia_confirmada:
+        return 'ya_confirmada', asistente, charlas
+
+    fecha = datetime.now()
+    confirmada = await session.run_sync(confirmar_general, asistente, fecha)
+    await session.commit()
+    if not confirmada:
+        # Otra estación lo confirmó mientras tanto: mostrar su hora de registro
+        await session.refresh(asistente)
+        return 'ya_confirmada', asistente, charlas
+    set_committed_value(asistente, 'asistencia_confirmada', True)
+    set_committed_value(asistente, 'fecha_asistencia', fecha)
+    return 'confirmada', asistente, charlas
+
+
+async def escaneo_charla(session, version, valor, charla_id):
+    """
+    Resuelve el asistente y confirma su asistencia a la charla (con commit).
+
+    Returns:
+        tuple: (estado, asistente, charla); estado es 'confirmada', 'ya_confirmada',
+               'no_inscrito', 'no_encontrado' o 'charla_no_encontrada'
+    """
+    asistente = await resolver_asistente(session, version, valor)
+    if not asistente:
+        return 'no_encontrado', None, None
+
+    charla = await session.get(Charla, charla_id)
+    if charla is None:
+        return 'charla_no_encontrada', asistente, None
+
+    estado = await session.run_sync(confirmar_charla_sync, asistente, charla.id, datetime.now())
+    if estado == 'confirmada':
+        await session.commit()
+    return estado, asistente, charla
+
+
+def mensaje_charla(estado, asistente, charla):
+    if estado == 'no_encontrado':
+        return 'No se encontró ningún asistente con este código QR'
+    if estado == 'charla_no_encontrada':
+        return 'Charla no encontrada'
+    if estado == 'no_inscrito':
+        return f"El asistente {asistente.nombres} no está registrado para la charla {charla.nombre}"
+    return f"El asistente {asistente.nombres} ya registró su asistencia a esta charla"
+
+
+async def asistente_info(request):
+    """Fragmento HTML del escaneo general (la variante AJAX de /asistente-info)"""
+    codigo_qr = request.query_params.get('codigo')
+    if not codigo_qr:
+        return HTMLResponse("<div class='alert alert-danger'>No se proporcionó un código QR</div>")
+
+    clave_cache = clave_escaneo(estacion_peticion(request), codigo_qr)
+    if clave_cache:
+        fragmento = cache_escaneos.obtener(clave_cache)
+        if fragmento is not None:
+            return HTMLResponse(fragmento)
+
+    version, valor = decode_qr_payload(codigo_qr, config['QR_SECRET_KEY'])
+    if version is None:
+        return HTMLResponse("<div class='alert alert-danger'>Formato de código QR inválido</div>")
+
+    try:
+        async with Sesion() as session:
+            asistente = await resolver_asistente(session, version, valor)
+            # Un asistente ya registrado muestra lo mismo mientras no cambie su versión
+            if asistente and asistente.asistencia_confirmada:
+                fragmento = cache_fragmentos.obtener(asistente.id, asistente.version)
+                if fragmento is not None:
+                    return HTMLResponse(guardar_escaneo(clave_cache, fragmento))
+            estado, asistente, charlas = await escaneo_general(session, asistente)
+        if estado == 'no_encontrado':
+            return HTMLResponse(guardar_escaneo(
+                clave_cache, "<div class='alert alert-danger'>No se encontró ningún asistente con este código QR</div>"))
+
+        fragmento = render_asistente_fragment(
+            asistente, [{'nombre': charla.nombre} for charla in charlas],
+            estado == 'ya_confirmada', MENSAJE_YA_REGISTRADO
+        )
+        if estado == 'ya_confirmada':
+            cache_fragmentos.guardar(asistente.id, asistente.version, fragmento)
+        return HTMLResponse(guardar_escaneo(clave_cache, fragmento))
+    except Exception as e:
+        print(f"Error al procesar código QR: {str(e)}")
+        return HTMLResponse(f"<div class='alert alert-danger'>Error al procesar código QR: {str(e)}</div>")
+
+
+async def confirmar_charla(request):
+    charla_id = request.path_params['charla_id']
+    codigo_qr = await leer_codigo(request)
+    if not codigo_qr:
+        return JSONResponse({'success': False, 'message': 'Código QR no proporcionado'})
+
+    clave_cache = clave_escaneo(estacion_peticion(request), codigo_qr, charla_id)
+    if clave_cache:
+        respuesta = cache_escaneos.obtener(clave_cache)
+        if respuesta is not None:
+            return JSONResponse(respuesta)
+
+    version, valor = decode_qr_payload(codigo_qr, config['QR_SECRET_KEY'])
+    if version is None:
+        return JSONResponse({'success': False, 'message': 'Formato de código QR inválido'})
+
+    try:
+        async with Sesion() as session:
+            estado, asistente, charla = await escaneo_charla(session, version, valor, charla_id)
+        if estado == 'charla_no_encontrada':
+            return JSONResponse({'success': False, 'message': mensaje_charla(estado, asistente, charla)},
+                                status_code=404)
+        if estado != 'confirmada':
+            return JSONResponse(guardar_escaneo(clave_cache, {
+                'success': False, 'message': mensaje_charla(estado, asistente, charla)
+            }))
+
+        return JSONResponse(guardar_escaneo(clave_cache, {
+            'success': True,
+            'asistente': asistente.to_dict(),
+            'charla': {
+                'id': charla.id,
+                'nombre': charla.nombre,
+                'descripcion': charla.descripcion
+            }
+        }))
+    except Exception as e:
+        print(f"Error al procesar código QR para charla: {str(e)}")
+        return JSONResponse({'success': False, 'message': f'Error al procesar código QR: {str(e)}'})
+
+
+async def canal_escaner(websocket):
+    """
+    Canal WebSocket persistente de una estación de escaneo (/ws/escaner).
+
+    Cada mensaje de la estación es un escaneo {"n": secuencia, "c": código,
+    "ch": charla_id (omitido para la asistencia general)} y se responde con
+    {"n", "r": estado, "a": datos del asistente, "m": mensaje de error}, sin
+    cabeceras ni cookies por escaneo. Los códigos inválidos se rechazan sin
+    consultar la base de datos. Toda la conexión usa una misma sesión, que se
+    cierra tras cada escaneo para no leer datos viejos ni retener la conexión
+    a la base de datos mientras la estación espera el siguiente código.
+    """
+    await websocket.accept()
+    estacion = websocket.query_params.get('estacion')
+    async with Sesion() as session:
+        try:
+            while True:
+                try:
+                    escaneo = json.loads(await websocket.receive_text())
+                except ValueError:
+                    escaneo = None
+                await websocket.send_json(await responder_escaneo(session, escaneo, estacion))
+                # Terminar la transacción (y liberar la conexión) entre escaneos
+                await session.close()
+        except WebSocketDisconnect:
+            pass
+
+
+async def responder_escaneo(session, escaneo, estacion=None):
+    n = escaneo.get('n') if isinstance(escaneo, dict) else None
+    if not isinstance(escaneo, dict) or not escaneo.get('c'):
+        return {'n': n, 'r': 'invalido', 'm': 'Código QR no proporcionado'}
+    # Validar los tipos antes de decodificar el código o usarlo en la clave de la caché
+    charla_id = escaneo.get('ch')
+    if not isinstance(escaneo['c'], str) or not (
+            charla_id is None or (isinstance(charla_id, int) and not isinstance(charla_id, bool))):
+        return {'n': n, 'r': 'invalido', 'm': 'Formato de código QR inválido'}
+
+    # La respuesta se guarda en la caché sin el número de secuencia
+    clave_cache = clave_escaneo(estacion, escaneo['c'], escaneo.get('ch'))
+    if clave_cache:
+        respuesta = cache_escaneos.obtener(clave_cache)
+        if respuesta is not None:
+            return dict(respuesta, n=n)
+
+    respuesta = await resolver_escaneo(session, escaneo)
+    if respuesta['r'] not in ('invalido', 'error', 'charla_no_encontrada'):
+        guardar_escaneo(clave_cache, respuesta)
+    return dict(respuesta, n=n)
+
+
+async def resolver_escaneo(session, escaneo):
+    version, valor = decode_qr_payload(escaneo['c'], config['QR_SECRET_KEY'])
+    if version is None:
+        return {'r': 'invalido', 'm': 'Formato de código QR inválido'}
+
+    try:
+        if escaneo.get('ch') is None:
+            asistente = await resolver_asistente(session, version, valor)
+            if asistente and asistente.asistencia_confirmada:
+                datos = cache_datos.obtener(asistente.id, asistente.version)
+                if datos is not None:
+                    return {'r': 'ya_confirmada', 'a': datos, 'm': MENSAJE_YA_REGISTRADO}
+            estado, asistente, charlas = await escaneo_general(session, asistente)
+            if estado == 'no_encontrado':
+                return {'r': estado, 'm': 'No se encontró ningún asistente con este código QR'}
+            respuesta = {'r': estado, 'a': datos_asistente(asistente, completos=True)}
+            respuesta['a']['ch'] = [charla.nombre for charla in charlas]
+            if estado == 'ya_confirmada':
+                respuesta['m'] = MENSAJE_YA_REGISTRADO
+                cache_datos.guardar(asistente.id, asistente.version, respuesta['a'])
+            return respuesta
+
+        estado, asistente, charla = await escaneo_charla(session, version, valor, escaneo['ch'])
+        if estado != 'confirmada':
+            return {'r': estado, 'm': mensaje_charla(estado, asistente, charla)}
+        return {'r': estado, 'a': datos_asistente(asistente), 'cn': charla.nombre}
+    except Exception as e:
+        await session.rollback()
+        print(f"Error al procesar código QR (WebSocket): {str(e)}")
+        return {'r': 'error', 'm': f'Error al procesar código QR: {str(e)}'}
+
+
+def datos_asistente(asistente, completos=False):
+    """Campos del asistente que muestran las páginas de escaneo (versión compacta de to_dict)"""
+    datos = {
+        'id': asistente.id,
+        'nombres': asistente.nombres,
+        'empresa': asistente.empresa,
+        'dni': asistente.dni,
+        'cargo': asistente.cargo,
+    }
+    if completos:
+        datos['correo'] = asistente.correo
+        datos['numero'] = asistente.numero
+        datos['hora'] = asistente.fecha_asistencia.strftime('%d/%m/%Y %H:%M:%S') if asistente.fecha_asistencia else None
+    return datos
+
+
+async def metricas_cache_escaneos(request):
+    """Aciertos y fallos de la caché de escaneos repetidos y de fragmentos (de este proceso)"""
+    return JSONResponse(dict(cache_escaneos.metricas(), fragmentos=cache_fragmentos.metricas(),
+                             datos=cache_datos.metricas(), success=True))
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    yield
+    await engine.dispose()
+
+
+middleware = []
+if config['CHECKIN_CORS_ORIGENES']:
+    middleware.append(Middleware(CORSMiddleware, allow_origins=config['CHECKIN_CORS_ORIGENES'],
+                                 allow_methods=['GET', 'POST'], allow_headers=['Content-Type', 'X-Requested-With', 'X-Estacion']))
+
+app = Starlette(
+    routes=[
+        Route('/procesar-qr', procesar_qr, methods=['POST']),
+        Route('/asistente-info', asistente_info),
+        Route('/confirmar-charla/{charla_id:int}', confirmar_charla, methods=['POST']),
+        Route('/cache-escaneos', metricas_cache_escaneos),
+        WebSocketRoute('/ws/escaner', canal_escaner),
+    ],
+    middleware=middleware,
+    lifespan=ciclo_de_vida,
+)
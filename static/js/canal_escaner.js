@@ -0,0 +1,175 @@
+// Canal WebSocket de la estación de escaneo con el servicio de check-in asíncrono.
+//
+// Si la página define window.CHECKIN_WS_URL, cada escaneo viaja como un mensaje
+// compacto por una única conexión persistente (sin cabeceras ni cookies por
+// escaneo). Si no está configurado, o la conexión aún no está abierta, se usan
+// las peticiones HTTP de siempre. Ambas vías devuelven lo mismo, así que las
+// páginas no distinguen el transporte; un escaneo sin respuesta se rechaza con
+// TypeError, igual que un fetch sin red, para que pase a la cola offline.
+//
+// Cada estación se identifica con un ID guardado en localStorage, que el
+// servidor usa para responder desde memoria las lecturas repetidas del mismo QR.
+const CanalEscaner = (function() {
+    const TIEMPO_ESPERA = 5000; // 5 segundos
+    const REINTENTO_MAXIMO = 30000;
+    const ESTACION_KEY = 'qr_asistencia_estacion';
+    const estacion = idEstacion();
+    const url = resolverUrl(window.CHECKIN_WS_URL);
+    const pendientes = new Map(); // secuencia -> { resolver, rechazar, temporizador }
+    let socket = null;
+    let secuencia = 0;
+    let reintento = 1000;
+
+    function idEstacion() {
+        let id = localStorage.getItem(ESTACION_KEY);
+        if (!id) {
+            id = (window.crypto && crypto.randomUUID)
+                ? crypto.randomUUID()
+                : Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+            localStorage.setItem(ESTACION_KEY, id);
+        }
+        return id;
+    }
+
+    // Admite una URL completa (ws://, wss://) o una ruta en el mismo servidor (/ws/escaner)
+    function resolverUrl(valor) {
+        if (!valor) return null;
+        if (valor.startsWith('/')) {
+            valor = (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + valor;
+        }
+        return valor + (valor.includes('?') ? '&' : '?') + 'estacion=' + encodeURIComponent(estacion);
+    }
+
+    function conectar() {
+        if (!url || !window.WebSocket) return;
+        socket = new WebSocket(url);
+        socket.onopen = function() {
+            reintento = 1000;
+        };
+        socket.onmessage = function(evento) {
+            const respuesta = JSON.parse(evento.data);
+            const pendiente = pendientes.get(respuesta.n);
+            if (!pendiente) return;
+            pendientes.delete(respuesta.n);
+            clearTimeout(pendiente.temporizador);
+            pendiente.resolver(respuesta);
+        };
+        socket.onclose = function() {
+            socket = null;
+            pendientes.forEach(p => {
+                clearTimeout(p.temporizador);
+                p.rechazar(new TypeError('Canal de escaneo cerrado'));
+            });
+            pendientes.clear();
+            // Reconectar con espera creciente
+            setTimeout(conectar, reintento);
+            reintento = Math.min(reintento * 2, REINTENTO_MAXIMO);
+        };
+    }
+
+    function abierto() {
+        return socket !== null && socket.readyState === WebSocket.OPEN;
+    }
+
+    // Envía un escaneo por el canal; charlaId es null para la asistencia general al evento
+    function enviar(codigo, charlaId) {
+        return new Promise((resolver, rechazar) => {
+            const n = ++secuencia;
+            const mensaje = { n: n, c: codigo };
+            if (charlaId) mensaje.ch = Number(charlaId);
+            const temporizador = setTimeout(() => {
+                pendientes.delete(n);
+                rechazar(new TypeError('Sin respuesta del canal de escaneo'));
+            }, TIEMPO_ESPERA);
+            pendientes.set(n, { resolver: resolver, rechazar: rechazar, temporizador: temporizador });
+            socket.send(JSON.stringify(mensaje));
+        });
+    }
+
+    function escapar(texto) {
+        const div = document.createElement('div');
+        div.textContent = texto == null ? '' : String(texto);
+        return div.innerHTML;
+    }
+
+    // Mismo fragmento que devuelve /asistente-info para las peticiones AJAX
+    function fragmentoAsistente(respuesta) {
+        const a = respuesta.a;
+        const aviso = respuesta.r === 'ya_confirmada'
+            ? `<div class='alert alert-warning'><strong>¡Atención!</strong> ${escapar(respuesta.m)}</div>`
+            : "<div class='alert alert-success'><strong>¡Asistencia confirmada!</strong> Registro exitoso.</div>";
+        const charlas = a.ch.length
+            ? a.ch.map(nombre => `<div class='list-group-item mb-1'><strong>${escapar(nombre)}</strong></div>`).join('')
+            : "<p class='text-muted'>No hay charlas registradas para este asistente.</p>";
+        return `
+            <div class="text-center mb-3">
+                ${aviso}
+                ${a.hora ? `<p class='text-muted small'>Hora de registro: ${escapar(a.hora)}</p>` : ''}
+            </div>
+            <h4>${escapar(a.nombres)}</h4>
+            <hr>
+            <div class="mb-2"><strong>Empresa:</strong> ${escapar(a.empresa)}</div>
+            <div class="mb-2"><strong>DNI:</strong> ${escapar(a.dni)}</div>
+            <div class="mb-2"><strong>Cargo:</strong> ${escapar(a.cargo || 'No especificado')}</div>
+            <div class="mb-2"><strong>Correo:</strong> ${escapar(a.correo)}</div>
+            <div class="mb-2"><strong>Teléfono:</strong> ${escapar(a.numero || 'No especificado')}</div>
+            <div class="mt-3">
+                <h5>Charlas registradas:</h5>
+                ${charlas}
+            </div>
+        `;
+    }
+
+    // Escaneo de asistencia general: devuelve el fragmento HTML con la información del asistente
+    // (o null si el servidor redirigió la página)
+    function asistenteInfo(codigo) {
+        if (!abierto()) {
+            return fetch(`/asistente-info?codigo=${encodeURIComponent(codigo)}`, {
+                method: 'GET',
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest',
+                    'Accept': 'application/json',
+                    'X-Estacion': estacion
+                }
+            })
+            .then(response => {
+                // Si la respuesta es una redirección (no es AJAX), seguimos la redirección
+                if (response.redirected) {
+                    window.location.href = response.url;
+                    return null;
+                }
+                return response.text();
+            });
+        }
+        return enviar(codigo, null).then(respuesta => respuesta.a
+            ? fragmentoAsistente(respuesta)
+            : `<div class='alert alert-danger'>${escapar(respuesta.m)}</div>`);
+    }
+
+    // Escaneo en una charla: devuelve la misma respuesta JSON que /confirmar-charla/<id>
+    function confirmarCharla(codigo, charlaId) {
+        if (!abierto()) {
+            return fetch('/confirmar-charla/' + charlaId, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-Estacion': estacion
+                },
+                body: JSON.stringify({ codigo: codigo })
+            })
+            .then(response => response.json());
+        }
+        return enviar(codigo, charlaId).then(respuesta => respuesta.r === 'confirmada'
+            ? { success: true, asistente: respuesta.a, charla: { id: Number(charlaId), nombre: respuesta.cn } }
+            : { success: false, message: respuesta.m });
+    }
+
+    conectar();
+
+    return {
+        asistenteInfo: asistenteInfo,
+        confirmarCharla: confirmarCharla,
+        abierto: abierto,
+        estacion: estacion
+    };
+})();
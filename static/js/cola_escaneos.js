@@ -0,0 +1,95 @@
+// Cola local de escaneos para trabajar sin conexión.
+//
+// Cuando una petición de escaneo falla por la red, el código se guarda en
+// localStorage con una clave de idempotencia y la hora real del escaneo.
+// La cola se envía por lotes a /sincronizar-escaneos al recuperar la conexión;
+// el servidor descarta las claves ya recibidas, así que reenviar es seguro.
+const ColaEscaneos = (function() {
+    const STORAGE_KEY = 'qr_asistencia_cola_escaneos';
+    const TAMANO_LOTE = 200;
+    const INTERVALO_SINCRONIZACION = 15000; // 15 segundos
+    let sincronizando = false;
+
+    function leer() {
+        try {
+            return JSON.parse(localStorage.getItem(STORAGE_KEY)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function guardar(cola) {
+        localStorage.setItem(STORAGE_KEY, JSON.stringify(cola));
+        actualizarIndicador(cola.length);
+    }
+
+    function nuevaClave() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2, 12);
+    }
+
+    // Muestra el número de escaneos pendientes en el elemento #cola-pendientes (si existe)
+    function actualizarIndicador(pendientes) {
+        const indicador = document.getElementById('cola-pendientes');
+        if (!indicador) return;
+        indicador.textContent = `${pendientes} escaneo(s) pendiente(s) de sincronizar`;
+        indicador.style.display = pendientes > 0 ? '' : 'none';
+    }
+
+    // Guarda un escaneo en la cola. charlaId es null para la asistencia general al evento
+    function encolar(codigo, charlaId) {
+        const cola = leer();
+        cola.push({
+            clave: nuevaClave(),
+            codigo: codigo,
+            charla_id: charlaId || null,
+            escaneado_en: Date.now()
+        });
+        guardar(cola);
+    }
+
+    // Envía la cola al servidor por lotes; los escaneos solo se eliminan tras la confirmación
+    async function sincronizar() {
+        if (sincronizando || !navigator.onLine) return;
+        sincronizando = true;
+        try {
+            let cola = leer();
+            while (cola.length > 0) {
+                const lote = cola.slice(0, TAMANO_LOTE);
+                const response = await fetch('/sincronizar-escaneos', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ escaneos: lote })
+                });
+                const data = await response.json();
+                if (!data.success) {
+                    console.error('Error al sincronizar escaneos:', data.message);
+                    break;
+                }
+                const recibidas = new Set(data.resultados.map(r => r.clave));
+                // Releer la cola por si se encolaron escaneos durante el envío
+                cola = leer().filter(e => !recibidas.has(e.clave));
+                guardar(cola);
+            }
+        } catch (error) {
+            console.log('Sincronización pendiente, sin conexión:', error);
+        } finally {
+            sincronizando = false;
+        }
+    }
+
+    window.addEventListener('online', sincronizar);
+    setInterval(sincronizar, INTERVALO_SINCRONIZACION);
+    document.addEventListener('DOMContentLoaded', function() {
+        actualizarIndicador(leer().length);
+        sincronizar();
+    });
+
+    return {
+        encolar: encolar,
+        sincronizar: sincronizar,
+        pendientes: function() { return leer().length; }
+    };
+})();
@@ -0,0 +1,149 @@
+// Filtro local de códigos QR válidos (filtro de Bloom publicado en /api/filtro-qr).
+//
+// Permite descartar en el navegador, sin ir al servidor, las lecturas que no
+// pueden ser de ningún asistente (basura decodificada por la cámara, QR ajenos
+// al evento o, en una charla, de personas no inscritas). El filtro se guarda en
+// localStorage y se actualiza periódicamente pidiendo solo los bits nuevos. Si
+// aún no hay filtro, todo código se considera posible. Un código rechazado
+// fuerza una actualización (como mucho cada pocos segundos) para no rechazar a
+// un asistente recién registrado: la siguiente lectura de la cámara ya lo acepta.
+// Sin conexión, o si el servidor no confirmó hace poco que el filtro está al día
+// (p. ej. el guardado en localStorage al recargar la página), un código ausente
+// no se rechaza: lo decide el servidor o, sin red, pasa a la cola offline.
+const FiltroQR = (function() {
+    const STORAGE_PREFIX = 'qr_asistencia_filtro_';
+    const INTERVALO_ACTUALIZACION = 60000; // 1 minuto
+    const ESPERA_MINIMA = 5000; // entre actualizaciones forzadas por un rechazo
+    const VIGENCIA = 2 * INTERVALO_ACTUALIZACION; // desde la última respuesta del servidor
+    const FNV_PRIMO = 16777619;
+    const FNV_BASE = 2166136261;
+    const FNV_BASE_2 = 0x5BD1E995;
+    const QR_V2 = /^QA2[0-9A-Z]{1,13}\.[A-Z2-7]{8}$/;
+    const codificador = new TextEncoder();
+    let charlaId = null;
+    let filtro = null; // { version, m, k, bits: Uint8Array }
+    let actualizando = false;
+    let ultimaActualizacion = 0;
+    let verificadoEn = 0; // última vez que el servidor confirmó la versión del filtro
+
+    function storageKey() {
+        return STORAGE_PREFIX + (charlaId || 'general');
+    }
+
+    function fnv1a(datos, base) {
+        let h = base;
+        for (let i = 0; i < datos.length; i++) {
+            h ^= datos[i];
+            h = Math.imul(h, FNV_PRIMO) >>> 0;
+        }
+        return h;
+    }
+
+    // Mismas posiciones que filtro_qr.posiciones en el servidor (doble hash h1 + i * h2)
+    function contiene(elemento) {
+        const datos = codificador.encode(elemento);
+        const h1 = fnv1a(datos, FNV_BASE);
+        const h2 = (fnv1a(datos, FNV_BASE_2) | 1) >>> 0;
+        for (let i = 0; i < filtro.k; i++) {
+            const posicion = ((h1 + Math.imul(i, h2)) >>> 0) % filtro.m;
+            if (!(filtro.bits[posicion >> 3] & (1 << (posicion & 7)))) return false;
+        }
+        return true;
+    }
+
+    function decodificarBits(base64) {
+        const binario = atob(base64);
+        const bits = new Uint8Array(binario.length);
+        for (let i = 0; i < binario.length; i++) bits[i] = binario.charCodeAt(i);
+        return bits;
+    }
+
+    function codificarBits(bits) {
+        let binario = '';
+        for (let i = 0; i < bits.length; i += 8192) {
+            binario += String.fromCharCode.apply(null, bits.subarray(i, i + 8192));
+        }
+        return btoa(binario);
+    }
+
+    function guardar() {
+        try {
+            localStorage.setItem(storageKey(), JSON.stringify({
+                version: filtro.version, m: filtro.m, k: filtro.k, bits: codificarBits(filtro.bits)
+            }));
+        } catch (e) {
+            // Sin espacio en localStorage: el filtro sigue disponible en memoria
+        }
+    }
+
+    function leerGuardado() {
+        try {
+            const guardado = JSON.parse(localStorage.getItem(storageKey()));
+            if (guardado) {
+                filtro = { version: guardado.version, m: guardado.m, k: guardado.k, bits: decodificarBits(guardado.bits) };
+            }
+        } catch (e) {
+            filtro = null;
+        }
+    }
+
+    async function actualizar() {
+        if (actualizando || !navigator.onLine) return;
+        actualizando = true;
+        ultimaActualizacion = Date.now();
+        try {
+            const params = new URLSearchParams();
+            if (charlaId) params.set('charla', charlaId);
+            if (filtro) params.set('version', filtro.version);
+            const response = await fetch('/api/filtro-qr?' + params.toString());
+            const data = await response.json();
+            if (!data.success) return;
+            verificadoEn = Date.now();
+            if (data.bits !== undefined) {
+                filtro = { version: data.version, m: data.m, k: data.k, bits: decodificarBits(data.bits) };
+            } else if (data.version !== filtro.version) {
+                data.delta.forEach(posicion => { filtro.bits[posicion >> 3] |= 1 << (posicion & 7); });
+                filtro.version = data.version;
+            } else {
+                return;
+            }
+            guardar();
+        } catch (error) {
+            console.log('No se pudo actualizar el filtro de códigos QR:', error);
+        } finally {
+            actualizando = false;
+        }
+    }
+
+    // Inicia el filtro de la página; charla es null para la asistencia general al evento
+    function iniciar(charla) {
+        charlaId = charla || null;
+        leerGuardado();
+        actualizar();
+        setInterval(actualizar, INTERVALO_ACTUALIZACION);
+    }
+
+    // false solo si el código seguro no corresponde a ningún asistente del filtro vigente
+    function posible(codigo) {
+        if (!filtro || !codigo) return true;
+        let elemento;
+        if (QR_V2.test(codigo)) {
+            elemento = codigo;
+        } else if (codigo.length >= 17) {
+            // Formato heredado: la clave son los 15 primeros caracteres
+            elemento = codigo.slice(0, 15);
+        } else {
+            return false;
+        }
+        if (contiene(elemento)) return true;
+        if (Date.now() - ultimaActualizacion > ESPERA_MINIMA) actualizar();
+        // Un filtro que pudo quedar atrasado no basta para rechazar a un asistente
+        return !navigator.onLine || Date.now() - verificadoEn > VIGENCIA;
+    }
+
+    return {
+        iniciar: iniciar,
+        posible: posible,
+        actualizar: actualizar
+    };
+})();
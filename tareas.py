@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ColaTareas:
+    """
+    Ejecuta tareas en segundo plano (fuera del hilo de la petición) sobre un
+    pool de hilos compartido. Cada tarea corre dentro de un contexto de la
+    aplicación Flask para poder usar db.session.
+    """
+
+    def __init__(self, max_workers=2):
+        self._ejecutor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tarea')
+        self.app = None
+
+    def init_app(self, app):
+        self.app = app
+
+    def enviar(self, funcion, *args, **kwargs):
+        """Encola funcion(*args, **kwargs) y devuelve su Future"""
+        app = self.app
+
+        def ejecutar():
+            with app.app_context():
+                try:
+                    return funcion(*args, **kwargs)
+                except Exception as e:
+                    print(f"Error en tarea en segundo plano {funcion.__name__}: {str(e)}")
+                    raise
+
+        return self._ejecutor.submit(ejecutar)
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# La aplicación se configura al importarse: usar una base de datos y un
+# directorio de exportaciones temporales antes de importar app
+DIRECTORIO_PRUEBAS = tempfile.mkdtemp(prefix='qr_asistencia_pruebas_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DIRECTORIO_PRUEBAS, 'pruebas.db')
+os.environ['EXPORT_DIR'] = os.path.join(DIRECTORIO_PRUEBAS, 'exportaciones')
+os.environ['SECRET_KEY'] = 'clave-de-pruebas'
+# Sin el hilo de sondeo de eventos: las pruebas llaman a eventos.sondear() directamente
+os.environ['EVENTOS_INTERVALO_SONDEO'] = '0'
+os.environ.pop('QR_SECRET_KEY', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_modulo  # noqa: E402
+from app import db  # noqa: E402
+from cache_escaneos import CacheEscaneos, CacheFragmentos  # noqa: E402
+from models import Asistente, Charla  # noqa: E402
+
+
+@pytest.fixture
+def app(monkeypatch):
+    flask_app = app_modulo.app
+    flask_app.config['TESTING'] = True
+    # Estado en memoria del proceso: cada prueba empieza con cachés e índice vacíos
+    monkeypatch.setattr(app_modulo, 'cache_escaneos', CacheEscaneos())
+    monkeypatch.setattr(app_modulo, 'cache_fragmentos', CacheFragmentos())
+    monkeypatch.setattr(app_modulo.indice_qr, '_ids_por_clave', {})
+    monkeypatch.setattr(app_modulo.indice_qr, '_clave_por_id', {})
+    monkeypatch.setattr(app_modulo.indice_qr, '_cargado', False)
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        app_modulo.contadores.invalidar()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def crear_asistente(app):
+    """Crea y guarda un asistente con valores por defecto para los campos no indicados"""
+    contador = {'n': 0}
+
+    def crear(**campos):
+        contador['n'] += 1
+        n = contador['n']
+        datos = {
+            'nombres': f'Asistente {n}',
+            'empresa': 'Empresa',
+            'cargo': 'Cargo',
+            'correo': f'asistente{n}@example.com',
+            'numero': '999000111',
+            'dni': f'{n:08d}',
+        }
+        datos.update(campos)
+        asistente = Asistente(**datos)
+        db.session.add(asistente)
+        db.session.commit()
+        return asistente
+
+    return crear
+
+
+@pytest.fixture
+def crear_charla(app):
+    def crear(nombre='Charla de prueba', inscritos=()):
+        charla = Charla(nombre=nombre)
+        charla.asistentes.extend(inscritos)
+        db.session.add(charla)
+        db.session.commit()
+        return charla
+
+    return crear
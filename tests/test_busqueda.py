@@ -0,0 +1,79 @@
+import io
+
+import pytest
+from sqlalchemy import event
+
+from app import buscar_asistentes_pagina
+from importacion import importar_asistentes
+from models import db, texto_busqueda
+
+
+def nombres(busqueda):
+    filas, _ = buscar_asistentes_pagina(busqueda)
+    return sorted(f.nombres for f in filas)
+
+
+def test_texto_busqueda():
+    assert texto_busqueda('Ángel Ñuñez') == 'angel nunez'
+    assert texto_busqueda('ÉLITE S.A.C.') == 'elite s.a.c.'
+    assert texto_busqueda(None) == ''
+
+
+@pytest.mark.parametrize('busqueda', ['Ángel', 'ángel', 'ANGEL', 'angel', 'Áng'])
+def test_nombres_con_mayuscula_acentuada(crear_asistente, busqueda):
+    crear_asistente(nombres='Ángel Ñuñez')
+    crear_asistente(nombres='Andrea Paz')
+    assert nombres(busqueda) == ['Ángel Ñuñez']
+
+
+def test_empresa_con_enie(crear_asistente):
+    crear_asistente(nombres='Luis', empresa='Ñandú Laboratorios')
+    crear_asistente(nombres='Rosa', empresa='Nativa')
+    assert nombres('ñan') == ['Luis']
+    assert nombres('Ñandú') == ['Luis']
+
+
+def test_busqueda_por_dni(crear_asistente):
+    crear_asistente(nombres='Óscar', dni='44556677')
+    assert nombres('4455') == ['Óscar']
+
+
+def test_edicion_actualiza_columnas_de_busqueda(crear_asistente):
+    asistente = crear_asistente(nombres='Elena')
+    asistente.nombres = 'Úrsula'
+    db.session.commit()
+    assert nombres('urs') == ['Úrsula']
+    assert nombres('ele') == []
+
+
+def test_api_asistentes(client, crear_asistente):
+    crear_asistente(nombres='Íñigo Ruiz')
+    datos = client.get('/api/asistentes', query_string={'q': 'iñi'}).get_json()
+    assert [a['nombres'] for a in datos['asistentes']] == ['Íñigo Ruiz']
+
+
+def test_importacion_completa_columnas_de_busqueda(app):
+    archivo = io.BytesIO('nombres,empresa,correo,dni\nÁlvaro Díaz,Óptica Sur,a@example.com,123\n'.encode('utf-8'))
+    importar_asistentes(archivo, 'a.csv')
+    assert nombres('alv') == ['Álvaro Díaz']
+    assert nombres('opt') == ['Álvaro Díaz']
+
+
+
+@pytest.mark.parametrize('dialecto, con_expresion', [('sqlite', True), ('postgresql', False), ('mysql', False)])
+def test_orden_por_expresion_solo_en_sqlite(app, crear_asistente, monkeypatch, dialecto, con_expresion):
+    crear_asistente(nombres='Ana')
+    sentencias = []
+
+    def registrar(conn, cursor, sql, *args):
+        sentencias.append(sql)
+
+    monkeypatch.setattr(db.engine.dialect, 'name', dialecto)
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        filas, _ = buscar_asistentes_pagina('a')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    assert [f.nombres for f in filas] == ['Ana']
+    # En los demás motores el ORDER BY id puede resolverse con el índice y detenerse en el LIMIT
+    assert ('asistente.id + ' in sentencias[-1]) == con_expresion
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+import app as app_modulo
+import asistencias
+from contadores import CONFIRMADOS, ASISTENCIAS, clave_charla
+from models import db, Asistente
+from utils import build_qr_payload
+
+
+def codigo(app, asistente):
+    return build_qr_payload(asistente.id, app.config['QR_SECRET_KEY'])
+
+
+def contador(clave):
+    app_modulo.contadores.invalidar()
+    return app_modulo.contadores.leer(db.session).get(clave, 0)
+
+
+def test_confirmar_general_es_condicional(app, crear_asistente):
+    asistente = crear_asistente()
+    assert asistencias.confirmar_general(db.session, asistente.id, datetime.now()) == 1
+    assert asistencias.confirmar_general(db.session, asistente.id, datetime.now()) == 0
+
+
+def test_confirmar_charla_es_condicional(app, crear_asistente, crear_charla):
+    asistente = crear_asistente()
+    inscrita = crear_charla(inscritos=[asistente])
+    otra = crear_charla('Otra')
+    assert asistencias.confirmar(db.session, asistente.id, inscrita.id, datetime.now()) == 1
+    assert asistencias.confirmar(db.session, asistente.id, inscrita.id, datetime.now()) == 0
+    # Sin inscripción no se afecta ninguna fila
+    assert asistencias.confirmar(db.session, asistente.id, otra.id, datetime.now()) == 0
+
+
+def test_lote_general_repetido_cuenta_una_vez(app, client, crear_asistente):
+    asistente = crear_asistente()
+    fecha = datetime.now()
+    escaneos = [{'codigo': codigo(app, asistente), 'charla_id': None, 'fecha': fecha}] * 2
+    resultados = app_modulo.registrar_escaneos(escaneos)
+    db.session.commit()
+
+    assert [r['ya_registrado'] for r in resultados] == [False, True]
+    assert contador(CONFIRMADOS) == 1
+
+
+def test_lote_general_con_confirmacion_concurrente(app, crear_asistente, monkeypatch):
+    asistente = crear_asistente()
+    resolver = app_modulo.resolver_asistentes_lote
+
+    def resolver_y_confirmar_en_paralelo(codigos):
+        # Otra estación confirma después de que este lote leyó al asistente
+        asistentes = resolver(codigos)
+        db.session.execute(text("UPDATE asistente SET asistencia_confirmada = 1, fecha_asistencia = :f "
+                                "WHERE id = :id"), {'f': datetime(2025, 5, 1, 9, 30), 'id': asistente.id})
+        return asistentes
+
+    monkeypatch.setattr(app_modulo, 'resolver_asistentes_lote', resolver_y_confirmar_en_paralelo)
+    resultados = app_modulo.registrar_escaneos(
+        [{'codigo': codigo(app, asistente), 'charla_id': None, 'fecha': datetime.now()}])
+    db.session.commit()
+
+    assert resultados[0]['ya_registrado'] is True
+    assert resultados[0]['asistente']['fecha_asistencia'].startswith('2025-05-01T09:30')
+    assert contador(CONFIRMADOS) == 0
+
+
+def test_lote_charla_con_confirmacion_concurrente(app, crear_asistente, crear_charla, monkeypatch):
+    asistente = crear_asistente()
+    charla = crear_charla(inscritos=[asistente])
+    estados = asistencias.estados
+
+    def estados_y_confirmar_en_paralelo(session, asistente_ids, charla_ids):
+        # Otra estación confirma después de que este lote leyó las inscripciones
+        resultado = estados(session, asistente_ids, charla_ids)
+        asistencias.confirmar(session, asistente.id, charla.id, datetime.now())
+        return resultado
+
+    monkeypatch.setattr(asistencias, 'estados', estados_y_confirmar_en_paralelo)
+    resultados = app_modulo.registrar_escaneos(
+        [{'codigo': codigo(app, asistente), 'charla_id': charla.id, 'fecha': datetime.now()}])
+    db.session.commit()
+
+    assert resultados[0]['success'] is False
+    assert contador(ASISTENCIAS) == 0
+    assert contador(clave_charla(charla.id)) == 0
+
+
+def test_lote_charla_por_endpoint(app, client, crear_asistente, crear_charla):
+    inscrito = crear_asistente()
+    no_inscrito = crear_asistente()
+    charla = crear_charla(inscritos=[inscrito])
+    codigos = [codigo(app, inscrito), codigo(app, inscrito), codigo(app, no_inscrito)]
+
+    datos = client.post(f'/confirmar-charla/{charla.id}/lote', json={'codigos': codigos}).get_json()
+    assert [r['success'] for r in datos['resultados']] == [True, False, False]
+    assert contador(ASISTENCIAS) == 1
+    assert contador(clave_charla(charla.id)) == 1
+
+    # Reenviar el lote no vuelve a contar
+    client.post(f'/confirmar-charla/{charla.id}/lote', json={'codigos': codigos})
+    assert contador(ASISTENCIAS) == 1
+
+
+def test_sincronizar_con_claves_distintas_del_mismo_asistente(app, client, crear_asistente):
+    asistente = crear_asistente()
+    escaneos = [{'clave': f'clave-{n}', 'codigo': codigo(app, asistente), 'charla_id': None} for n in range(2)]
+    for escaneo in escaneos:
+        client.post('/sincronizar-escaneos', json={'escaneos': [escaneo]})
+    assert contador(CONFIRMADOS) == 1
+    assert db.session.get(Asistente, asistente.id).asistencia_confirmada
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+import app as app_modulo
+from contadores import sentencia_upsert
+from models import db, Contador
+
+
+def test_incrementar_crea_y_suma(app):
+    app_modulo.contadores.incrementar(db.session, 'charla:99:asistieron')
+    app_modulo.contadores.incrementar(db.session, 'charla:99:asistieron', 2)
+    db.session.commit()
+    assert db.session.get(Contador, 'charla:99:asistieron').valor == 3
+
+
+@pytest.mark.parametrize('dialecto, clausula', [
+    (postgresql.dialect(), 'ON CONFLICT (clave) DO UPDATE'),
+    (sqlite.dialect(), 'ON CONFLICT (clave) DO UPDATE'),
+    (mysql.dialect(), 'ON DUPLICATE KEY UPDATE'),
+], ids=lambda d: getattr(d, 'name', ''))
+def test_upsert_en_una_sola_sentencia(dialecto, clausula):
+    # Sin la pareja UPDATE + INSERT, dos transacciones que crean el mismo contador no chocan
+    sql = str(sentencia_upsert(dialecto.name, 'charlas', 1).compile(dialect=dialecto))
+    assert sql.startswith('INSERT INTO contador')
+    assert clausula in sql
@@ -0,0 +1,99 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+import app as app_modulo
+import escritura_diferida
+from contadores import CONFIRMADOS
+from escritura_diferida import BufferCheckins
+from models import db, Asistente
+
+
+@pytest.fixture
+def directorio_log(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHECKIN_DIFERIDO', True)
+    monkeypatch.setitem(app.config, 'CHECKIN_LOG_DIR', str(tmp_path))
+    return str(tmp_path)
+
+
+def log_huerfano(directorio, operaciones, nombre='checkins-1-muerto'):
+    """Log y .lock de un proceso terminado (nadie mantiene bloqueado el .lock)"""
+    with open(os.path.join(directorio, nombre + '.log'), 'w', encoding='utf-8') as f:
+        for operacion in operaciones:
+            f.write(json.dumps(operacion) + '\n')
+        f.write('{"clave": "incompleta"')  # Línea cortada por la caída
+    open(os.path.join(directorio, nombre + '.lock'), 'w').close()
+
+
+def operacion_general(asistente):
+    return {'clave': f'general:{asistente.id}', 'asistente': asistente.to_dict(),
+            'charla_id': None, 'fecha': datetime(2025, 5, 1, 9, 0).isoformat()}
+
+
+def esperar(condicion, limite=5):
+    fin = time.monotonic() + limite
+    while not condicion():
+        assert time.monotonic() < fin, 'tiempo de espera agotado'
+        time.sleep(0.01)
+
+
+def test_recupera_log_huerfano_y_lo_aplica(app, directorio_log, crear_asistente):
+    asistente = crear_asistente()
+    log_huerfano(directorio_log, [operacion_general(asistente)])
+
+    buffer = BufferCheckins()
+    buffer.init_app(app)
+    assert buffer.pendiente(f'general:{asistente.id}')
+    # El log y el .lock del proceso terminado desaparecen una vez incorporados a la cola
+    assert not os.path.exists(os.path.join(directorio_log, 'checkins-1-muerto.log'))
+    assert not os.path.exists(os.path.join(directorio_log, 'checkins-1-muerto.lock'))
+
+    buffer.aplicador(app_modulo.aplicar_checkins)
+    esperar(lambda: not buffer.pendiente(f'general:{asistente.id}'))
+    db.session.expire_all()
+    assert db.session.get(Asistente, asistente.id).asistencia_confirmada
+    buffer._cerrar()
+
+
+def test_reaplicar_un_checkin_guardado_no_tiene_efecto(app, crear_asistente):
+    asistente = crear_asistente()
+    lote = [dict(operacion_general(asistente))]
+    app_modulo.aplicar_checkins(lote)
+    # Recuperación tras una caída posterior al commit: el mismo check-in otra vez
+    app_modulo.aplicar_checkins(lote)
+
+    app_modulo.contadores.invalidar()
+    assert app_modulo.contadores.leer(db.session)[CONFIRMADOS] == 1
+
+
+def test_dos_procesos_recuperan_una_sola_vez(app, directorio_log, crear_asistente, monkeypatch):
+    asistente = crear_asistente()
+    log_huerfano(directorio_log, [operacion_general(asistente)])
+    visto = os.path.join(directorio_log, 'checkins-1-muerto.lock')
+
+    primero = BufferCheckins()
+    primero.init_app(app)
+
+    # El segundo proceso listó el directorio antes de que el primero terminara la recuperación
+    glob_original = escritura_diferida.glob.glob
+    monkeypatch.setattr(escritura_diferida.glob, 'glob', lambda patron: glob_original(patron) + [visto])
+    segundo = BufferCheckins()
+    segundo.init_app(app)
+
+    assert primero.pendiente(f'general:{asistente.id}')
+    assert not segundo.pendiente(f'general:{asistente.id}')
+
+
+def test_no_recupera_logs_de_procesos_vivos(app, directorio_log, crear_asistente):
+    vivo = BufferCheckins()
+    vivo.init_app(app)
+    asistente = crear_asistente()
+    assert vivo.encolar(f'general:{asistente.id}', operacion_general(asistente))
+
+    otro = BufferCheckins()
+    otro.init_app(app)
+    assert not otro.pendiente(f'general:{asistente.id}')
+    assert os.path.exists(vivo._ruta_log)
@@ -0,0 +1,133 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import app as app_modulo
+import eventos
+from models import db, EventoAsistencia
+from utils import build_qr_payload
+
+servicio_async = pytest.importorskip('servicio_async')
+
+
+def mensajes(suscriptor):
+    cola, _ = suscriptor
+    recibidos = []
+    while not cola.empty():
+        linea = cola.get_nowait().split('\n')[1]
+        recibidos.append(json.loads(linea[len('data: '):]))
+    return recibidos
+
+
+@pytest.fixture
+def suscriptor(app):
+    suscriptor = app_modulo.eventos.suscribir()
+    # Tomar la posición actual de la tabla, como al abrirse el primer panel
+    app_modulo.eventos._difundidas = None
+    app_modulo.eventos.sondear()
+    yield suscriptor
+    app_modulo.eventos.cancelar(suscriptor)
+
+
+def test_checkin_del_servicio_async_llega_a_los_paneles(app, suscriptor, crear_asistente, crear_charla):
+    asistente = crear_asistente(nombres='Ana Pérez')
+    charla = crear_charla(inscritos=[asistente])
+
+    # Las mismas funciones que el servicio ejecuta con run_sync, en la transacción de la confirmación
+    assert servicio_async.confirmar_general(db.session, asistente, datetime.now())
+    assert servicio_async.confirmar_charla_sync(db.session, asistente, charla.id, datetime.now()) == 'confirmada'
+    db.session.commit()
+
+    assert app_modulo.eventos.sondear() == 2
+    general, en_charla = mensajes(suscriptor)
+    assert general['tipo'] == 'general'
+    assert general['asistente']['nombres'] == 'Ana Pérez'
+    assert general['contadores']['confirmados'] == 1
+    assert en_charla['charla_id'] == charla.id
+    assert en_charla['contadores']['charla'] == 1
+
+    # Cada fila se difunde una sola vez
+    assert app_modulo.eventos.sondear() == 0
+
+
+def test_checkin_de_otro_worker_flask_llega_a_los_paneles(app, client, suscriptor, crear_asistente, crear_charla):
+    asistente = crear_asistente()
+    charla = crear_charla(inscritos=[asistente])
+    codigo = build_qr_payload(asistente.id, app.config['QR_SECRET_KEY'])
+
+    client.post(f'/confirmar-charla/{charla.id}/lote', json={'codigos': [codigo, codigo]})
+    client.get('/asistente-info', query_string={'codigo': codigo})
+
+    # Las filas anotadas por cualquier worker se difunden desde la tabla, no solo en el proceso que confirmó
+    assert app_modulo.eventos.sondear() == 2
+    difundidos = mensajes(suscriptor)
+    assert [(m['tipo'], m['charla_id']) for m in difundidos] == [('charla', charla.id), ('general', None)]
+    assert difundidos[1]['contadores']['confirmados'] == 1
+
+
+def test_primer_sondeo_no_repite_asistencias_anteriores(app, crear_asistente):
+    asistente = crear_asistente()
+    eventos.registrar_asistencias(db.session, [(asistente.to_dict(), None, datetime.now())])
+    db.session.commit()
+
+    suscriptor = app_modulo.eventos.suscribir()
+    try:
+        app_modulo.eventos._difundidas = None
+        assert app_modulo.eventos.sondear() == 0
+        assert app_modulo.eventos.sondear() == 0
+        assert mensajes(suscriptor) == []
+    finally:
+        app_modulo.eventos.cancelar(suscriptor)
+
+
+def evento(asistente, id=None, registrado=None):
+    return EventoAsistencia(id=id, asistente_id=asistente.id, nombres=asistente.nombres,
+                            empresa=asistente.empresa, fecha=datetime.now(),
+                            registrado=registrado or datetime.now())
+
+
+def test_fila_con_id_menor_confirmada_tarde_se_difunde(app, suscriptor, crear_asistente):
+    primero, segundo = crear_asistente(), crear_asistente()
+    db.session.add(evento(segundo, id=2))
+    db.session.commit()
+    assert app_modulo.eventos.sondear() == 1
+
+    # Otra transacción que obtuvo el ID 1 hace commit después de leerse el 2
+    db.session.add(evento(primero, id=1))
+    db.session.commit()
+    assert app_modulo.eventos.sondear() == 1
+    assert app_modulo.eventos.sondear() == 0
+
+    difundidos = [m['asistente']['id'] for m in mensajes(suscriptor)]
+    assert difundidos == [segundo.id, primero.id]
+
+
+def test_purgar_elimina_eventos_antiguos(app, crear_asistente):
+    asistente = crear_asistente()
+    db.session.add(evento(asistente, registrado=datetime(2020, 1, 1)))
+    # Un escaneo offline antiguo recién sincronizado se conserva: cuenta su registro
+    eventos.registrar_asistencias(db.session, [(asistente.to_dict(), None, datetime(2020, 1, 1))])
+    db.session.commit()
+
+    app_modulo.eventos.purgar()
+    assert EventoAsistencia.query.count() == 1
+
+
+def test_servicio_async_usa_la_cache_de_fragmentos(app, monkeypatch, crear_asistente):
+    from starlette.testclient import TestClient
+    from cache_escaneos import CacheFragmentos
+
+    cache = CacheFragmentos()
+    monkeypatch.setattr(servicio_async, 'cache_fragmentos', cache)
+    asistente = crear_asistente()
+    codigo = build_qr_payload(asistente.id, app.config['QR_SECRET_KEY'])
+
+    with TestClient(servicio_async.app) as cliente:
+        for _ in range(3):
+            respuesta = cliente.get('/asistente-info', params={'codigo': codigo})
+            assert asistente.nombres in respuesta.text
+
+    # Confirmación, registro ya guardado (se almacena) y acierto
+    assert cache.aciertos == 1
+    assert EventoAsistencia.query.count() == 1
@@ -0,0 +1,82 @@
+import fcntl
+import json
+import os
+import time
+
+import pytest
+from flask import Flask
+
+from exportaciones import GestorExportaciones
+
+TRABAJO_ID = 'a' * 32
+
+
+@pytest.fixture
+def gestor(tmp_path):
+    app = Flask(__name__)
+    app.config['EXPORT_DIR'] = str(tmp_path)
+    gestor = GestorExportaciones()
+    gestor.init_app(app)
+    return gestor
+
+
+def escribir_trabajo(directorio, proceso, estado='en_proceso'):
+    with open(os.path.join(directorio, TRABAJO_ID + '.json'), 'w', encoding='utf-8') as f:
+        json.dump({'id': TRABAJO_ID, 'tipo': 'registros', 'proceso': proceso, 'estado': estado,
+                   'nombre_archivo': 'x.xlsx', 'creado': None, 'terminado': None, 'error': None}, f)
+
+
+def test_trabajo_de_proceso_terminado_pasa_a_error(gestor):
+    escribir_trabajo(gestor.directorio, 'proceso-que-ya-no-existe')
+    trabajo = gestor.estado(TRABAJO_ID)
+    assert trabajo['estado'] == 'error'
+    assert trabajo['terminado'] is not None
+
+
+def test_trabajo_de_proceso_vivo_sigue_en_curso(gestor):
+    # Otro proceso vivo: mantiene bloqueado su archivo .lock
+    with open(os.path.join(gestor.directorio, 'proceso-otro.lock'), 'w') as bloqueo:
+        fcntl.flock(bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        escribir_trabajo(gestor.directorio, 'otro')
+        assert gestor.estado(TRABAJO_ID)['estado'] == 'en_proceso'
+
+
+def test_al_arrancar_cierra_huerfanos_y_borra_bloqueos(tmp_path):
+    escribir_trabajo(str(tmp_path), 'anterior', estado='pendiente')
+    open(os.path.join(str(tmp_path), 'proceso-anterior.lock'), 'w').close()
+
+    app = Flask(__name__)
+    app.config['EXPORT_DIR'] = str(tmp_path)
+    gestor = GestorExportaciones()
+    gestor.init_app(app)
+
+    assert not os.path.exists(os.path.join(str(tmp_path), 'proceso-anterior.lock'))
+    with open(os.path.join(str(tmp_path), TRABAJO_ID + '.json'), encoding='utf-8') as f:
+        assert json.load(f)['estado'] == 'error'
+
+
+def test_consultar_elimina_archivos_vencidos(gestor):
+    viejo = os.path.join(gestor.directorio, 'b' * 32 + '.xlsx')
+    open(viejo, 'wb').close()
+    hace_dos_horas = time.time() - 7200
+    os.utime(viejo, (hace_dos_horas, hace_dos_horas))
+    os.utime(gestor._ruta_bloqueo(gestor.proceso), (hace_dos_horas, hace_dos_horas))
+    gestor.intervalo_purga = 0
+
+    gestor.estado(TRABAJO_ID)
+    assert not os.path.exists(viejo)
+    # El bloqueo del propio proceso no se elimina aunque sea antiguo
+    assert os.path.exists(gestor._ruta_bloqueo(gestor.proceso))
+
+
+def test_descarga_de_archivo_eliminado_redirige(app, client, monkeypatch):
+    import app as app_modulo
+
+    # El estado se leyó como completado, pero la limpieza eliminó el archivo antes de enviarlo
+    monkeypatch.setattr(app_modulo.exportaciones, 'estado',
+                        lambda trabajo_id: {'estado': 'completado', 'nombre_archivo': 'x.xlsx'})
+    respuesta = client.get(f'/admin/exportaciones/{TRABAJO_ID}/descargar')
+
+    assert respuesta.status_code == 302
+    with client.session_transaction() as sesion:
+        assert any('expiró' in mensaje for _, mensaje in sesion['_flashes'])
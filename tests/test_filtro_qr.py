@@ -0,0 +1,153 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from filtro_qr import FiltroBloom, fnv1a, posiciones
+from utils import build_qr_payload
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'js', 'filtro_qr.js')
+CLAVE = 'clave-de-pruebas'
+
+requiere_node = pytest.mark.skipif(shutil.which('node') is None, reason='Node.js no está instalado')
+
+
+# Vector fijo: elemento -> posiciones con m=9973 y k=7. Ambos hashes superan 2**31,
+# de modo que también cubre el desbordamiento de h1 + i * h2 en JavaScript
+M, K = 9973, 7
+VECTOR = {
+    'QA2K9.MFRGGZDF': [2722, 2010, 1298, 586, 9847, 9135, 8423],  # Código v2
+    'abcdef012345678': [8349, 870, 8248, 5653, 8147, 5552, 8046],  # Clave heredada
+}
+
+
+def ejecutar_js(escenario, respuesta_filtro=None, guardado=None):
+    """
+    Carga static/js/filtro_qr.js en Node con un navegador simulado y ejecuta el
+    escenario (código de una función async); devuelve lo que este retorne.
+    """
+    preludio = f"""
+    Object.defineProperty(globalThis, 'navigator', {{value: {{onLine: true}}, writable: true, configurable: true}});
+    const almacen = {json.dumps(guardado or {})};
+    globalThis.localStorage = {{
+        getItem: clave => clave in almacen ? almacen[clave] : null,
+        setItem: (clave, valor) => {{ almacen[clave] = valor; }}
+    }};
+    const respuestaFiltro = {json.dumps(respuesta_filtro)};
+    globalThis.fetch = async () => {{
+        if (respuestaFiltro === null) throw new TypeError('Failed to fetch');
+        return {{json: async () => respuestaFiltro}};
+    }};
+    globalThis.setInterval = () => 0;
+    const esperar = () => new Promise(resolver => setImmediate(resolver));
+    """
+    with open(SCRIPT, encoding='utf-8') as f:
+        fuente = f.read()
+    programa = (preludio + fuente + f"\n(async () => {{ {escenario} }})()"
+                ".then(r => console.log(JSON.stringify(r)));\n")
+    salida = subprocess.run(['node', '-'], input=programa, capture_output=True, text=True,
+                            timeout=30, check=True)
+    # La última línea es el resultado; las anteriores, mensajes de consola del script
+    return json.loads(salida.stdout.splitlines()[-1])
+
+
+def filtro_de(*codigos):
+    filtro = FiltroBloom(16, 0.001, 'prueba')
+    for codigo in codigos:
+        filtro.agregar(codigo)
+    return filtro
+
+
+def ausente(filtro, asistente_id):
+    codigo = build_qr_payload(asistente_id, CLAVE)
+    assert not all(filtro.bits[p >> 3] & (1 << (p & 7)) for p in posiciones(codigo, filtro.m, filtro.k))
+    return codigo
+
+
+@requiere_node
+def test_rechaza_solo_con_conexion_y_filtro_verificado():
+    valido = build_qr_payload(1, CLAVE)
+    filtro = filtro_de(valido)
+    desconocido = ausente(filtro, 2)
+
+    resultado = ejecutar_js(f"""
+        FiltroQR.iniciar(null);
+        await esperar();
+        const r = {{valido: FiltroQR.posible({json.dumps(valido)}),
+                   enLinea: FiltroQR.posible({json.dumps(desconocido)})}};
+        navigator.onLine = false;
+        r.sinConexion = FiltroQR.posible({json.dumps(desconocido)});
+        return r;
+    """, respuesta_filtro=dict(filtro.a_dict(), success=True))
+
+    # Sin conexión el código pasa a la cola offline en lugar de rechazarse
+    assert resultado == {'valido': True, 'enLinea': False, 'sinConexion': True}
+
+
+@requiere_node
+def test_filtro_guardado_sin_verificar_no_rechaza():
+    filtro = filtro_de(build_qr_payload(1, CLAVE))
+    desconocido = ausente(filtro, 2)
+    guardado = {'qr_asistencia_filtro_general': json.dumps(filtro.a_dict())}
+
+    # El servidor no responde: el filtro de localStorage puede no incluir registros recientes
+    resultado = ejecutar_js(f"""
+        FiltroQR.iniciar(null);
+        await esperar();
+        return FiltroQR.posible({json.dumps(desconocido)});
+    """, guardado=guardado)
+
+    assert resultado is True
+
+
+def test_fnv1a_valores_de_referencia():
+    assert fnv1a(b'') == 0x811C9DC5
+    assert fnv1a(b'a') == 0xE40C292C
+    assert fnv1a(b'foobar') == 0xBF9CF968
+
+
+@pytest.mark.parametrize('elemento', VECTOR)
+def test_posiciones_python(elemento):
+    assert posiciones(elemento, M, K) == VECTOR[elemento]
+
+
+@requiere_node
+@pytest.mark.parametrize('elemento', VECTOR)
+def test_posiciones_javascript(elemento):
+    # Un filtro con solo los bits del vector: el script acepta el elemento si calcula
+    # exactamente esas posiciones, y lo rechaza si falta cualquiera de ellas
+    codigo = elemento if elemento.startswith('QA2') else elemento + 'zz'
+    filtros = []
+    for omitida in [None] + VECTOR[elemento]:
+        bits = bytearray((M + 7) // 8)
+        for posicion in VECTOR[elemento]:
+            if posicion != omitida:
+                bits[posicion >> 3] |= 1 << (posicion & 7)
+        filtros.append(base64.b64encode(bytes(bits)).decode('ascii'))
+
+    resultado = ejecutar_js(f"""
+        const r = [];
+        for (const bits of {json.dumps(filtros)}) {{
+            localStorage.setItem('qr_asistencia_filtro_general', JSON.stringify({{version: 'v', m: {M}, k: {K}, bits: bits}}));
+            FiltroQR.iniciar(null);
+            await esperar();
+            r.push(FiltroQR.posible({json.dumps(codigo)}));
+        }}
+        return r;
+    """, respuesta_filtro={'success': True, 'version': 'v', 'delta': []})
+
+    assert resultado == [True] + [False] * K
+
+
+def test_huella_no_revela_un_hash_de_la_clave(app, client):
+    version = client.get('/api/filtro-qr').get_json()['version']
+    secreto = app.config['QR_SECRET_KEY'].encode()
+    assert version.split('-')[0] == hmac.new(secreto, b'filtro-qr', hashlib.sha256).hexdigest()[:8]
+    assert hashlib.sha256(secreto).hexdigest()[:8] not in version
+    # La clave de los QR no es la de las sesiones de Flask
+    assert app.config['QR_SECRET_KEY'] != app.config['SECRET_KEY']
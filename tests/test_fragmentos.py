@@ -0,0 +1,58 @@
+import app as app_modulo
+from utils import build_qr_payload
+
+AJAX = {'X-Requested-With': 'XMLHttpRequest'}
+
+
+def escanear(app, client, asistente):
+    codigo = build_qr_payload(asistente.id, app.config['QR_SECRET_KEY'])
+    return client.get('/asistente-info', query_string={'codigo': codigo}, headers=AJAX).get_data(as_text=True)
+
+
+def test_fragmento_de_asistente_registrado_se_reutiliza(app, client, crear_asistente, crear_charla):
+    asistente = crear_asistente()
+    crear_charla('Charla de apertura', inscritos=[asistente])
+
+    escanear(app, client, asistente)  # Confirma la asistencia: no se guarda en caché
+    escanear(app, client, asistente)  # Ya registrado: se guarda
+    assert 'Charla de apertura' in escanear(app, client, asistente)
+
+    assert app_modulo.cache_fragmentos.aciertos == 1
+
+
+def test_renombrar_charla_invalida_fragmento(app, client, crear_asistente, crear_charla):
+    asistente = crear_asistente()
+    charla = crear_charla('Charla de apertura', inscritos=[asistente])
+    escanear(app, client, asistente)
+    assert 'Charla de apertura' in escanear(app, client, asistente)
+
+    client.post(f'/admin/charlas/editar/{charla.id}', data={'nombre': 'Charla renombrada', 'descripcion': ''})
+
+    fragmento = escanear(app, client, asistente)
+    assert 'Charla renombrada' in fragmento
+    assert 'Charla de apertura' not in fragmento
+    assert app_modulo.cache_fragmentos.aciertos == 0
+
+
+def test_editar_charla_sin_renombrar_conserva_fragmento(app, client, crear_asistente, crear_charla):
+    asistente = crear_asistente()
+    charla = crear_charla('Charla de apertura', inscritos=[asistente])
+    escanear(app, client, asistente)
+    escanear(app, client, asistente)
+
+    client.post(f'/admin/charlas/editar/{charla.id}', data={'nombre': 'Charla de apertura', 'descripcion': 'Nueva'})
+
+    assert 'Charla de apertura' in escanear(app, client, asistente)
+    assert app_modulo.cache_fragmentos.aciertos == 1
+
+
+def test_eliminar_charla_invalida_fragmento(app, client, crear_asistente, crear_charla):
+    asistente = crear_asistente()
+    charla = crear_charla('Charla de apertura', inscritos=[asistente])
+    escanear(app, client, asistente)
+    assert 'Charla de apertura' in escanear(app, client, asistente)
+
+    client.post(f'/admin/charlas/eliminar/{charla.id}')
+
+    assert 'Charla de apertura' not in escanear(app, client, asistente)
+    assert app_modulo.cache_fragmentos.aciertos == 0
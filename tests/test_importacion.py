@@ -0,0 +1,57 @@
+import io
+
+import importacion
+from importacion import importar_asistentes
+from models import db, Asistente
+
+
+def archivo_csv(filas):
+    lineas = ['nombres,empresa,correo,dni,charlas'] + [','.join(f) for f in filas]
+    return io.BytesIO('\n'.join(lineas).encode('utf-8'))
+
+
+def filas_validas(n, charla=''):
+    return [(f'Persona {i}', 'Acme', f'p{i}@example.com', f'{70000000 + i}', charla) for i in range(n)]
+
+
+def test_importa_con_inscripciones(app, crear_charla):
+    charla = crear_charla('Charla de Olympus')
+    reporte = importar_asistentes(archivo_csv(filas_validas(5, 'Charla de Olympus')), 'a.csv', tamano_lote=2)
+
+    assert reporte['aceptados'] == 5
+    assert reporte['rechazados'] == [] and reporte['error'] is None
+    for asistente_id, qr_key in reporte['nuevos']:
+        asistente = db.session.get(Asistente, asistente_id)
+        assert asistente.qr_key == qr_key
+        assert [c.id for c in asistente.charlas_rel] == [charla.id]
+
+
+def test_sin_returning_recupera_ids_por_dni(app, monkeypatch):
+    # Como en MySQL/MariaDB, que no admiten RETURNING en inserciones múltiples
+    monkeypatch.setattr(db.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', False)
+    reporte = importar_asistentes(archivo_csv(filas_validas(3)), 'a.csv')
+
+    assert reporte['aceptados'] == 3
+    for asistente_id, _ in reporte['nuevos']:
+        assert db.session.get(Asistente, asistente_id).dni in {f'{70000000 + i}' for i in range(3)}
+    assert [db.session.get(Asistente, i).nombres for i, _ in reporte['nuevos']] == [
+        'Persona 0', 'Persona 1', 'Persona 2']
+
+
+def test_lote_fallido_no_afecta_a_los_demas(app, monkeypatch):
+    insertar = importacion._insertar_lote
+    llamadas = []
+
+    def insertar_con_fallo(lote, reporte, contadores):
+        llamadas.append(len(lote))
+        if len(llamadas) == 2:
+            raise RuntimeError('conexión perdida')
+        return insertar(lote, reporte, contadores)
+
+    monkeypatch.setattr(importacion, '_insertar_lote', insertar_con_fallo)
+    reporte = importar_asistentes(archivo_csv(filas_validas(5)), 'a.csv', tamano_lote=2)
+
+    assert reporte['aceptados'] == 3
+    assert [r['fila'] for r in reporte['rechazados']] == [4, 5]
+    assert 'conexión perdida' in reporte['rechazados'][0]['motivo']
+    assert Asistente.query.count() == 3
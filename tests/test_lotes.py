@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.mark.parametrize('ruta', ['/procesar-qr/lote', '/confirmar-charla/1/lote', '/sincronizar-escaneos'])
+@pytest.mark.parametrize('cuerpo', [['QA21.AAAAAAAA'], 'QA21.AAAAAAAA', 3, None])
+def test_cuerpo_que_no_es_objeto(client, ruta, cuerpo):
+    respuesta = client.post(ruta, json=cuerpo)
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['success'] is False
+
+
+def test_lote_demasiado_grande(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'QR_LOTE_MAX', 2)
+    respuesta = client.post('/procesar-qr/lote', json={'codigos': ['a', 'b', 'c']})
+    assert respuesta.status_code == 400
+    assert respuesta.get_json()['success'] is False
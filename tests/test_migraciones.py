@@ -0,0 +1,35 @@
+import importlib.util
+import os
+from unittest import mock
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+VERSIONES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations', 'versions')
+
+
+def sentencias_upgrade(nombre):
+    """Ejecuta upgrade() de una migración con op simulado y devuelve las sentencias de op.execute"""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(VERSIONES, nombre + '.py'))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    sentencias = []
+    with mock.patch.object(modulo, 'op') as op:
+        op.create_table.side_effect = lambda nombre_tabla, *columnas: sa.Table(nombre_tabla, sa.MetaData(), *columnas)
+        op.execute.side_effect = sentencias.append
+        modulo.upgrade()
+    return sentencias
+
+
+@pytest.mark.parametrize('dialecto', [postgresql.dialect(), mysql.dialect(), sqlite.dialect()],
+                         ids=lambda d: d.name)
+def test_inicializacion_de_contadores_portable(dialecto):
+    sql = [str(s.compile(dialect=dialecto)) for s in sentencias_upgrade('d51b8e2f0a46_agregar_tabla_contador')]
+    assert len(sql) == 5
+    if dialecto.name == 'postgresql':
+        # PostgreSQL no compara boolean con integer
+        assert all('= 1' not in s for s in sql)
+    if dialecto.name == 'mysql':
+        # En MySQL || es el OR lógico, no una concatenación
+        assert all('||' not in s for s in sql)
@@ -0,0 +1,36 @@
+import os
+
+import app as app_modulo
+from models import db, Asistente
+
+
+def test_regenerar_sin_archivos_no_escribe_imagenes(app, crear_asistente, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'QR_GUARDAR_ARCHIVOS', False)
+    anterior = tmp_path / 'anterior.png'
+    anterior.write_bytes(b'png')
+    asistente = crear_asistente(codigoQR=str(anterior))
+    version = asistente.version
+
+    def no_generar(*args, **kwargs):
+        raise AssertionError('No deben generarse imágenes sin QR_GUARDAR_ARCHIVOS')
+
+    monkeypatch.setattr(app_modulo, 'generate_qr_codes_batch', no_generar)
+    assert app_modulo.regenerar_codigos_qr(workers=1) == 1
+
+    db.session.expire_all()
+    asistente = db.session.get(Asistente, asistente.id)
+    assert asistente.codigoQR is None
+    assert asistente.version == version + 1
+    assert not os.path.exists(anterior)
+
+
+def test_regenerar_con_archivos(app, crear_asistente, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, 'QR_GUARDAR_ARCHIVOS', True)
+    monkeypatch.setattr(app_modulo, 'generate_qr_codes_batch',
+                        lambda items, workers=None, progress=None: (
+                            (asistente_id, str(tmp_path / f'{asistente_id}.png')) for asistente_id, _ in items))
+    asistente = crear_asistente()
+    assert app_modulo.regenerar_codigos_qr(workers=1) == 1
+
+    db.session.expire_all()
+    assert db.session.get(Asistente, asistente.id).codigoQR == str(tmp_path / f'{asistente.id}.png')
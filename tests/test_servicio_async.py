@@ -0,0 +1,29 @@
+import pytest
+
+from utils import build_qr_payload
+
+servicio_async = pytest.importorskip('servicio_async')
+
+
+@pytest.mark.parametrize('escaneo', [
+    {'n': 1, 'c': 123},
+    {'n': 1, 'c': ['QA21.AAAAAAAA']},
+    {'n': 1, 'c': {'a': 1}},
+    {'n': 1, 'c': 'QA21.AAAAAAAA', 'ch': [1]},
+    {'n': 1, 'c': 'QA21.AAAAAAAA', 'ch': '1'},
+])
+def test_canal_responde_invalido_sin_cerrar_la_conexion(app, crear_asistente, escaneo):
+    from starlette.testclient import TestClient
+
+    asistente = crear_asistente()
+    codigo = build_qr_payload(asistente.id, app.config['QR_SECRET_KEY'])
+
+    with TestClient(servicio_async.app) as cliente:
+        with cliente.websocket_connect('/ws/escaner?estacion=prueba') as ws:
+            ws.send_json(escaneo)
+            assert ws.receive_json() == {'n': 1, 'r': 'invalido', 'm': 'Formato de código QR inválido'}
+            # El mismo canal sigue atendiendo escaneos válidos
+            ws.send_json({'n': 2, 'c': codigo})
+            respuesta = ws.receive_json()
+    assert respuesta['n'] == 2
+    assert respuesta['r'] == 'confirmada'
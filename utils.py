@@ -1,23 +1,128 @@
 import qrcode
+import qrcode.image.svg
 import os
+import re
+import hmac
+import hashlib
+import base64
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
+import xlsxwriter
 import numpy as np
 import matplotlib.pyplot as plt
 from io import BytesIO
 from datetime import datetime
+from functools import lru_cache
 
-def generate_qr_code(data, id):
+# Formato v2 del QR: "QA2" + ID en base 36 + "." + firma HMAC truncada.
+# Solo usa caracteres del modo alfanumérico de QR (mayúsculas, dígitos y ".")
+QR_V2_PREFIX = "QA2"
+QR_V2_REGEX = re.compile(r"^QA2([0-9A-Z]{1,13})\.([A-Z2-7]{8})$")
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+def _to_base36(numero):
+    if numero == 0:
+        return "0"
+    digitos = []
+    while numero:
+        numero, resto = divmod(numero, 36)
+        digitos.append(_BASE36[resto])
+    return "".join(reversed(digitos))
+
+def _qr_signature(id36, secret):
+    digest = hmac.new(secret.encode(), f"{QR_V2_PREFIX}{id36}".encode(), hashlib.sha256).digest()
+    return base64.b32encode(digest).decode()[:8]
+
+def build_qr_payload(asistente_id, secret):
     """
-    Generate a QR code with the provided data
+    Genera el contenido de un QR en formato v2 para un asistente
     
     Args:
-        data (str): Data to encode in QR code
-        id (int): ID to use in filename
+        asistente_id (int): ID del asistente
+        secret (str): Clave usada para firmar el código
         
     Returns:
-        str: Path to saved QR code image
+        str: Contenido compacto del QR, p. ej. "QA21Z.K3JD7QXA"
+    """
+    id36 = _to_base36(asistente_id)
+    return f"{QR_V2_PREFIX}{id36}.{_qr_signature(id36, secret)}"
+
+def decode_qr_payload(codigo, secret):
+    """
+    Identifica la versión de un código QR escaneado y extrae su contenido
+    
+    Args:
+        codigo (str): Texto leído del QR
+        secret (str): Clave usada para verificar la firma de los códigos v2
+        
+    Returns:
+        tuple: ('v2', id del asistente), ('v1', clave de 15 caracteres)
+               o (None, None) si el código no es válido
+    """
+    if not codigo:
+        return None, None
+    
+    coincidencia = QR_V2_REGEX.match(codigo)
+    if coincidencia:
+        id36, firma = coincidencia.groups()
+        if not hmac.compare_digest(firma, _qr_signature(id36, secret)):
+            return None, None
+        return 'v2', int(id36, 36)
+    
+    # Formato heredado: 5 fragmentos de 3 caracteres + "01"
+    if len(codigo) < 17:
+        return None, None
+    return 'v1', codigo[:15]
+
+def render_asistente_fragment(asistente, charlas, ya_registrado, mensaje_registro):
+    """
+    Fragmento HTML con la información del asistente que las páginas de escaneo
+    insertan tras leer un QR (respuesta AJAX de /asistente-info)
+    
+    Args:
+        asistente: Objeto con los campos del modelo Asistente
+        charlas (list): Diccionarios con al menos la clave 'nombre'
+        ya_registrado (bool): Si la asistencia ya estaba confirmada antes del escaneo
+        mensaje_registro (str): Aviso que se muestra cuando ya_registrado es True
+        
+    Returns:
+        str: Fragmento HTML
     """
+    return f"""
+            <div class="text-center mb-3">
+                {"<div class='alert alert-warning'><strong>¡Atención!</strong> " + mensaje_registro + "</div>" 
+                 if ya_registrado else 
+                 "<div class='alert alert-success'><strong>¡Asistencia confirmada!</strong> Registro exitoso.</div>"}
+                
+                {"<p class='text-muted small'>Hora de registro: " + asistente.fecha_asistencia.strftime('%d/%m/%Y %H:%M:%S') + "</p>"
+                 if asistente.fecha_asistencia else ""}
+            </div>
+            
+            <h4>{asistente.nombres}</h4>
+            <hr>
+            
+            <div class="mb-2"><strong>Empresa:</strong> {asistente.empresa}</div>
+            <div class="mb-2"><strong>DNI:</strong> {asistente.dni}</div>
+            <div class="mb-2"><strong>Cargo:</strong> {asistente.cargo or 'No especificado'}</div>
+            <div class="mb-2"><strong>Correo:</strong> {asistente.correo}</div>
+            <div class="mb-2"><strong>Teléfono:</strong> {asistente.numero or 'No especificado'}</div>
+            
+            <div class="mt-3">
+                <h5>Charlas registradas:</h5>
+                {"".join([
+                    f"<div class='list-group-item mb-1'><strong>{charla['nombre']}</strong></div>"
+                    for charla in charlas
+                ]) if charlas else "<p class='text-muted'>No hay charlas registradas para este asistente.</p>"}
+            </div>
+            """
+
+QR_DIRECTORY = 'static/qrcodes'
+
+# Number of rendered images kept in memory by render_qr_bytes
+QR_RENDER_CACHE_SIZE = int(os.environ.get('QR_RENDER_CACHE_SIZE', 2048))
+
+def _make_qr(data):
     # Create QR code instance
     qr = qrcode.QRCode(
         version=1,
@@ -29,95 +134,203 @@ def generate_qr_code(data, id):
     # Add data to QR code
     qr.add_data(data)
     qr.make(fit=True)
+    return qr
+
+@lru_cache(maxsize=QR_RENDER_CACHE_SIZE)
+def render_qr_bytes(data, fmt='png'):
+    """
+    Render a QR code in memory, keeping the most recently used images cached
     
+    Args:
+        data (str): Data to encode in QR code
+        fmt (str): 'png' or 'svg'
+        
+    Returns:
+        bytes: Encoded image
+    """
+    qr = _make_qr(data)
+    if fmt == 'svg':
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+    
+    buffer = BytesIO()
+    img.save(buffer)
+    return buffer.getvalue()
+
+def generate_qr_code(data, id, directory=QR_DIRECTORY):
+    """
+    Generate a QR code with the provided data
+    
+    Args:
+        data (str): Data to encode in QR code
+        id (int): ID to use in filename
+        directory (str): Directory where the image is saved
+        
+    Returns:
+        str: Path to saved QR code image
+    """
     # Create an image from the QR Code
-    img = qr.make_image(fill_color="black", back_color="white")
+    img = _make_qr(data).make_image(fill_color="black", back_color="white")
     
     # Create directory for QR codes if it doesn't exist
-    os.makedirs('static/qrcodes', exist_ok=True)
+    os.makedirs(directory, exist_ok=True)
     
     # Generate filename with timestamp to avoid duplicates
     timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
     filename = f"qr_{id}_{timestamp}.png"
-    filepath = os.path.join('static/qrcodes', filename)
+    filepath = os.path.join(directory, filename)
     
-    # Save QR code image
-    img.save(filepath)
+    # Save to a temporary file and rename it, so a partially written image is never visible
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            img.save(temp_file)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        os.remove(temp_path)
+        raise
     
     return filepath
 
+def _generate_qr_code_item(item, directory):
+    # Runs in a worker process: must be a top-level function so it can be pickled
+    id, data = item
+    return id, generate_qr_code(data, id, directory)
+
+def generate_qr_codes_batch(items, workers=None, directory=QR_DIRECTORY, progress=None):
+    """
+    Generate many QR codes in parallel using a process pool
+    
+    Items are consumed lazily, keeping only a bounded window of pending jobs,
+    so arbitrarily large iterables can be processed with constant memory.
+    With workers=1 the codes are generated in the current process.
+    
+    Args:
+        items (iterable): (id, data) pairs to encode
+        workers (int): Number of worker processes (defaults to the CPU count)
+        directory (str): Directory where the images are saved
+        progress (callable): Called with the number of codes generated so far
+        
+    Yields:
+        tuple: (id, path to saved QR code image), in completion order
+    """
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    os.makedirs(directory, exist_ok=True)
+    
+    if workers == 1:
+        for item in items:
+            result = _generate_qr_code_item(item, directory)
+            done += 1
+            if progress:
+                progress(done)
+            yield result
+        return
+    
+    window = workers * 32
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        items = iter(items)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(_generate_qr_code_item, item, directory))
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done += 1
+                if progress:
+                    progress(done)
+                yield future.result()
+
+# Columnas de la exportación de registros
+REGISTROS_COLUMNAS = ['ID', 'Nombres', 'Empresa', 'DNI', 'Cargo', 'Correo', 'Teléfono',
+                      'Fecha Registro', 'Asistencia Confirmada', 'Fecha Asistencia']
+
 def export_registros_excel(asistentes):
     """
     Genera un archivo Excel con todos los asistentes registrados
     
+    Las filas se escriben a medida que se leen (modo constant_memory de
+    xlsxwriter) y el ancho de cada columna se calcula de forma incremental,
+    por lo que el consumo de memoria no depende del número de asistentes.
+    
     Args:
-        asistentes (list): Lista de objetos Asistente
+        asistentes (iterable): Objetos Asistente o filas con los mismos atributos,
+                               idealmente leídos por bloques (yield_per)
         
     Returns:
         str: Ruta al archivo Excel temporal
     """
-    # Crear DataFrame con los datos de todos los asistentes
-    data = []
-    for asistente in asistentes:
-        data.append({
-            'ID': asistente.id,
-            'Nombres': asistente.nombres,
-            'Empresa': asistente.empresa,
-            'DNI': asistente.dni,
-            'Cargo': asistente.cargo,
-            'Correo': asistente.correo,
-            'Teléfono': asistente.numero,
-            'Fecha Registro': asistente.fecha_registro.strftime('%d/%m/%Y %H:%M') if asistente.fecha_registro else "",
-            'Asistencia Confirmada': 'Sí' if asistente.asistencia_confirmada else 'No',
-            'Fecha Asistencia': asistente.fecha_asistencia.strftime('%d/%m/%Y %H:%M') if asistente.fecha_asistencia else ""
-        })
-    
-    # Crear DataFrame para exportar a Excel
-    df = pd.DataFrame(data)
-    
     # Crear archivo temporal
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
     temp_file.close()
     
-    # Exportar a Excel con formato
-    with pd.ExcelWriter(temp_file.name, engine='xlsxwriter') as writer:
-        df.to_excel(writer, sheet_name='Registros', index=False)
-        
-        # Obtener el libro y la hoja
-        workbook = writer.book
-        worksheet = writer.sheets['Registros']
-        
-        # Formatos
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-        
-        # Aplicar formato a encabezados
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            
-        # Auto ajustar columnas
-        for i, col in enumerate(df.columns):
-            column_width = max(df[col].astype(str).map(len).max(), len(col) + 2)
-            worksheet.set_column(i, i, column_width)
+    workbook = xlsxwriter.Workbook(temp_file.name, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Registros')
+    
+    # Formatos
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4F81BD',
+        'font_color': 'white',
+        'border': 1,
+        'align': 'center',
+        'valign': 'vcenter'
+    })
+    
+    # Aplicar formato a encabezados
+    worksheet.write_row(0, 0, REGISTROS_COLUMNAS, header_format)
+    anchos = [len(col) + 2 for col in REGISTROS_COLUMNAS]
+    
+    for row_num, asistente in enumerate(asistentes, start=1):
+        fila = [
+            asistente.id,
+            asistente.nombres,
+            asistente.empresa,
+            asistente.dni,
+            asistente.cargo,
+            asistente.correo,
+            asistente.numero,
+            asistente.fecha_registro.strftime('%d/%m/%Y %H:%M') if asistente.fecha_registro else "",
+            'Sí' if asistente.asistencia_confirmada else 'No',
+            asistente.fecha_asistencia.strftime('%d/%m/%Y %H:%M') if asistente.fecha_asistencia else ""
+        ]
+        worksheet.write_row(row_num, 0, fila)
+        
+        # Auto ajustar columnas sin volver a recorrer los datos
+        for i, valor in enumerate(fila):
+            if valor is not None:
+                anchos[i] = max(anchos[i], len(str(valor)))
+    
+    for i, ancho in enumerate(anchos):
+        worksheet.set_column(i, i, ancho)
+    
+    workbook.close()
     
     return temp_file.name
 
-def export_asistentes_excel(asistentes, charlas, asistencia_por_charla):
+ASISTENTES_COLUMNAS = ['ID', 'Nombres', 'Empresa', 'DNI', 'Cargo', 'Correo', 'Teléfono', 'Fecha Asistencia']
+
+def export_asistentes_excel(filas, charlas):
     """
     Genera un archivo Excel con asistentes confirmados,
     con una hoja principal y hojas adicionales para cada charla
     
+    Las filas provienen de una sola consulta (asistentes confirmados unidos a
+    sus asistencias por charla) y se agrupan en una pasada: cada asistente se
+    escribe una vez en la hoja principal y se agrega a las charlas que asistió.
+    
     Args:
-        asistentes (list): Lista de asistentes que confirmaron asistencia general
+        filas (iterable): Filas con los atributos del asistente y charla_id (None si no
+                          asistió a ninguna charla), ordenadas por ID de asistente
         charlas (list): Lista de todas las charlas
-        asistencia_por_charla (dict): Diccionario con listas de IDs de asistentes que confirmaron
-                                     asistencia a cada charla específica
         
     Returns:
         str: Ruta al archivo Excel temporal
@@ -126,145 +339,103 @@ def export_asistentes_excel(asistentes, charlas, asistencia_por_charla):
     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
     temp_file.close()
     
-    # Crear DataFrame para la hoja principal
-    data_principal = []
-    for asistente in asistentes:
-        data_principal.append({
-            'ID': asistente.id,
-            'Nombres': asistente.nombres,
-            'Empresa': asistente.empresa,
-            'DNI': asistente.dni,
-            'Cargo': asistente.cargo or 'No especificado',
-            'Correo': asistente.correo,
-            'Teléfono': asistente.numero or 'No especificado',
-            'Fecha Asistencia': asistente.fecha_asistencia.strftime('%d/%m/%Y %H:%M') if asistente.fecha_asistencia else ""
-        })
+    workbook = xlsxwriter.Workbook(temp_file.name, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Asistentes')
     
-    # Crear Excel con pandas y xlsxwriter
-    with pd.ExcelWriter(temp_file.name, engine='xlsxwriter') as writer:
-        # Hoja principal de asistentes generales
-        df_principal = pd.DataFrame(data_principal)
-        df_principal.to_excel(writer, sheet_name='Asistentes', index=False)
-        
-        # Formato para hoja principal
-        workbook = writer.book
-        worksheet = writer.sheets['Asistentes']
-        
-        # Formato de encabezado
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#4F81BD',
-            'font_color': 'white',
-            'border': 1,
-            'align': 'center',
-            'valign': 'vcenter'
-        })
-        
-        # Aplicar formato a encabezados
-        for col_num, value in enumerate(df_principal.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-            
-        # Auto ajustar columnas
-        for i, col in enumerate(df_principal.columns):
-            column_width = max(df_principal[col].astype(str).map(len).max(), len(col) + 2)
-            worksheet.set_column(i, i, column_width)
-        
-        # Crear una hoja para cada charla
-        for charla in charlas:
-            # Obtener los IDs de los asistentes que confirmaron asistencia a esta charla específica
-            asistentes_ids = asistencia_por_charla.get(charla.id, [])
-            
-            if not asistentes_ids:
-                # Si no hay asistentes confirmados para esta charla, continuar con la siguiente
-                continue
-            
-            # Recolectar los datos de los asistentes que asistieron a esta charla
-            asistentes_charla = []
-            for asistente in asistentes:
-                # Solo incluir si el asistente confirmó asistencia específica a esta charla
-                if asistente.id in asistentes_ids:
-                    asistentes_charla.append({
-                        'ID': asistente.id,
-                        'Nombres': asistente.nombres,
-                        'Empresa': asistente.empresa,
-                        'DNI': asistente.dni,
-                        'Cargo': asistente.cargo or 'No especificado',
-                        'Correo': asistente.correo,
-                        'Teléfono': asistente.numero or 'No especificado'
-                    })
-            
-            # Crear DataFrame para esta charla
-            df_charla = pd.DataFrame(asistentes_charla)
-            
-            # Si hay asistentes, crear la hoja
-            if not df_charla.empty:
-                # Nombre de la hoja limitado a 31 caracteres (límite de Excel)
-                nombre_hoja = f"Charla {charla.id}"
-                if len(charla.nombre) <= 25:
-                    nombre_hoja = charla.nombre[:25]
-                
-                df_charla.to_excel(writer, sheet_name=nombre_hoja, index=False)
-                
-                # Formato para esta hoja
-                worksheet_charla = writer.sheets[nombre_hoja]
-                
-                # Título de la charla
-                title_format = workbook.add_format({
-                    'bold': True,
-                    'font_size': 14,
-                    'align': 'center'
-                })
-                
-                # Insertar fila para título
-                worksheet_charla.merge_range('A1:G1', charla.nombre, title_format)
-                
-                # Descripción de la charla
-                desc_format = workbook.add_format({
-                    'italic': True,
-                    'align': 'center'
-                })
-                
-                # Insertar descripción y fecha
-                if charla.descripcion:
-                    worksheet_charla.merge_range('A2:G2', charla.descripcion, desc_format)
-                
-                fecha_str = charla.fecha.strftime('%d/%m/%Y %H:%M') if charla.fecha else "Sin fecha"
-                worksheet_charla.merge_range('A3:G3', f"Fecha: {fecha_str}", desc_format)
-                
-                # Aplicar formato a encabezados (desplazados por las filas de título)
-                header_format_charla = workbook.add_format({
-                    'bold': True,
-                    'bg_color': '#4F81BD',
-                    'font_color': 'white',
-                    'border': 1,
-                    'align': 'center',
-                    'valign': 'vcenter'
-                })
-                
-                for col_num, value in enumerate(df_charla.columns.values):
-                    worksheet_charla.write(3, col_num, value, header_format_charla)
-                
-                # Escribir datos desde la fila 4 (después de título, descripción y encabezados)
-                for row_num, row_data in enumerate(df_charla.values):
-                    for col_num, cell_data in enumerate(row_data):
-                        worksheet_charla.write(row_num + 4, col_num, cell_data)
-                
-                # Auto ajustar columnas
-                for i, col in enumerate(df_charla.columns):
-                    column_width = max(df_charla[col].astype(str).map(len).max(), len(col) + 2)
-                    worksheet_charla.set_column(i, i, column_width)
+    # Formatos
+    header_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#4F81BD',
+        'font_color': 'white',
+        'border': 1,
+        'align': 'center',
+        'valign': 'vcenter'
+    })
+    title_format = workbook.add_format({
+        'bold': True,
+        'font_size': 14,
+        'align': 'center'
+    })
+    desc_format = workbook.add_format({
+        'italic': True,
+        'align': 'center'
+    })
+    
+    # Hoja principal: una fila por asistente; las filas de cada charla se agrupan por su ID
+    worksheet.write_row(0, 0, ASISTENTES_COLUMNAS, header_format)
+    anchos = [len(col) + 2 for col in ASISTENTES_COLUMNAS]
+    filas_por_charla = {}
+    ultimo_id = None
+    row_num = 0
+    
+    for asistente in filas:
+        fila = [
+            asistente.id,
+            asistente.nombres,
+            asistente.empresa,
+            asistente.dni,
+            asistente.cargo or 'No especificado',
+            asistente.correo,
+            asistente.numero or 'No especificado',
+        ]
+        
+        if asistente.id != ultimo_id:
+            ultimo_id = asistente.id
+            row_num += 1
+            fecha = asistente.fecha_asistencia.strftime('%d/%m/%Y %H:%M') if asistente.fecha_asistencia else ""
+            worksheet.write_row(row_num, 0, fila + [fecha])
+            for i, valor in enumerate(fila + [fecha]):
+                anchos[i] = max(anchos[i], len(str(valor)))
+        
+        if asistente.charla_id is not None:
+            filas_por_charla.setdefault(asistente.charla_id, []).append(fila)
+    
+    for i, ancho in enumerate(anchos):
+        worksheet.set_column(i, i, ancho)
+    
+    # Crear una hoja para cada charla con asistentes confirmados
+    columnas_charla = ASISTENTES_COLUMNAS[:-1]
+    for charla in charlas:
+        asistentes_charla = filas_por_charla.get(charla.id)
+        if not asistentes_charla:
+            # Si no hay asistentes confirmados para esta charla, continuar con la siguiente
+            continue
+        
+        # Nombre de la hoja limitado a 31 caracteres (límite de Excel)
+        nombre_hoja = f"Charla {charla.id}"
+        if len(charla.nombre) <= 25:
+            nombre_hoja = charla.nombre[:25]
+        worksheet_charla = workbook.add_worksheet(nombre_hoja)
+        
+        # Título, descripción y fecha de la charla
+        worksheet_charla.merge_range('A1:G1', charla.nombre, title_format)
+        if charla.descripcion:
+            worksheet_charla.merge_range('A2:G2', charla.descripcion, desc_format)
+        fecha_str = charla.fecha.strftime('%d/%m/%Y %H:%M') if charla.fecha else "Sin fecha"
+        worksheet_charla.merge_range('A3:G3', f"Fecha: {fecha_str}", desc_format)
+        
+        # Encabezados y datos desde la fila 4 (después de título, descripción y fecha)
+        worksheet_charla.write_row(3, 0, columnas_charla, header_format)
+        anchos = [len(col) + 2 for col in columnas_charla]
+        for row_num, fila in enumerate(asistentes_charla, start=4):
+            worksheet_charla.write_row(row_num, 0, fila)
+            for i, valor in enumerate(fila):
+                anchos[i] = max(anchos[i], len(str(valor)))
+        
+        for i, ancho in enumerate(anchos):
+            worksheet_charla.set_column(i, i, ancho)
+    
+    workbook.close()
     
     return temp_file.name
 
-def export_reporte_general(asistentes_total, asistentes_confirmados, asistencia_charlas, charlas):
+def export_reporte_general(estadisticas):
     """
     Genera un reporte general con estadísticas profesionales
     
     Args:
-        asistentes_total (int): Total de asistentes registrados
-        asistentes_confirmados (int): Total de asistentes que confirmaron asistencia
-        asistencia_charlas (dict): Estadísticas por charla
-        charlas (list): Lista de todas las charlas
+        estadisticas (Estadisticas): Totales del evento y conteos por charla
+                                     (ver estadisticas.calcular_estadisticas)
         
     Returns:
         str: Ruta al archivo Excel temporal
@@ -322,15 +493,15 @@ def export_reporte_general(asistentes_total, asistentes_confirmados, asistencia_
         
         # Datos
         worksheet_resumen.merge_range('A6:C6', 'Total de asistentes registrados', cell_format)
-        worksheet_resumen.write('D6', asistentes_total, cell_format)
+        worksheet_resumen.write('D6', estadisticas.asistentes_total, cell_format)
         
         worksheet_resumen.merge_range('A7:C7', 'Total de asistentes que confirmaron asistencia', cell_format)
-        worksheet_resumen.write('D7', asistentes_confirmados, cell_format)
+        worksheet_resumen.write('D7', estadisticas.asistentes_confirmados, cell_format)
         
         worksheet_resumen.merge_range('A8:C8', 'Porcentaje de confirmación', cell_format)
         
         # Evitar división por cero
-        porcentaje = 0 if asistentes_total == 0 else asistentes_confirmados / asistentes_total
+        porcentaje = 0 if estadisticas.asistentes_total == 0 else estadisticas.asistentes_confirmados / estadisticas.asistentes_total
         worksheet_resumen.write('D8', porcentaje, percent_format)
         
         # Espacio
@@ -347,19 +518,17 @@ def export_reporte_general(asistentes_total, asistentes_confirmados, asistencia_
         
         # Añadir datos por cada charla
         row = 12
-        for charla in charlas:
-            if charla.id in asistencia_charlas:
-                stats = asistencia_charlas[charla.id]
-                worksheet_resumen.write(f'A{row}', charla.id, cell_format)
-                worksheet_resumen.write(f'B{row}', stats['nombre'], cell_format)
-                worksheet_resumen.write(f'C{row}', stats['total_registrados'], cell_format)
-                worksheet_resumen.write(f'D{row}', stats['total_asistieron'], cell_format)
-                
-                # Evitar división por cero
-                porcentaje_charla = 0 if stats['total_registrados'] == 0 else stats['total_asistieron'] / stats['total_registrados']
-                worksheet_resumen.write(f'E{row}', porcentaje_charla, percent_format)
-                
-                row += 1
+        for stats in estadisticas.charlas:
+            worksheet_resumen.write(f'A{row}', stats.id, cell_format)
+            worksheet_resumen.write(f'B{row}', stats.nombre, cell_format)
+            worksheet_resumen.write(f'C{row}', stats.total_registrados, cell_format)
+            worksheet_resumen.write(f'D{row}', stats.total_asistieron, cell_format)
+            
+            # Evitar división por cero
+            porcentaje_charla = 0 if stats.total_registrados == 0 else stats.total_asistieron / stats.total_registrados
+            worksheet_resumen.write(f'E{row}', porcentaje_charla, percent_format)
+            
+            row += 1
         
         # Auto ajustar columnas
         worksheet_resumen.set_column('A:A', 10)
@@ -374,9 +543,9 @@ def export_reporte_general(asistentes_total, asistentes_confirmados, asistencia_
         data_sheet.write('A1', 'Categoría')
         data_sheet.write('B1', 'Valor')
         data_sheet.write('A2', 'Asistieron')
-        data_sheet.write('B2', asistentes_confirmados)
+        data_sheet.write('B2', estadisticas.asistentes_confirmados)
         data_sheet.write('A3', 'No Asistieron')
-        data_sheet.write('B3', asistentes_total - asistentes_confirmados)
+        data_sheet.write('B3', estadisticas.asistentes_total - estadisticas.asistentes_confirmados)
         
         # Configurar el gráfico
         chart_pie.add_series({
@@ -402,13 +571,11 @@ def export_reporte_general(asistentes_total, asistentes_confirmados, asistencia_
         col_data_sheet.write('C1', 'Asistieron')
         
         row_data = 2
-        for charla in charlas:
-            if charla.id in asistencia_charlas:
-                stats = asistencia_charlas[charla.id]
-                col_data_sheet.write(f'A{row_data}', stats['nombre'])
-                col_data_sheet.write(f'B{row_data}', stats['total_registrados'])
-                col_data_sheet.write(f'C{row_data}', stats['total_asistieron'])
-                row_data += 1
+        for stats in estadisticas.charlas:
+            col_data_sheet.write(f'A{row_data}', stats.nombre)
+            col_data_sheet.write(f'B{row_data}', stats.total_registrados)
+            col_data_sheet.write(f'C{row_data}', stats.total_asistieron)
+            row_data += 1
         
         # Configurar el gráfico de columnas
         chart_column.add_series({